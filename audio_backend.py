@@ -0,0 +1,97 @@
+"""
+PortAudio started in the background, and the agents' start-up timeline.
+
+pyaudio.PyAudio() initializes PortAudio, which enumerates every host API and
+probes every device before it returns (on Windows: MME, DirectSound, WASAPI
+and WDM-KS, each listing the virtual cables again). Done at import time, as
+the agents used to, that cost sits in series with loading the Gemini SDK and
+connecting the pre-warmed Live sessions.
+
+AudioBackend runs it on a thread, started as the first thing an agent does,
+so device enumeration overlaps with the remaining imports and with session
+setup. Code that needs the PyAudio instance awaits ready() (or calls get())
+and only waits for whatever enumeration has left; the device list it read
+is handed to audio_devices.DeviceResolver instead of enumerating again.
+
+since_launch() measures from the moment the OS started the process, so the
+"ready" lines the agents log include the interpreter's own start-up.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+_imported = time.monotonic()
+
+
+def _process_age():
+    """Seconds since this process was started, from /proc; None where that is not available."""
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", encoding="ascii") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - started_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+# Process start on the monotonic clock, or this module's import when the OS cannot tell us
+_launched = _imported - (_process_age() or 0.0)
+
+
+def since_launch() -> float:
+    """Milliseconds since the process was launched."""
+    return (time.monotonic() - _launched) * 1000
+
+
+def _open_pyaudio():
+    import pyaudio
+    return pyaudio.PyAudio()
+
+
+class AudioBackend:
+    """A PyAudio instance created on a background thread, with the device list it found."""
+
+    def __init__(self, factory=None):
+        self._factory = factory or _open_pyaudio
+        self._future = concurrent.futures.Future()
+        self._thread = None
+        self.devices = []  # get_device_info_by_index() of every device, in index order
+        self.init_ms = None
+
+    def start(self) -> "AudioBackend":
+        """Starts PortAudio on a daemon thread; returns self so it can be chained."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._init, name="portaudio-init", daemon=True)
+            self._thread.start()
+        return self
+
+    def _init(self):
+        started = time.monotonic()
+        try:
+            pya = self._factory()
+            self.devices = [pya.get_device_info_by_index(i) for i in range(pya.get_device_count())]
+        except Exception as e:
+            self._future.set_exception(e)
+            return
+        self.init_ms = (time.monotonic() - started) * 1000
+        log.info("PortAudio up with %d devices in %.0f ms", len(self.devices), self.init_ms)
+        self._future.set_result(pya)
+
+    def get(self):
+        """The PyAudio instance, waiting for the background start-up if it is still running."""
+        return self.start()._future.result()
+
+    async def ready(self):
+        """Awaitable get(): the event loop keeps running while PortAudio starts."""
+        return await asyncio.wrap_future(self.start()._future)
+
+    def terminate(self):
+        if self._future.done() and self._future.exception() is None:
+            self._future.result().terminate()
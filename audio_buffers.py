@@ -0,0 +1,168 @@
+"""
+Preallocated PCM buffers shared between asyncio tasks and PortAudio callbacks.
+"""
+
+import asyncio
+import collections
+import threading
+
+# Overflow policies for bounded buffers
+DROP_OLDEST = "drop-oldest"
+DROP_NEWEST = "drop-newest"
+BLOCK = "block"
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class PCMRingBuffer:
+    """Fixed-size byte ring buffer, safe to use from the event loop and an audio callback thread."""
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+        # Counters
+        self.overruns = 0
+        self.dropped_bytes = 0
+        self.high_water = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def free(self) -> int:
+        return self.capacity - self._size
+
+    def write(self, data, overwrite: bool = False) -> int:
+        """Copies data into the ring and returns the number of bytes stored.
+
+        With overwrite=True the oldest bytes are discarded to make room, otherwise
+        only what fits is written and the caller is expected to retry the rest.
+        """
+        src = memoryview(data).cast("B")
+        with self._lock:
+            if overwrite:
+                if len(src) > self.capacity:
+                    self.dropped_bytes += len(src) - self.capacity
+                    src = src[-self.capacity:]
+                excess = len(src) - (self.capacity - self._size)
+                if excess > 0:
+                    self._start = (self._start + excess) % self.capacity
+                    self._size -= excess
+                    self.overruns += 1
+                    self.dropped_bytes += excess
+            else:
+                src = src[:self.capacity - self._size]
+
+            n = len(src)
+            if n:
+                end = (self._start + self._size) % self.capacity
+                first = min(n, self.capacity - end)
+                self._view[end:end + first] = src[:first]
+                if first < n:
+                    self._view[:n - first] = src[first:]
+                self._size += n
+                if self._size > self.high_water:
+                    self.high_water = self._size
+            return n
+
+    def read_into(self, out: memoryview) -> int:
+        """Moves up to len(out) bytes into out and returns how many were copied."""
+        with self._lock:
+            n = min(len(out), self._size)
+            if n:
+                first = min(n, self.capacity - self._start)
+                out[:first] = self._view[self._start:self._start + first]
+                if first < n:
+                    out[first:n] = self._view[:n - first]
+                self._start = (self._start + n) % self.capacity
+                self._size -= n
+            return n
+
+    def clear(self) -> int:
+        """Discards everything buffered and returns the number of bytes dropped."""
+        with self._lock:
+            n = self._size
+            self._start = 0
+            self._size = 0
+            return n
+
+
+class FrameQueue:
+    """Bounded asyncio queue of audio chunks with an explicit overflow policy.
+
+    drop-oldest keeps the leg close to real time, drop-newest keeps what is
+    already queued, and block makes put() wait for room like asyncio.Queue.
+    """
+
+    def __init__(self, maxsize: int, policy: str = DROP_OLDEST):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {POLICIES}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._items = collections.deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+
+        # Counters
+        self.dropped = 0
+        self.high_water = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def put_nowait(self, item) -> bool:
+        """Queues item and returns False if it was the one dropped."""
+        if len(self._items) >= self.maxsize:
+            if self.policy == DROP_OLDEST:
+                self._items.popleft()
+                self.dropped += 1
+            elif self.policy == DROP_NEWEST:
+                self.dropped += 1
+                return False
+            else:
+                raise asyncio.QueueFull
+        self._items.append(item)
+        if len(self._items) > self.high_water:
+            self.high_water = len(self._items)
+        self._not_empty.set()
+        return True
+
+    async def put(self, item) -> bool:
+        while self.policy == BLOCK and len(self._items) >= self.maxsize:
+            self._not_full.clear()
+            await self._not_full.wait()
+        return self.put_nowait(item)
+
+    async def get(self):
+        while not self._items:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        item = self._items.popleft()
+        self._not_full.set()
+        return item
+
+    def clear(self) -> int:
+        """Drops everything queued and returns how many items were discarded."""
+        n = len(self._items)
+        self._items.clear()
+        self._not_full.set()
+        return n
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self._items),
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "dropped": self.dropped,
+            "high_water": self.high_water,
+        }
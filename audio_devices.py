@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Audio devices chosen by name, opened in their lowest-latency format.
+
+PortAudio numbers devices in enumeration order, and Windows reorders them
+whenever a device is added, removed or re-enabled, so a hardcoded index ends
+up on the wrong device. DeviceResolver selects devices by name (a
+case-insensitive substring such as "CABLE Input") and optionally host API
+("WASAPI", "MME", ...). The same endpoint shows up once per host API; the
+resolver takes the one with the lowest reported latency that accepts 16-bit
+audio, and opens it at the Live API format when the device supports it, or at
+the closest format it does support (the engines resample).
+
+Probing a device means asking PortAudio about every candidate rate and channel
+count, which takes a while per device on Windows. The results are cached in a
+JSON file keyed by a fingerprint of the whole device list, so a call start
+normally resolves its devices from the cache; any change to the device list
+probes again. Every PyAudio call goes through the `pya` object, so a fake
+backend can stand in for it (see bench_devices.py).
+
+    python audio_devices.py                      # list devices
+    python audio_devices.py "CABLE Input" --output --host-api WASAPI
+"""
+
+import argparse
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CACHE = "audio_devices.json"
+CANDIDATE_RATES = (16000, 24000, 44100, 48000)
+CANDIDATE_CHANNELS = (1, 2)
+PA_INT16 = 8  # pyaudio.paInt16, without importing pyaudio for the constant
+DIRECTIONS = ("input", "output")
+
+
+class DeviceNotFoundError(LookupError):
+    """No device matches the requested name, host API and direction."""
+
+
+@dataclass
+class DeviceChoice:
+    """A device and the format to open it in."""
+    index: int
+    name: str
+    host_api: str
+    direction: str
+    rate: int
+    channels: int
+    latency_ms: float
+
+    def __str__(self):
+        return (f"Device {self.index} '{self.name}' [{self.host_api}] {self.rate} Hz x{self.channels}, "
+                f"{self.latency_ms:.0f} ms")
+
+
+def device_setting(variable, default=None):
+    """A device from environment variable `variable`: a name, an index, or empty for the system default."""
+    value = os.getenv(variable)
+    if value is None:
+        return default
+    value = value.strip()
+    if not value:
+        return None
+    return int(value) if value.isdigit() else value
+
+
+def choose_format(formats, rate, channels, default_rate=None):
+    """The supported (rate, channels) closest to the wanted one: same rate first, then same channels."""
+    return min(formats, key=lambda f: (f[0] != rate, f[1] != channels, f[0] != default_rate,
+                                       abs(f[0] - rate), f[0] < rate, f[1]))
+
+
+class DeviceResolver:
+    """Resolves device names to indices and formats, probing each device once per device list."""
+
+    def __init__(self, pya, cache_path=DEFAULT_CACHE, devices=None, rates=CANDIDATE_RATES,
+                 channels=CANDIDATE_CHANNELS):
+        self.pya = pya
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.rates = rates
+        self.channel_counts = channels
+        self.devices = devices if devices is not None else [
+            pya.get_device_info_by_index(i) for i in range(pya.get_device_count())]
+        self._host_apis = {}
+        self.fingerprint = self._fingerprint()
+        self._probes = self._load()
+        self._dirty = False
+
+        # Counters
+        self.probed = 0
+        self.cache_hits = 0
+        self.probe_ms = 0.0
+
+    def _fingerprint(self) -> str:
+        listing = [(d.get("name"), d.get("hostApi"), d.get("maxInputChannels"), d.get("maxOutputChannels"),
+                    d.get("defaultSampleRate")) for d in self.devices]
+        return hashlib.sha256(json.dumps(listing).encode("utf-8")).hexdigest()[:16]
+
+    def _load(self) -> dict:
+        if self.cache_path is None:
+            return {}
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            log.warning("Ignoring unreadable device cache %s", self.cache_path)
+            return {}
+        if data.get("fingerprint") != self.fingerprint:
+            return {}  # The device list changed: indices and formats may all be different
+        return data.get("devices", {})
+
+    def save(self):
+        """Writes new probe results to the cache file."""
+        if self.cache_path is None or not self._dirty:
+            return
+        tmp = self.cache_path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps({"fingerprint": self.fingerprint, "devices": self._probes}, indent=1),
+                           encoding="utf-8")
+            os.replace(tmp, self.cache_path)
+            self._dirty = False
+        except OSError as e:
+            log.warning("Could not write device cache %s: %s", self.cache_path, e)
+
+    def host_api(self, index) -> str:
+        name = self._host_apis.get(index)
+        if name is None:
+            name = self._host_apis[index] = self.pya.get_host_api_info_by_index(index)["name"]
+        return name
+
+    def probe(self, index) -> dict:
+        """Supported formats and reported latency of one device, in each direction it has."""
+        key = str(index)
+        probe = self._probes.get(key)
+        if probe is not None:
+            self.cache_hits += 1
+            return probe
+        started = time.perf_counter()
+        info = self.devices[index]
+        default_rate = int(info.get("defaultSampleRate") or 0)
+        rates = sorted(set(self.rates) | ({default_rate} if default_rate else set()))
+        probe = {}
+        for direction in DIRECTIONS:
+            max_channels = info.get(f"max{direction.title()}Channels", 0)
+            if not max_channels:
+                continue
+            formats = []
+            for rate in rates:
+                for channels in self.channel_counts:
+                    if channels <= max_channels and self._supported(index, direction, rate, channels):
+                        formats.append([rate, channels])
+            probe[direction] = {
+                "formats": formats,
+                "latency_ms": round(info.get(f"defaultLow{direction.title()}Latency", 0.0) * 1000, 2),
+            }
+        self._probes[key] = probe
+        self._dirty = True
+        self.probed += 1
+        self.probe_ms += (time.perf_counter() - started) * 1000
+        return probe
+
+    def _supported(self, index, direction, rate, channels) -> bool:
+        try:
+            return bool(self.pya.is_format_supported(rate, **{f"{direction}_device": index,
+                                                              f"{direction}_channels": channels,
+                                                              f"{direction}_format": PA_INT16}))
+        except ValueError:
+            return False  # PyAudio reports an unsupported format by raising
+
+    def _default_index(self, direction):
+        try:
+            info = getattr(self.pya, f"get_default_{direction}_device_info")()
+        except OSError as e:
+            raise DeviceNotFoundError(f"No default {direction} device") from e
+        return info["index"]
+
+    def candidates(self, device, direction, host_api=None) -> list:
+        """Indices of the devices matching `device` (a name substring, an index or None for the default)."""
+        if device is None:
+            return [self._default_index(direction)]
+        if isinstance(device, int):
+            return [device] if 0 <= device < len(self.devices) else []
+        wanted = device.casefold()
+        api = host_api.casefold() if host_api else None
+        return [i for i, info in enumerate(self.devices)
+                if wanted in info.get("name", "").casefold()
+                and info.get(f"max{direction.title()}Channels", 0) > 0
+                and (api is None or api in self.host_api(info["hostApi"]).casefold())]
+
+    def resolve(self, device, direction, rate, channels, host_api=None) -> DeviceChoice:
+        """The lowest-latency device matching `device` that accepts 16-bit audio, and its closest format."""
+        choices = []
+        for index in self.candidates(device, direction, host_api):
+            probe = self.probe(index).get(direction)
+            if not probe or not probe["formats"]:
+                continue
+            info = self.devices[index]
+            fmt_rate, fmt_channels = choose_format(probe["formats"], rate, channels,
+                                                   int(info.get("defaultSampleRate") or 0))
+            choices.append(DeviceChoice(index, info["name"], self.host_api(info["hostApi"]), direction,
+                                        fmt_rate, fmt_channels, probe["latency_ms"]))
+        self.save()
+        if not choices:
+            names = sorted({d["name"] for d in self.devices if d.get(f"max{direction.title()}Channels", 0) > 0})
+            raise DeviceNotFoundError(f"No {direction} device matches {device!r}"
+                                      f"{f' on {host_api!r}' if host_api else ''}; {direction} devices: {names}")
+        # Ties (same latency) go to the format needing no conversion, then to a stable order
+        return min(choices, key=lambda c: (c.latency_ms, (c.rate, c.channels) != (rate, channels),
+                                           c.host_api, c.name, c.index))
+
+    def configure(self, settings, input_device=None, output_device=None, host_api=None):
+        """Resolves one call's devices; returns (input, output, settings opening them in their formats).
+
+        Device rates and channels already set in settings are the wanted format
+        instead of the Live API's.
+        """
+        source = self.resolve(input_device, "input", settings.input_device_rate or settings.send_sample_rate,
+                              settings.input_device_channels or settings.channels, host_api)
+        sink = self.resolve(output_device, "output", settings.output_device_rate or settings.receive_sample_rate,
+                            settings.output_device_channels or settings.channels, host_api)
+        settings = dataclasses.replace(settings, input_device_rate=source.rate, input_device_channels=source.channels,
+                                       output_device_rate=sink.rate, output_device_channels=sink.channels)
+        return source, sink, settings
+
+    def stats(self) -> dict:
+        return {
+            "devices": len(self.devices),
+            "fingerprint": self.fingerprint,
+            "probed": self.probed,
+            "cache_hits": self.cache_hits,
+            "probe_ms": round(self.probe_ms, 1),
+        }
+
+
+def main():
+    import pyaudio
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("name", nargs="?", help="resolve this device name instead of listing all devices")
+    parser.add_argument("--output", action="store_true", help="resolve an output device (default: input)")
+    parser.add_argument("--host-api", help="only consider this host API, e.g. WASAPI or MME")
+    parser.add_argument("--rate", type=int, help="wanted rate (default: 16000 in, 24000 out)")
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--cache", default=DEFAULT_CACHE)
+    args = parser.parse_args()
+
+    pya = pyaudio.PyAudio()
+    try:
+        resolver = DeviceResolver(pya, args.cache)
+        if args.name is None:
+            for index, info in enumerate(resolver.devices):
+                print(f"{index:3} [{resolver.host_api(info['hostApi'])}] {info['name']}  "
+                      f"IN: {info['maxInputChannels']} OUT: {info['maxOutputChannels']}  "
+                      f"{int(info['defaultSampleRate'])} Hz")
+            return
+        direction = "output" if args.output else "input"
+        rate = args.rate or (24000 if args.output else 16000)
+        print(resolver.resolve(args.name, direction, rate, args.channels, args.host_api))
+        print(json.dumps(resolver.stats()))
+    finally:
+        pya.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark: legacy blocking capture loop vs. the callback/ring capture engine.
+
+Feeds SECONDS of synthetic 16 kHz audio through both paths as fast as possible
+(no device needed) and reports, per second of captured audio, the CPU time,
+the bytes allocated (tracemalloc) and the number of generation-0 GC runs,
+which track how many container objects such as per-frame dicts were created.
+"""
+
+import asyncio
+import gc
+import threading
+import time
+import tracemalloc
+
+from capture import CaptureEngine
+
+RATE = 16000
+SECONDS = 20
+LEGACY_CHUNK = 1024
+FRAME_MS = 20
+
+
+class FakeBlockingStream:
+    """Stands in for a blocking PyAudio input stream."""
+
+    def __init__(self, chunk):
+        self._data = bytes(chunk * 2)
+
+    def read(self, n, exception_on_overflow=False):
+        return self._data
+
+
+async def legacy(total_frames):
+    """The original listen_audio()/send_realtime() pair."""
+    stream = FakeBlockingStream(LEGACY_CHUNK)
+    queue = asyncio.Queue(maxsize=5)
+
+    async def listen():
+        for _ in range(total_frames):
+            data = await asyncio.to_thread(stream.read, LEGACY_CHUNK, exception_on_overflow=False)
+            await queue.put({"data": data, "mime_type": "audio/pcm"})
+
+    async def send():
+        for _ in range(total_frames):
+            msg = await queue.get()
+            len(msg["data"])
+
+    await asyncio.gather(listen(), send())
+
+
+async def ring(total_frames):
+    """CaptureEngine driven from a thread that plays the PortAudio callback."""
+    engine = CaptureEngine(None, rate=RATE, frame_ms=FRAME_MS)
+    engine.bind()
+    in_data = bytes(engine.frame_bytes)
+
+    def portaudio():
+        for _ in range(total_frames):
+            while engine._ring.free() < engine.frame_bytes:
+                time.sleep(0.0005)
+            engine._callback(in_data, engine.frame_samples, None, 0)
+
+    producer = threading.Thread(target=portaudio)
+    producer.start()
+    for _ in range(total_frames):
+        frame = await engine.read_frame()
+        len(frame)
+    producer.join()
+
+
+def measure(name, coro_fn, frame_samples):
+    total_frames = int(RATE * SECONDS / frame_samples)
+    gc.collect()
+    gen0_before = gc.get_stats()[0]["collections"]
+    tracemalloc.start()
+    cpu = time.process_time()
+    asyncio.run(coro_fn(total_frames))
+    cpu = time.process_time() - cpu
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gen0 = gc.get_stats()[0]["collections"] - gen0_before
+    print(f"{name:<8} CPU {cpu / SECONDS * 1000:7.2f} ms/s   "
+          f"peak traced {peak / 1024:8.1f} KiB   gen0 GCs {gen0 / SECONDS:6.2f}/s")
+
+
+if __name__ == "__main__":
+    print(f"{SECONDS} s of {RATE} Hz mono audio per path")
+    measure("legacy", legacy, LEGACY_CHUNK)
+    measure("ring", ring, int(RATE * FRAME_MS / 1000))
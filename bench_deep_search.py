@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Rate limiting and deep search benchmark against mock_stock_api.py, with the
+mock enforcing per-provider quotas the way the real APIs do (fixed windows,
+X-Ratelimit-* headers, 429 with Retry-After).
+
+1. Burst: --burst searches at once against a provider allowing --limit per
+   second, sent raw (as before) and through the scheduler. Counts 429s,
+   failed searches and how long the burst took.
+2. Shared quota: another client has already used up the window. The first
+   response's headers pause the bucket until the reset instead of failing.
+3. per_page: asks every provider for 500 results per page; each gets the
+   most it accepts instead of an error.
+4. Deep search: --pages pages of 30 per provider, fetched one after another
+   and with stock_search.deep_search(). Reports when the first page arrived
+   and when the last did. Then again with Pixabay nearly out of quota: pages
+   beyond the budget come back as errors within max_wait instead of hanging.
+
+"checks" summarizes whether each behaviour held; the run exits with status 1
+if any of them did not.
+
+    python bench_deep_search.py --burst 60 --limit 20 --pages 10
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import stock_search
+from mock_stock_api import MockStockAPI
+from rate_limit import TokenBucket
+
+
+def reset_limiters(limits):
+    for name in stock_search.PLATFORMS:
+        stock_search.LIMITERS[name] = TokenBucket(*limits.get(name, stock_search.RATE_LIMITS[name]))
+
+
+async def run_burst(server, burst, limit) -> dict:
+    server.rate_limits = {"pexels": (limit, 1.0)}
+    url = f"{stock_search.API_URLS['pexels']}/search"
+    headers = {"Authorization": stock_search.API_KEYS["pexels"]}
+    client = stock_search.http_client()
+
+    server._windows.clear()
+    before = server.throttled["pexels"]
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(client.get(url, params={"query": f"q{i}"}, headers=headers)
+                                       for i in range(burst)))
+    raw = {
+        "seconds": round(time.perf_counter() - started, 2),
+        "http_429": server.throttled["pexels"] - before,
+        "failed": sum(r.status_code != 200 for r in responses),
+    }
+
+    await asyncio.sleep(1.1)
+    server._windows.clear()
+    reset_limiters({"pexels": (limit, 1.0)})
+    before = server.throttled["pexels"]
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(stock_search.search_platforms(f"q{i}", "pexels") for i in range(burst)))
+    scheduled = {
+        "seconds": round(time.perf_counter() - started, 2),
+        "http_429": server.throttled["pexels"] - before,
+        "failed": sum(bool(errors) for _, errors in outcomes),
+        "limiter": stock_search.LIMITERS["pexels"].stats(),
+    }
+    return {"limit_per_s": limit, "searches": burst, "raw": raw, "scheduled": scheduled}
+
+
+async def run_shared_quota(server, limit) -> dict:
+    server.rate_limits = {"unsplash": (limit, 2.0)}
+    server._windows["unsplash"] = (time.monotonic(), limit)  # Someone else spent this window
+    reset_limiters({"unsplash": (limit, 2.0)})
+    before = server.throttled["unsplash"]
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(stock_search.search_platforms(f"s{i}", "unsplash") for i in range(5)))
+    return {
+        "seconds": round(time.perf_counter() - started, 2),
+        "http_429": server.throttled["unsplash"] - before,
+        "failed": sum(bool(errors) for _, errors in outcomes),
+        "limiter": stock_search.LIMITERS["unsplash"].stats(),
+    }
+
+
+async def run_per_page(server) -> dict:
+    server.rate_limits = {}
+    results, errors = await stock_search.search_platforms("clamp", per_page=500)
+    return {"images": {name: len(images) for name, images in results.items()}, "errors": errors}
+
+
+async def sequential_pages(query, pages, per_page):
+    for name in stock_search.PLATFORMS:
+        for page in range(1, pages + 1):
+            await stock_search.PAGES[name](query, per_page, page)
+
+
+async def run_deep(server, pages, per_page=30) -> dict:
+    server.rate_limits = {}
+    reset_limiters({})
+    started = time.perf_counter()
+    await sequential_pages("deep", pages, per_page)
+    sequential_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    first = None
+    received = {}
+    async for name, page, images in stock_search.deep_search("deep", pages=pages, per_page=per_page):
+        first = first or time.perf_counter() - started
+        received[name] = received.get(name, 0) + len(images)
+    total_s = time.perf_counter() - started
+    deep = {
+        "first_page_ms": round(first * 1000, 1),
+        "all_pages_ms": round(total_s * 1000, 1),
+        "images": received,
+    }
+
+    # Pixabay with 3 requests left in a 30 s window: the rest of its pages are over budget
+    server.rate_limits = {"pixabay": (3, 30.0)}
+    server._windows.clear()
+    reset_limiters({"pixabay": (3, 30.0)})
+    started = time.perf_counter()
+    ok, skipped = {}, {}
+    async for name, page, images in stock_search.deep_search("budget", pages=pages, per_page=per_page, max_wait=1.0):
+        if isinstance(images, stock_search.StockImageError):
+            skipped[name] = skipped.get(name, 0) + 1
+        else:
+            ok[name] = ok.get(name, 0) + 1
+    budget = {
+        "seconds": round(time.perf_counter() - started, 2),
+        "pages": ok,
+        "over_budget": skipped,
+        "http_429": server.throttled["pixabay"],
+    }
+    return {"pages": pages, "sequential_ms": round(sequential_s * 1000, 1), "deep": deep, "budget": budget}
+
+
+async def run(args) -> dict:
+    delays = {"pexels": 120, "unsplash": 250, "pixabay": 180}
+    async with MockStockAPI(port=0, delay_ms=delays, total=10000) as server:
+        stock_search.API_URLS.update(server.api_urls())
+        stock_search.API_KEYS.update({name: "bench" for name in stock_search.PLATFORMS})
+        try:
+            server.delay_ms.update({name: 20 for name in delays})
+            results = {
+                "burst": await run_burst(server, args.burst, args.limit),
+                "shared_quota": await run_shared_quota(server, 5),
+                "per_page": await run_per_page(server),
+            }
+            server.delay_ms.update(delays)
+            results["deep_search"] = await run_deep(server, args.pages)
+        finally:
+            await stock_search.close_clients()
+            reset_limiters({})
+
+    burst, shared, deep = results["burst"], results["shared_quota"], results["deep_search"]
+    results["checks"] = {
+        "raw_burst_hits_429": burst["raw"]["http_429"] > 0,
+        "scheduled_burst_all_succeed": burst["scheduled"]["failed"] == 0,
+        # Searches already sent when the quota turned out to be gone may each see one 429
+        "shared_quota_recovers": shared["failed"] == 0 and shared["http_429"] <= shared["limiter"]["requests"] // 2,
+        "per_page_clamped": results["per_page"]["images"] == {"pexels": 80, "unsplash": 30, "pixabay": 200},
+        "first_page_before_all": deep["deep"]["first_page_ms"] < deep["deep"]["all_pages_ms"] / 2,
+        "deep_faster_than_sequential": deep["deep"]["all_pages_ms"] < deep["sequential_ms"] / 3,
+        "over_budget_pages_skipped": deep["budget"]["over_budget"].get("pixabay", 0) == args.pages - 3
+                                     and deep["budget"]["http_429"] == 0,
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=60, help="simultaneous searches in the burst")
+    parser.add_argument("--limit", type=int, default=20, help="searches per second the mock allows")
+    parser.add_argument("--pages", type=int, default=10, help="pages per provider in the deep search")
+    parser.add_argument("--out", help="write the JSON results here as well as to stdout")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
+    failed = [name for name, ok in results["checks"].items() if not ok]
+    if failed:
+        raise SystemExit(f"Failed checks: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
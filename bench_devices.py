@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Device resolution benchmark on a simulated Windows device list, so it runs
+anywhere: a fake PyAudio lists a microphone, Stereo Mix, the VB-Audio cable
+and Voicemeeter under MME, DirectSound and WASAPI, with the formats and
+latencies each host API typically reports (WASAPI shared mode only opens
+the 48 kHz stereo mix format) and --probe-ms per format query.
+
+1. Cold: resolving a call's input and output with no cache probes every
+   matching device.
+2. Warm: the next start, with the same devices, resolves from the cache.
+3. Reordered: a new device appears at index 0. The fingerprint changes, the
+   devices are probed again, and the same endpoints are chosen under their
+   new indices.
+4. Host API: restricted to MME, the devices open at the Live API format.
+
+"checks" summarizes whether each behaviour held.
+
+    python bench_devices.py --probe-ms 5
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from audio_devices import DeviceResolver
+from call_session import AudioSettings
+
+HOST_APIS = ["MME", "Windows DirectSound", "Windows WASAPI"]
+# (name, max input channels, max output channels)
+ENDPOINTS = [
+    ("Microphone (Realtek(R) Audio)", 2, 0),
+    ("Stereo Mix (Realtek(R) Audio)", 2, 0),
+    ("CABLE Output (VB-Audio Virtual Cable)", 2, 0),
+    ("Speakers (Realtek(R) Audio)", 0, 2),
+    ("CABLE Input (VB-Audio Virtual Cable)", 0, 2),
+    ("Voicemeeter Out B2 (VB-Audio Voicemeeter VAIO)", 2, 0),
+]
+LATENCY_S = {"MME": 0.09, "Windows DirectSound": 0.12, "Windows WASAPI": 0.003}
+
+
+class FakePyAudio:
+    """The subset of pyaudio.PyAudio the resolver uses, over a fixed device list."""
+
+    def __init__(self, endpoints=ENDPOINTS, probe_s=0.005):
+        self.probe_s = probe_s
+        self.queries = 0
+        self.devices = []
+        for api_index, api in enumerate(HOST_APIS):
+            for name, max_in, max_out in endpoints:
+                self.devices.append({
+                    "index": len(self.devices), "name": name, "hostApi": api_index,
+                    "maxInputChannels": max_in, "maxOutputChannels": max_out,
+                    "defaultSampleRate": 48000.0 if api == "Windows WASAPI" else 44100.0,
+                    "defaultLowInputLatency": LATENCY_S[api] if max_in else 0.0,
+                    "defaultLowOutputLatency": LATENCY_S[api] if max_out else 0.0,
+                })
+
+    def get_device_count(self):
+        return len(self.devices)
+
+    def get_device_info_by_index(self, index):
+        return dict(self.devices[index])
+
+    def get_host_api_info_by_index(self, index):
+        return {"index": index, "name": HOST_APIS[index]}
+
+    def get_default_input_device_info(self):
+        return self.get_device_info_by_index(0)
+
+    def get_default_output_device_info(self):
+        return self.get_device_info_by_index(3)
+
+    def is_format_supported(self, rate, input_device=None, input_channels=None, input_format=None,
+                            output_device=None, output_channels=None, output_format=None):
+        self.queries += 1
+        time.sleep(self.probe_s)
+        index = input_device if input_device is not None else output_device
+        channels = input_channels or output_channels
+        if HOST_APIS[self.devices[index]["hostApi"]] == "Windows WASAPI" and (rate, channels) != (48000, 2):
+            raise ValueError("Invalid sample rate")  # As PyAudio reports it
+        return True
+
+
+def resolve(pya, cache, host_api=None) -> dict:
+    started = time.perf_counter()
+    resolver = DeviceResolver(pya, cache)
+    source, sink, settings = resolver.configure(AudioSettings(), "Stereo Mix", "CABLE Input", host_api)
+    return {
+        "ms": round((time.perf_counter() - started) * 1000, 2),
+        "input": str(source),
+        "output": str(sink),
+        "settings": [settings.input_device_rate, settings.input_device_channels,
+                     settings.output_device_rate, settings.output_device_channels],
+        "resolver": resolver.stats(),
+        "_choice": ((source.name, source.host_api), (sink.name, sink.host_api)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--probe-ms", type=float, default=5.0, help="simulated cost of one format query")
+    parser.add_argument("--out", help="write the JSON results here as well as to stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = Path(tmp) / "audio_devices.json"
+        pya = FakePyAudio(probe_s=args.probe_ms / 1000)
+        results = {"devices": pya.get_device_count(), "cold": resolve(pya, cache), "warm": resolve(pya, cache)}
+        moved = FakePyAudio([("Headset (Bluetooth)", 1, 2)] + ENDPOINTS, probe_s=args.probe_ms / 1000)
+        results["reordered"] = resolve(moved, cache)
+        results["reordered_warm"] = resolve(moved, cache)
+        results["mme"] = resolve(pya, None, host_api="MME")
+
+    cold, warm, moved = results["cold"], results["warm"], results["reordered"]
+    results["checks"] = {
+        "lowest_latency_host_api": cold["_choice"] == (("Stereo Mix (Realtek(R) Audio)", "Windows WASAPI"),
+                                                       ("CABLE Input (VB-Audio Virtual Cable)", "Windows WASAPI")),
+        "opens_supported_format": cold["settings"] == [48000, 2, 48000, 2],
+        "warm_start_skips_probing": warm["resolver"]["probed"] == 0 and warm["ms"] < cold["ms"] / 10,
+        "reorder_reprobes": moved["resolver"]["probed"] > 0
+                            and moved["resolver"]["fingerprint"] != cold["resolver"]["fingerprint"],
+        "reorder_same_endpoints": moved["_choice"] == cold["_choice"] and moved["input"] != cold["input"],
+        "reorder_then_cached": results["reordered_warm"]["resolver"]["probed"] == 0,
+        "mme_opens_live_format": results["mme"]["settings"] == [16000, 1, 24000, 1],
+    }
+    for entry in results.values():
+        if isinstance(entry, dict):
+            entry.pop("_choice", None)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
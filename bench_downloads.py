@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Image download benchmark against mock_stock_api.py.
+
+1. Workers: the same batch of distinct images with 1 and with --workers
+   concurrent transfers, from a mock in a separate process. Reports
+   throughput and the peak Python memory of the download (tracemalloc),
+   which should stay near a chunk per worker rather than growing with image
+   size.
+2. Dedup: a batch where half the images are the same picture under another
+   platform's URL and again under a third as .jpeg, followed by a repeat of
+   the whole batch. Reports the disk and network bytes saved and how many
+   files ended up on disk.
+3. Resume: the mock cuts every image off halfway on its first transfer. Every
+   file must still complete with the right content, receiving each byte once.
+
+    python bench_downloads.py --images 32 --image-kb 2048 --workers 8
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import stock_search
+from image_downloads import ImageStore
+from mock_stock_api import MockStockAPI, image_bytes
+
+
+def spawn_mock(image_kb, latency_ms):
+    """The mock in its own process, so its buffers stay out of the memory measurement."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    delays = [f"{name}={latency_ms}" for name in ("pexels", "unsplash", "pixabay")]
+    process = subprocess.Popen([sys.executable, str(Path(__file__).with_name("mock_stock_api.py")),
+                                "--port", str(port), "--image-kb", str(image_kb), "--delay-ms", *delays],
+                               stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.05)
+    process.kill()
+    raise SystemExit("mock_stock_api.py did not start")
+
+
+async def run_workers(directory, urls, workers) -> dict:
+    store = ImageStore(directory, workers=workers)
+    tracemalloc.start()
+    try:
+        report = await store.download(urls)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "workers": workers,
+        "seconds": report["seconds"],
+        "throughput_mb_s": report["throughput_mb_s"],
+        "peak_memory_kb": peak // 1024,
+        "counts": report["counts"],
+    }
+
+
+async def run_dedup(server, directory, images) -> dict:
+    half = images // 2
+    urls = [f"{server.url}/images/pexels/{i}.jpg" for i in range(images)]
+    urls += [f"{server.url}/images/pixabay/{i}.jpg" for i in range(half)]  # Same pictures, other platform
+    urls += [f"{server.url}/images/unsplash/{i}.jpeg" for i in range(half)]  # And again, under another suffix
+    store = ImageStore(directory, workers=8)
+    first = await store.download(urls)
+    before = server.image_requests
+    repeat = await ImageStore(directory, workers=8).download(urls)  # As after a restart
+    return {
+        "urls": len(urls),
+        "first": {key: first[key] for key in ("counts", "bytes_received", "bytes_written", "disk_bytes_saved")},
+        "repeat": {key: repeat[key] for key in ("counts", "bytes_received", "network_bytes_saved")},
+        "repeat_requests": server.image_requests - before,
+        "files_on_disk": len([path for path in Path(directory).iterdir() if path.suffix in (".jpg", ".jpeg")]),
+    }
+
+
+async def run_resume(server, directory, images) -> dict:
+    server.cut_first_download = True
+    try:
+        urls = [f"{server.url}/images/unsplash/{1000 + i}.jpg" for i in range(images)]
+        report = await ImageStore(directory, workers=8).download(urls)
+    finally:
+        server.cut_first_download = False
+    intact = 0
+    for i, url in enumerate(urls):
+        item = report["items"][url]
+        expected = hashlib.sha256(image_bytes(1000 + i, server.image_size)).hexdigest()
+        if item["status"] == "downloaded" and Path(item["path"]).stem == expected:
+            intact += 1
+    return {
+        "images": images,
+        "intact": intact,
+        "bytes_received": report["bytes_received"],
+        "bytes_expected": images * server.image_size,
+        "counts": report["counts"],
+    }
+
+
+async def run(args) -> dict:
+    async with MockStockAPI(port=0, delay_ms={name: args.latency_ms for name in ("pexels", "unsplash", "pixabay")},
+                            image_size=args.image_kb * 1024) as server:
+        try:
+            results = {"image_kb": args.image_kb, "latency_ms": args.latency_ms, "workers": []}
+            process, url = spawn_mock(args.image_kb, args.latency_ms)
+            try:
+                for workers in (1, args.workers):
+                    with tempfile.TemporaryDirectory() as tmp:
+                        urls = [f"{url}/images/pexels/{i}.jpg" for i in range(args.images)]
+                        results["workers"].append(await run_workers(tmp, urls, workers))
+            finally:
+                process.terminate()
+            with tempfile.TemporaryDirectory() as tmp:
+                results["dedup"] = await run_dedup(server, tmp, args.images)
+            with tempfile.TemporaryDirectory() as tmp:
+                results["resume"] = await run_resume(server, tmp, args.images // 2)
+        finally:
+            await stock_search.close_clients()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--image-kb", type=int, default=2048)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency-ms", type=int, default=50, help="mock delay before each image")
+    parser.add_argument("--out", help="write the JSON results here as well as to stdout")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
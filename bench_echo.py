@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the capture-path echo suppressor.
+
+Builds an echo fixture: the agent (sound.wav) plays through a simulated echo
+path (bulk delay, decaying room/loopback response, gain) into the capture
+signal, and a synthetic customer voice talks alone for a while and then over
+the agent. Runs EchoSuppressor over it frame
+by frame, with playback chunks fed through the tap interface, and reports:
+
+- per-frame CPU (mean, p99);
+- echo return loss enhancement (ERLE) where only the agent talks;
+- how much the customer is attenuated alone and during double talk;
+- frames the client VAD would call speech while only the agent talks
+  (false barge-in material), before and after suppression.
+
+A real call recorded with RECORDINGS_DIR (customer left, agent right) can be
+used instead; without ground truth only ERLE and VAD counts are reported.
+
+    python bench_echo.py [--delay-ms 120] [--save fixture.wav]
+    python bench_echo.py --recording recordings/call-1-20250101-120000.wav
+"""
+
+import argparse
+import json
+import time
+import wave
+
+import numpy as np
+
+from echo import EchoSuppressor
+from file_audio import read_wav
+from resample import StreamResampler
+from vad import VoiceActivityGate
+
+RATE = 16000
+FRAME_MS = 20
+BLOCK = RATE * FRAME_MS // 1000
+
+
+def echo_path(rate, delay_ms, tail_ms=60, gain_db=-6.0, seed=0) -> np.ndarray:
+    """Impulse response: bulk delay, then exponentially decaying noise."""
+    rng = np.random.default_rng(seed)
+    tail = rng.normal(0, 1, rate * tail_ms // 1000) * np.exp(-np.arange(rate * tail_ms // 1000) / (rate * 0.01))
+    tail[0] = 3.0  # Direct path
+    tail *= 10 ** (gain_db / 20) / np.sqrt(np.sum(tail ** 2))
+    return np.concatenate((np.zeros(rate * delay_ms // 1000), tail))
+
+
+def talker(seconds, rate, seed=0) -> np.ndarray:
+    """Harmonic voice with a moving pitch and syllable-rate envelope, unit RMS while talking."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    pitch = 190 + 40 * np.sin(2 * np.pi * 0.7 * t + rng.uniform(0, 6))
+    phase = 2 * np.pi * np.cumsum(pitch) / rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 9))
+    syllables = np.sin(np.pi * 4.5 * t) ** 2
+    voice *= syllables
+    return voice / np.sqrt(np.mean(voice ** 2))
+
+
+def fixture(delay_ms, echo_to_customer_db=6.0, seed=0):
+    """Returns (mic, ref, near, echo) float arrays at RATE for a 30 s synthetic call."""
+    far = np.frombuffer(read_wav("sound.wav", RATE, 1), dtype=np.int16).astype(np.float64)
+    n = 30 * RATE
+    ref = np.zeros(n)
+    ref[:min(n, len(far))] = far[:n] * 3000 / np.sqrt(np.mean(far ** 2))  # Agent at about -21 dBFS
+    ref[10 * RATE:14 * RATE] = 0  # Agent pauses: customer talks alone
+    ref[24 * RATE:] = 0
+    echo = np.convolve(ref, echo_path(RATE, delay_ms, seed=seed))[:n]
+    # The customer talks alone, then over the agent; while talking they are
+    # echo_to_customer_db quieter than the echo
+    target = np.mean(echo[17 * RATE:21 * RATE] ** 2) / 10 ** (echo_to_customer_db / 10)
+    near = np.zeros(n)
+    for start in (10, 17):
+        near[start * RATE:(start + 4) * RATE] = talker(4, RATE, seed + start) * np.sqrt(target)
+    noise = np.random.default_rng(seed + 1).normal(0, 10, n)
+    mic = echo + near + noise
+    return np.clip(mic, -32768, 32767), ref, near, echo
+
+
+def run(mic, ref):
+    """Feeds ref through the tap and mic through process() in 20 ms steps; returns (out, cpu_us)."""
+    suppressor = EchoSuppressor(rate=RATE, frame_ms=FRAME_MS)
+    mic16 = mic.astype(np.int16)
+    ref16 = np.clip(ref, -32768, 32767).astype(np.int16)
+    frames = len(mic16) // BLOCK
+    out = np.zeros(frames * BLOCK, dtype=np.int16)
+    cpu = np.empty(frames)
+    for i in range(frames):
+        # Playback runs ahead of capture: chunk i is heard during frame i
+        suppressor.write(ref16[i * BLOCK:(i + 1) * BLOCK].tobytes(), i * FRAME_MS / 1000)
+        frame = mic16[i * BLOCK:(i + 1) * BLOCK].tobytes()
+        started = time.perf_counter()
+        cleaned = suppressor.process(frame, (i + 1) * FRAME_MS / 1000)
+        cpu[i] = (time.perf_counter() - started) * 1e6
+        out[i * BLOCK:(i + 1) * BLOCK] = np.frombuffer(cleaned, dtype=np.int16)
+    return out.astype(np.float64), cpu, suppressor
+
+
+def frame_power(x) -> np.ndarray:
+    x = x[:len(x) // BLOCK * BLOCK].reshape(-1, BLOCK)
+    return np.mean(x * x, axis=1)
+
+
+def db(a, b) -> float:
+    return round(float(10 * np.log10((a + 1e-9) / (b + 1e-9))), 1)
+
+
+def vad_voiced(x, mask) -> int:
+    gate = VoiceActivityGate(rate=RATE, frame_ms=FRAME_MS)
+    x16 = np.clip(x, -32768, 32767).astype(np.int16)
+    return sum(bool(mask[i] and gate.is_voiced(x16[i * BLOCK:(i + 1) * BLOCK].tobytes()))
+               for i in range(len(mask)))
+
+
+def report(mic, ref, out, cpu, suppressor, near=None, echo=None) -> dict:
+    frames = len(out) // BLOCK
+    active = 10 ** (-45 / 10) * 32768.0 ** 2
+    p_ref = frame_power(ref)[:frames]
+    p_mic, p_out = frame_power(mic)[:frames], frame_power(out)[:frames]
+    far_active = p_ref > active
+    result = {
+        "frames": frames,
+        "cpu_us": {"mean": round(float(cpu.mean()), 1), "p99": round(float(np.percentile(cpu, 99)), 1),
+                   "share_of_frame_period": f"{cpu.mean() / (FRAME_MS * 1000):.2%}"},
+        "suppressor": suppressor.stats(),
+    }
+    if near is None:
+        result["erle_db_agent_active"] = db(p_mic[far_active].sum(), p_out[far_active].sum())
+        result["vad_voiced_frames_agent_active"] = {"before": vad_voiced(mic, far_active), "after": vad_voiced(out, far_active)}
+        return result
+
+    p_near = frame_power(near)[:frames]
+    near_active = p_near > active
+    far_only = far_active & ~near_active
+    near_only = near_active & ~far_active
+    double_talk = far_active & near_active
+    settled = np.arange(frames) >= 2000 // FRAME_MS  # Past the delay lock and initial convergence
+    residual = frame_power(out[:frames * BLOCK] - near[:frames * BLOCK])
+    p_echo = frame_power(echo)[:frames]
+    result.update({
+        "erle_db_agent_only": db(p_mic[far_only].sum(), p_out[far_only].sum()),
+        "erle_db_agent_only_after_2s": db(p_mic[far_only & settled].sum(), p_out[far_only & settled].sum()),
+        "customer_alone_loss_db": db(p_near[near_only].sum(), p_out[near_only].sum()),
+        "double_talk": {
+            "echo_to_customer_db_before": db(p_echo[double_talk].sum(), p_near[double_talk].sum()),
+            "residual_to_customer_db_after": db(residual[double_talk].sum(), p_near[double_talk].sum()),
+        },
+        "vad_voiced_frames_agent_only": {"before": vad_voiced(mic, far_only), "after": vad_voiced(out, far_only)},
+    })
+    return result
+
+
+def read_recording(path):
+    """Splits a CallRecorder stereo WAV into (customer, agent) at RATE."""
+    with wave.open(path, "rb") as wf:
+        if wf.getnchannels() != 2:
+            raise SystemExit(f"{path}: expected a stereo call recording")
+        rate = wf.getframerate()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16).reshape(-1, 2)
+    channels = []
+    for ch in range(2):
+        data = pcm[:, ch].copy().tobytes()
+        if rate != RATE:
+            data = StreamResampler(rate, RATE).process(data)
+        channels.append(np.frombuffer(data, dtype=np.int16).astype(np.float64))
+    return channels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay-ms", type=int, default=120, help="bulk delay of the simulated echo path")
+    parser.add_argument("--echo-db", type=float, default=6.0, help="how much louder the echo is than the customer talking")
+    parser.add_argument("--recording", help="stereo call recording (customer left, agent right) to use instead")
+    parser.add_argument("--save", help="also write the synthetic fixture as a stereo WAV (capture left, agent right)")
+    parser.add_argument("--out", help="write the JSON results here as well as to stdout")
+    args = parser.parse_args()
+
+    if args.recording:
+        mic, ref = read_recording(args.recording)
+        out, cpu, suppressor = run(mic, ref)
+        results = report(mic, ref, out, cpu, suppressor)
+    else:
+        mic, ref, near, echo = fixture(args.delay_ms, args.echo_db)
+        if args.save:
+            with wave.open(args.save, "wb") as wf:
+                wf.setnchannels(2)
+                wf.setsampwidth(2)
+                wf.setframerate(RATE)
+                wf.writeframes(np.stack((mic, np.clip(ref, -32768, 32767)), axis=1).astype(np.int16).tobytes())
+        out, cpu, suppressor = run(mic, ref)
+        results = report(mic, ref, out, cpu, suppressor, near, echo)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Frame size and send coalescing sweep: end-to-end latency against websocket
+messages per second and CPU.
+
+Replays a WAV through a CallSession (as bench_latency.py does) once for every
+combination of capture frame duration (--frame-ms), frames per message
+(--send-frames) and coalescing window (--max-delay-ms), against mock_live_server.py
+in its own process, so the CPU figures are the agent's alone. The WAV is cut
+into --turns utterances as in bench_latency.py. For each point it reports
+end-of-speech -> first reply byte, capture -> send latency, messages per
+second and CPU, and prints a chart of latency against message rate to stderr. Pick the operating point per deployment and set it with
+CAPTURE_FRAME_MS / SEND_FRAMES / SEND_MAX_DELAY_MS in the agents.
+
+    python bench_frames.py sound.wav --frame-ms 10 20 40 --send-frames 1 2 4 --out frames.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from google import genai
+
+from bench_latency import run_file
+from call_session import AudioSettings
+from file_audio import WavSource
+
+
+def spawn_live_mock(response_delay_ms, realtime_factor):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen([sys.executable, str(Path(__file__).with_name("mock_live_server.py")),
+                                "--port", str(port), "--response-delay-ms", str(response_delay_ms),
+                                "--realtime-factor", str(realtime_factor)],
+                               stderr=subprocess.DEVNULL)
+    for _ in range(200):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process, f"ws://127.0.0.1:{port}"
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.05)
+    process.kill()
+    raise SystemExit("mock_live_server.py did not start")
+
+
+def chart(points, width=40) -> str:
+    """Latency bars, one row per operating point, fewest messages per second first."""
+    worst = max((p["latency_ms"]["p50"] or 0 for p in points), default=0) or 1
+    lines = [f"{'frame':>5} {'x':>2} {'max':>5} {'msg/s':>6} {'cpu%':>5} {'send':>6}  end of speech -> reply p50"]
+    for p in sorted(points, key=lambda p: p["messages_per_s"]):
+        latency = p["latency_ms"]["p50"]
+        bar = "#" * round(width * (latency or 0) / worst)
+        lines.append(f"{p['frame_ms']:>5} {p['send_frames']:>2} {p['send_max_delay_ms'] or '-':>5} "
+                     f"{p['messages_per_s']:>6.1f} {p['cpu_percent']:>5.1f} "
+                     f"{p['capture_to_send_ms']['p50'] or 0:>6.1f}  {bar} {latency}")
+    return "\n".join(lines)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wav", nargs="?", default="sound.wav")
+    parser.add_argument("--frame-ms", type=int, nargs="+", default=[10, 20, 40], help="capture frame durations")
+    parser.add_argument("--send-frames", type=int, nargs="+", default=[1, 2, 4], help="frames per message")
+    parser.add_argument("--max-delay-ms", type=int, nargs="+", default=[0],
+                        help="coalescing windows (0: always wait for --send-frames frames)")
+    parser.add_argument("--turns", type=int, default=8, help="utterances to cut the WAV into (0: as recorded)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed; above 1 also shortens the coalescing delays measured")
+    parser.add_argument("--response-delay-ms", type=int, default=300, help="mock server think time")
+    parser.add_argument("--settle", type=float, default=3.0, help="seconds to wait for the last reply")
+    parser.add_argument("--out", help="write the JSON results here as well as to stdout")
+    args = parser.parse_args()
+
+    client = genai.Client(api_key="mock", http_options={"api_version": "v1alpha"})
+    process, url = spawn_live_mock(args.response_delay_ms, 2.0 * args.speed)
+    points = []
+    try:
+        for frame_ms, send_frames, max_delay_ms in itertools.product(args.frame_ms, args.send_frames,
+                                                                      args.max_delay_ms):
+            if max_delay_ms and send_frames == 1:
+                continue  # Nothing to wait for
+            settings = AudioSettings(capture_frame_ms=frame_ms, send_frames=send_frames,
+                                     send_max_delay_ms=max_delay_ms or None)
+            frames = WavSource(args.wav, frame_ms=frame_ms, turns=args.turns).total_frames
+            timeout = frames * frame_ms / 1000 / args.speed + 30
+            result = await run_file(args.wav, client, url, args.speed, args.settle / args.speed, timeout,
+                                    settings=settings, turns=args.turns)
+            wall_s = result["audio_seconds"] / args.speed + args.settle / args.speed
+            points.append({
+                "frame_ms": frame_ms,
+                "send_frames": send_frames,
+                "send_max_delay_ms": max_delay_ms or None,
+                "message_ms": frame_ms * send_frames,
+                "messages_per_s": round(result["messages_sent"] / wall_s, 1),
+                "latency_ms": result["latency_ms"],
+                "capture_to_send_ms": result["capture_to_send_ms"],
+                "unanswered": result["unanswered"],
+                "cpu_percent": result["cpu_percent"],
+                "session_cpu_ms": result["session_cpu_ms"],
+            })
+            print(f"frame {frame_ms} ms x {send_frames}: {points[-1]['messages_per_s']} msg/s, "
+                  f"p50 {result['latency_ms']['p50']} ms", file=sys.stderr)
+    finally:
+        process.terminate()
+
+    print(chart(points), file=sys.stderr)
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "file": args.wav,
+        "speed": args.speed,
+        "points": points,
+    }
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
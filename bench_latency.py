@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Mouth-to-ear latency benchmark: replays WAV files through the agent pipeline.
+
+Each WAV is fed through a CallSession with file-backed audio adapters instead
+of PyAudio, in real time (--speed 1) or accelerated (--speed 4). For every
+utterance in the file it measures end-of-speech -> first reply byte, then
+reports latency percentiles, jitter, dropped frames and CPU, and writes the
+results as JSON for regression tracking. Speech ends where the mock's own
+endpointing puts it (see file_audio.py), so the latency includes its
+silence wait. By default each file is cut into --turns utterances of
+--turn-ms separated by --gap-ms of silence, so a recording of one long
+utterance (like sound.wav) still yields several turns; --turns 0 replays the
+files as recorded.
+
+By default it runs against an in-process mock_live_server; pass --url to use
+another endpoint, or --gemini to measure the real service (GEMINI_API_KEY).
+--drop-after / --go-away-after make the mock end connections on purpose, to
+measure reconnects and check that no captured audio is lost across them: the
+run exits with status 1 if a dropped connection was not re-established or
+more than --max-lost-ms of sent audio never reached the mock.
+
+    python bench_latency.py sound.wav --speed 4 --out latency.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+from google import genai
+
+from call_session import AudioSettings, CallSession
+from file_audio import WavSink, WavSource
+from mock_live_server import MockLiveServer
+
+MODEL = "gemini-2.5-flash-native-audio-preview-12-2025"
+CONFIG = {
+    "response_modalities": ["AUDIO"],
+    "session_resumption": {},
+    "system_instruction": "You are a voice agent. Answer briefly.",
+}
+
+
+def percentiles(values) -> dict:
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None, "mean": None}
+    v = np.asarray(values)
+    return {
+        "p50": round(float(np.percentile(v, 50)), 1),
+        "p90": round(float(np.percentile(v, 90)), 1),
+        "p99": round(float(np.percentile(v, 99)), 1),
+        "max": round(float(v.max()), 1),
+        "mean": round(float(v.mean()), 1),
+    }
+
+
+def turn_latencies(speech_ends, first_bytes) -> list:
+    """Pairs each end of speech with the first reply byte that follows it (before the next one)."""
+    latencies = []
+    for i, end in enumerate(speech_ends):
+        next_end = speech_ends[i + 1] if i + 1 < len(speech_ends) else float("inf")
+        reply = next((t for t in first_bytes if end < t < next_end), None)
+        latencies.append(None if reply is None else (reply - end) * 1000)
+    return latencies
+
+
+async def run_file(path, client, url, speed, settle_s, timeout_s, server=None, settings=None, turns=0,
+                   turn_ms=2000, gap_ms=3000):
+    settings = settings or AudioSettings()
+    endpointing = {"speech_threshold": server.speech_threshold, "silence_ms": server.silence_ms} if server else {}
+    source = WavSource(path, frame_ms=settings.capture_frame_ms, speed=speed, turns=turns, turn_ms=turn_ms,
+                       gap_ms=gap_ms, **endpointing)
+    sink = WavSink()
+    audio_ms_in = server.audio_ms_in if server else None
+    connections = server.connections if server else None
+    call = CallSession(client, MODEL, CONFIG, session_id=Path(path).stem,
+                       settings=settings, capture=source, playback=sink, live_url=url)
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    task = asyncio.create_task(call.run())
+    try:
+        await asyncio.wait_for(source.finished.wait(), timeout_s)
+        await asyncio.sleep(settle_s)
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    latencies = turn_latencies(source.speech_end_times, sink.first_byte_times)
+    answered = [x for x in latencies if x is not None]
+    stats = call.stats()
+    sent_ms = call.metrics.bytes_sent * 1000 / (source.rate * source.channels * 2)
+    return {
+        "file": str(path),
+        "audio_seconds": round(source.total_frames * source.frame_ms / 1000, 2),
+        "turns": len(latencies),
+        "unanswered": len(latencies) - len(answered),
+        "latency_ms": percentiles(answered),
+        "jitter_ms": round(float(np.std(answered)), 1) if answered else None,
+        "dropped_frames": stats["output_queue"]["dropped"] + stats["capture"]["dropped_frames"],
+        "barge_ins": stats["barge_ins"],
+        "reconnects": stats["reconnects"],
+        "reconnect_ms": call.metrics.reconnect_ms.summary(),
+        "connections": server.connections - connections if server else None,
+        "audio_sent_ms": round(sent_ms),
+        "messages_sent": call.metrics.messages_sent,
+        "capture_to_send_ms": call.metrics.capture_to_send_ms.summary(),
+        "audio_lost_ms": round(sent_ms - (server.audio_ms_in - audio_ms_in)) if server else None,
+        "cpu_percent": round(100 * cpu / wall, 1),
+        "session_cpu_ms": stats["cpu_ms"],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("wavs", nargs="*", default=["sound.wav"])
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed, 1 = real time")
+    parser.add_argument("--turns", type=int, default=8, help="utterances to cut each file into (0: as recorded)")
+    parser.add_argument("--turn-ms", type=int, default=2000, help="length of each utterance")
+    parser.add_argument("--gap-ms", type=int, default=3000,
+                        help="silence after each utterance; must outlast the reply to it")
+    parser.add_argument("--url", help="Live endpoint to test against instead of the in-process mock")
+    parser.add_argument("--gemini", action="store_true", help="use the real Gemini Live API")
+    parser.add_argument("--response-delay-ms", type=int, default=300, help="mock server think time")
+    parser.add_argument("--drop-after", type=float, help="mock aborts each connection after this many seconds")
+    parser.add_argument("--go-away-after", type=float, help="mock sends GoAway after this many seconds")
+    parser.add_argument("--settle", type=float, default=3.0, help="seconds to wait for the last reply")
+    parser.add_argument("--max-lost-ms", type=float, default=40.0,
+                        help="sent audio allowed to go missing per file (in flight when a connection is cut)")
+    parser.add_argument("--out", help="write the JSON results here as well as to stdout")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if args.gemini:
+        client = genai.Client(api_key=os.environ["GEMINI_API_KEY"], http_options={"api_version": "v1alpha"})
+    else:
+        client = genai.Client(api_key="mock", http_options={"api_version": "v1alpha"})
+        if not url:
+            server = await MockLiveServer(port=0, response_delay_ms=args.response_delay_ms,
+                                          realtime_factor=2.0 * args.speed, drop_after_s=args.drop_after,
+                                          go_away_after_s=args.go_away_after).start()
+            url = server.url
+
+    try:
+        files = []
+        for path in args.wavs:
+            frames = WavSource(path, turns=args.turns, turn_ms=args.turn_ms, gap_ms=args.gap_ms).total_frames
+            timeout = frames * 0.02 / args.speed + 30
+            files.append(await run_file(path, client, url, args.speed, args.settle / args.speed, timeout, server,
+                                        turns=args.turns, turn_ms=args.turn_ms, gap_ms=args.gap_ms))
+    finally:
+        if server:
+            await server.close()
+
+    all_latencies = [f["latency_ms"] for f in files]
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "endpoint": "gemini" if args.gemini else url,
+        "speed": args.speed,
+        "files": files,
+        "summary": {
+            "turns": sum(f["turns"] for f in files),
+            "unanswered": sum(f["unanswered"] for f in files),
+            "worst_p90_ms": max((l["p90"] for l in all_latencies if l["p90"] is not None), default=None),
+            "dropped_frames": sum(f["dropped_frames"] for f in files),
+            "reconnects": sum(f["reconnects"] for f in files),
+        },
+    }
+    if server:
+        results["checks"] = {
+            # Every connection after the first is a completed reconnect
+            "reconnects_completed": all(f["reconnects"] == f["connections"] - 1 for f in files),
+            "reconnected_after_drops": all(f["reconnects"] > 0 for f in files)
+                                       if args.drop_after or args.go_away_after else True,
+            "no_audio_lost": all(f["audio_lost_ms"] <= args.max_lost_ms for f in files),
+        }
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
+    failed = [name for name, ok in results.get("checks", {}).items() if not ok]
+    if failed:
+        raise SystemExit(f"Failed checks: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
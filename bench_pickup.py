@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Pickup-to-first-greeting benchmark: cold connects, a pre-warmed session pool
+and a cached greeting.
+
+Each call starts at "pickup", sends the pickup prompt and stops at the first
+byte of greeting audio. Cold calls open their Live session at pickup; pooled
+calls take an idle session from a LiveSessionPool; cached calls also play the
+greeting from a GreetingCache (filled by one untimed call first). By default the
+in-process mock server adds --setup-delay-ms before setupComplete to stand in
+for the TLS handshake and the setup of a large system instruction; pass --url
+for another endpoint or --gemini for the real service (GEMINI_API_KEY).
+
+    python bench_pickup.py --calls 10 --pool-size 2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+from google import genai
+
+from bench_latency import CONFIG, MODEL, percentiles
+from call_session import CallSession
+from file_audio import WavSink, WavSource
+from greeting_cache import GreetingCache
+from mock_live_server import MockLiveServer
+from session_pool import LiveSessionPool
+
+PICKUP_PROMPT = "The customer just picked up the phone. Greet them."
+
+
+def write_silence(path, seconds=30, rate=16000):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(bytes(rate * 2 * seconds))
+
+
+async def pickup(client, url, silence, pool=None, cache=None, whole_turn=False, timeout_s=15.0) -> dict:
+    sink = WavSink()
+    call = CallSession(client, MODEL, CONFIG, capture=WavSource(silence), playback=sink,
+                       live_url=url, rtt_interval=None, pool=pool, pickup_prompt=PICKUP_PROMPT,
+                       greeting_cache=cache)
+    task = asyncio.create_task(call.run())
+    try:
+        async with asyncio.timeout(timeout_s):
+            while not sink.first_byte_times and not task.done():
+                await asyncio.sleep(0.005)
+            while whole_turn and not call.metrics.turns and not task.done():
+                await asyncio.sleep(0.005)
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    return {"connect_ms": round(call.metrics.connect_ms.sum, 1), "pickup_to_audio_ms": call.pickup_to_audio_ms}
+
+
+async def pooled_calls(client, url, silence, pool, calls, gap, cache=None, whole_turn=False) -> list:
+    results = []
+    for _ in range(calls):
+        results.append(await pickup(client, url, silence, pool=pool, cache=cache, whole_turn=whole_turn))
+        if gap:
+            await asyncio.sleep(gap)
+        else:
+            await pool.wait_ready(1)
+    return results
+
+
+def summarize(results) -> dict:
+    return {
+        "calls": len(results),
+        "connect_ms": percentiles([r["connect_ms"] for r in results]),
+        "pickup_to_audio_ms": percentiles([r["pickup_to_audio_ms"] for r in results if r["pickup_to_audio_ms"]]),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=10, help="calls per mode")
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--gap", type=float, default=0.0,
+                        help="seconds between pooled calls (0 waits for the pool to refill)")
+    parser.add_argument("--url", help="Live endpoint to test against instead of the in-process mock")
+    parser.add_argument("--gemini", action="store_true", help="use the real Gemini Live API")
+    parser.add_argument("--setup-delay-ms", type=int, default=400, help="mock handshake + setup cost")
+    parser.add_argument("--response-delay-ms", type=int, default=300, help="mock think time before the greeting")
+    parser.add_argument("--out", help="write the JSON results here as well as to stdout")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if args.gemini:
+        client = genai.Client(api_key=os.environ["GEMINI_API_KEY"], http_options={"api_version": "v1alpha"})
+    else:
+        client = genai.Client(api_key="mock", http_options={"api_version": "v1alpha"})
+        if not url:
+            server = await MockLiveServer(port=0, setup_delay_ms=args.setup_delay_ms,
+                                          response_delay_ms=args.response_delay_ms).start()
+            url = server.url
+
+    with tempfile.TemporaryDirectory() as tmp:
+        silence = Path(tmp) / "silence.wav"
+        write_silence(silence)
+        try:
+            cold = [await pickup(client, url, silence) for _ in range(args.calls)]
+
+            async with LiveSessionPool(client, MODEL, CONFIG, size=args.pool_size, url=url) as pool:
+                await pool.wait_ready()
+                pooled = await pooled_calls(client, url, silence, pool, args.calls, args.gap)
+
+                cache = GreetingCache(Path(tmp) / "greetings")
+                await pooled_calls(client, url, silence, pool, 1, args.gap, cache, whole_turn=True)  # records it
+                cached = await pooled_calls(client, url, silence, pool, args.calls, args.gap, cache)
+                pool_stats, cache_stats = pool.stats(), cache.stats()
+        finally:
+            if server:
+                await server.close()
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "endpoint": "gemini" if args.gemini else url,
+        "cold": summarize(cold),
+        "pooled": summarize(pooled),
+        "pooled_cached_greeting": summarize(cached),
+        "pool": pool_stats,
+        "greeting_cache": cache_stats,
+    }
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
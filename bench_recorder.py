@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Call recorder benchmark: cost on the audio path, memory over long calls, and
+end-to-end latency with and without recording.
+
+1. Tap cost: the time one RecorderLeg.write() adds to a 20 ms audio callback.
+2. Memory: simulates long calls of two-leg audio through the background
+   writer (a fake clock runs faster than real time) and reports the traced
+   peak per minute of call: the last minute's peak should match the early
+   ones (no growth with call length) and the memory left at the end is flat.
+3. End to end: runs a WAV, cut into --turns utterances, through a
+   CallSession against the in-process mock server with and without a
+   recorder and compares capture-to-send latency and mouth-to-ear latency:
+   the end of each utterance in the source to the first reply byte at the
+   sink, as in bench_latency.py.
+
+"checks" fails the run (exit status 1) if any turn goes unanswered or
+recording adds more than --max-added-ms to the median mouth-to-ear latency.
+
+    python bench_recorder.py --minutes 5 30 --wav sound.wav
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from google import genai
+
+from bench_latency import CONFIG, MODEL, percentiles, turn_latencies
+from call_session import CallSession
+from file_audio import WavSink, WavSource
+from mock_live_server import MockLiveServer
+from recorder import AGENT, CUSTOMER, CallRecorder
+
+FRAME_MS = 20
+
+
+def tap_cost(path, frames=50000) -> dict:
+    recorder = CallRecorder(path, max_pending=frames + 1)
+    leg = recorder.leg(CUSTOMER, 16000)
+    frame = bytes(16000 * FRAME_MS // 1000 * 2)
+    started = time.perf_counter()
+    for _ in range(frames):
+        leg.write(frame)
+    per_call_us = (time.perf_counter() - started) / frames * 1e6
+    return {"write_us": round(per_call_us, 2), "share_of_frame_period": f"{per_call_us / (FRAME_MS * 1000):.4%}"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def long_call(path, minutes) -> dict:
+    """Pushes `minutes` of customer (16 kHz) and agent (24 kHz) audio through a recorder."""
+    clock = FakeClock()
+    recorder = CallRecorder(path, flush_interval=0.005, clock=clock)
+    customer = recorder.leg(CUSTOMER, 16000)
+    agent = recorder.leg(AGENT, 24000)
+    customer_frame = bytes(16000 * FRAME_MS // 1000 * 2)
+    agent_frame = bytes(24000 * FRAME_MS // 1000 * 2)
+
+    frames_per_minute = 60 * 1000 // FRAME_MS
+    minute_peaks = []
+    tracemalloc.start()
+    recorder.start()
+    started = time.perf_counter()
+    for i in range(minutes * frames_per_minute):
+        if i and i % frames_per_minute == 0:
+            minute_peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        clock.now = i * FRAME_MS / 1000
+        customer.write(customer_frame, clock.now)
+        agent.write(agent_frame, clock.now)
+        while len(recorder._pending) > 100:
+            time.sleep(0.001)  # Let the writer catch up; a real call arrives far slower
+    minute_peaks.append(tracemalloc.get_traced_memory()[1])
+    recorder.close()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "call_minutes": minutes,
+        "recorded_seconds": recorder.stats()["seconds"],
+        "file_mb": round(Path(path).stat().st_size / 1e6, 1),
+        "first_minute_peak_kb": round(minute_peaks[0] / 1024),
+        "max_minute_peak_kb": round(max(minute_peaks) / 1024),
+        "last_minute_peak_kb": round(minute_peaks[-1] / 1024),
+        "traced_after_close_kb": round(current / 1024),
+        "dropped_chunks": recorder.dropped_chunks,
+        "wall_s": round(time.perf_counter() - started, 1),
+    }
+
+
+async def call_latency(wav, server, record_dir, turns) -> dict:
+    client = genai.Client(api_key="mock", http_options={"api_version": "v1alpha"})
+    source = WavSource(wav, turns=turns, speech_threshold=server.speech_threshold, silence_ms=server.silence_ms)
+    sink = WavSink()
+    call = CallSession(client, MODEL, CONFIG, capture=source, playback=sink, live_url=server.url,
+                       rtt_interval=None, record_dir=record_dir)
+    task = asyncio.create_task(call.run())
+    await source.finished.wait()
+    await asyncio.sleep(1.0)
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+    latencies = turn_latencies(source.speech_end_times, sink.first_byte_times)
+    answered = [x for x in latencies if x is not None]
+    return {
+        "recording": bool(record_dir),
+        "capture_to_send_ms": call.metrics.capture_to_send_ms.summary(),
+        "speech_end_to_reply_ms": percentiles(answered),
+        "turns": len(latencies),
+        "unanswered": len(latencies) - len(answered),
+        "recorder": call.recorder.stats() if call.recorder else None,
+    }
+
+
+async def end_to_end(wav, tmp, turns) -> list:
+    async with MockLiveServer(port=0) as server:
+        return [await call_latency(wav, server, None, turns),
+                await call_latency(wav, server, str(Path(tmp) / "recordings"), turns)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, nargs="+", default=[5, 30], help="simulated call lengths")
+    parser.add_argument("--wav", default="sound.wav", help="caller audio for the end-to-end run")
+    parser.add_argument("--turns", type=int, default=8, help="utterances to cut it into (0: as recorded)")
+    parser.add_argument("--max-added-ms", type=float, default=20.0,
+                        help="median mouth-to-ear latency recording may add")
+    parser.add_argument("--out", help="write the JSON results here as well as to stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {
+            "tap": tap_cost(Path(tmp) / "tap.wav"),
+            "long_calls": [long_call(Path(tmp) / f"long-{m}.wav", m) for m in args.minutes],
+            "end_to_end": asyncio.run(end_to_end(args.wav, tmp, args.turns)),
+        }
+    off, on = (run["speech_end_to_reply_ms"]["p50"] for run in results["end_to_end"])
+    results["checks"] = {
+        "every_turn_answered": all(run["turns"] and not run["unanswered"] for run in results["end_to_end"]),
+        "recording_adds_no_latency": off is not None and on is not None and on - off <= args.max_added_ms,
+    }
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
+    failed = [name for name, ok in results["checks"].items() if not ok]
+    if failed:
+        raise SystemExit(f"Failed checks: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Throughput and quality benchmark for the streaming resampler.
+
+Throughput is measured single-threaded in input samples per second for the
+conversions the agents use. Quality is checked against an ideal reference:
+an in-band tone is resampled in odd-sized chunks and compared to a
+least-squares-fitted sinusoid at the exact expected frequency (SINAD), and an
+out-of-band tone that would alias into the voice band on downsampling must be
+attenuated (alias rejection). The run exits with status 1 if any conversion
+falls below MIN_SINAD_DB or MIN_ALIAS_REJECTION_DB.
+"""
+
+import time
+
+import numpy as np
+
+from resample import StreamResampler
+
+CASES = [
+    # (in_rate, out_rate, in_channels, out_channels, label)
+    (48000, 16000, 2, 1, "capture 48k stereo -> 16k mono"),
+    (44100, 16000, 2, 1, "capture 44.1k stereo -> 16k mono"),
+    (24000, 48000, 1, 2, "playback 24k mono -> 48k stereo"),
+    (24000, 44100, 1, 2, "playback 24k mono -> 44.1k stereo"),
+]
+CHUNK_MS = 20
+SECONDS = 10
+# Regression floors (measured: SINAD 84-88 dB, alias rejection about 53 dB)
+MIN_SINAD_DB = 80.0
+MIN_ALIAS_REJECTION_DB = 50.0
+
+
+def tone(freq, rate, seconds, channels, amplitude=12000.0):
+    t = np.arange(int(rate * seconds)) / rate
+    x = (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+    return np.repeat(x, channels) if channels > 1 else x
+
+
+def run_chunked(resampler, pcm, chunk_frames):
+    step = chunk_frames * resampler.in_channels
+    out = b"".join(resampler.process(pcm[i:i + step].tobytes()) for i in range(0, len(pcm), step))
+    y = np.frombuffer(out, dtype=np.int16)
+    return y[::resampler.out_channels].astype(np.float64)
+
+
+def sinad_db(y, freq, rate):
+    """Signal to noise-and-distortion against a fitted ideal sinusoid at freq."""
+    y = y[len(y) // 10: -len(y) // 10]  # skip filter warm-up and tail
+    t = np.arange(len(y)) / rate
+    basis = np.column_stack((np.sin(2 * np.pi * freq * t), np.cos(2 * np.pi * freq * t), np.ones_like(t)))
+    coeffs, *_ = np.linalg.lstsq(basis, y, rcond=None)
+    residual = y - basis @ coeffs
+    return 10 * np.log10(np.sum((basis[:, :2] @ coeffs[:2]) ** 2) / np.sum(residual ** 2))
+
+
+def rms_db(y):
+    return 20 * np.log10(np.sqrt(np.mean(y ** 2)) + 1e-9)
+
+
+if __name__ == "__main__":
+    failures = []
+    for in_rate, out_rate, in_ch, out_ch, label in CASES:
+        chunk_frames = in_rate * CHUNK_MS // 1000
+        pcm = tone(1000, in_rate, SECONDS, in_ch)
+
+        resampler = StreamResampler(in_rate, out_rate, in_ch, out_ch)
+        start = time.process_time()
+        y = run_chunked(resampler, pcm, chunk_frames)
+        cpu = time.process_time() - start
+        throughput = in_rate * SECONDS / cpu
+
+        quality = sinad_db(y, 1000, out_rate)
+        line = (f"{label:<36} {throughput / 1e6:6.2f} M samples/s/core "
+                f"({throughput / in_rate:6.0f}x realtime)  SINAD {quality:5.1f} dB")
+        if quality < MIN_SINAD_DB:
+            failures.append(f"{label}: SINAD {quality:.1f} dB < {MIN_SINAD_DB} dB")
+
+        if out_rate < in_rate:
+            # A tone between the new Nyquist and the old one must not fold back into the band
+            alias_freq = 0.5 * out_rate + 2000
+            passband = rms_db(run_chunked(StreamResampler(in_rate, out_rate, in_ch, out_ch), tone(3000, in_rate, 2, in_ch), chunk_frames))
+            aliased = rms_db(run_chunked(StreamResampler(in_rate, out_rate, in_ch, out_ch), tone(alias_freq, in_rate, 2, in_ch), chunk_frames))
+            line += f"  alias rejection {passband - aliased:5.1f} dB @ {alias_freq:.0f} Hz"
+            if passband - aliased < MIN_ALIAS_REJECTION_DB:
+                failures.append(f"{label}: alias rejection {passband - aliased:.1f} dB < {MIN_ALIAS_REJECTION_DB} dB")
+        print(line)
+    if failures:
+        raise SystemExit("FAILED:\n" + "\n".join(failures))
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Stock image search benchmark against mock_stock_api.py.
+
+1. Sequential: the previous implementation, one blocking requests.get per
+   platform in turn, each on a fresh connection.
+2. Concurrent: stock_search.search_platforms(), all platforms at once over
+   the pooled keep-alive client. Reports per-search latency and how many
+   connections the mock saw for all the searches.
+3. Slow provider: one platform answers after its deadline; the search
+   returns the others' results at about the deadline, with an error for it.
+4. Cache: a cold search, repeats answered from the memory tier, the first
+   search after a restart (disk tier), and a stale entry served at once while
+   it is refreshed in the background. Counts the requests the mock received.
+5. Payload: the size of the tool's response for one search, as Markdown
+   before and after cross-platform dedup, as compact JSON, and compact JSON
+   under a --max-chars budget; and the memory of 10k results as dicts (the
+   old parsers' output) versus StockImage records.
+
+    python bench_search.py --searches 20 --delay-ms pexels=120 unsplash=250 pixabay=180
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import requests
+
+import stock_search
+from mock_stock_api import MockStockAPI
+from search_cache import SearchCache
+
+
+def sequential_search(query, per_page=10) -> dict:
+    """The blocking, one-platform-after-another search the MCP tool used to do."""
+    urls = stock_search.API_URLS
+    keys = stock_search.API_KEYS
+    results = {}
+    response = requests.get(f"{urls['pexels']}/search", params={"query": query, "per_page": per_page},
+                            headers={"Authorization": keys["pexels"]})
+    results["pexels"] = response.json()["photos"]
+    response = requests.get(f"{urls['unsplash']}/search/photos", params={"query": query, "per_page": per_page},
+                            headers={"Authorization": f"Client-ID {keys['unsplash']}"})
+    results["unsplash"] = response.json()["results"]
+    response = requests.get(f"{urls['pixabay']}/", params={"key": keys["pixabay"], "q": query, "per_page": per_page})
+    results["pixabay"] = response.json()["hits"]
+    return results
+
+
+def summary(latencies) -> dict:
+    ms = sorted(t * 1000 for t in latencies)
+    return {
+        "searches": len(ms),
+        "mean_ms": round(statistics.mean(ms), 1),
+        "p50_ms": round(statistics.median(ms), 1),
+        "max_ms": round(ms[-1], 1),
+    }
+
+
+async def run_sequential(server, queries) -> dict:
+    before = server.connections
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        # Blocking calls: keep them off the loop the mock server runs on
+        await asyncio.to_thread(sequential_search, query)
+        latencies.append(time.perf_counter() - started)
+    return {**summary(latencies), "connections": server.connections - before}
+
+
+async def run_concurrent(server, queries) -> dict:
+    before = server.connections
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        results, errors = await stock_search.search_platforms(query)
+        latencies.append(time.perf_counter() - started)
+        assert len(results) == 3 and not errors, errors
+    return {**summary(latencies), "connections": server.connections - before}
+
+
+async def run_slow_provider(server, timeout, queries) -> dict:
+    saved = dict(stock_search.TIMEOUTS), dict(server.delay_ms)
+    stock_search.TIMEOUTS["unsplash"] = timeout
+    server.delay_ms["unsplash"] = int(timeout * 1000 * 4)
+    try:
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            results, errors = await stock_search.search_platforms(query)
+            latencies.append(time.perf_counter() - started)
+        return {**summary(latencies), "timeout_ms": timeout * 1000,
+                "platforms_returned": sorted(results), "errors": errors}
+    finally:
+        stock_search.TIMEOUTS.update(saved[0])
+        server.delay_ms.update(saved[1])
+
+
+def result_cache(directory, **kwargs):
+    return SearchCache(directory, encode=stock_search.StockImage.to_list, decode=stock_search.StockImage.from_list,
+                       **kwargs)
+
+
+async def run_cache(server, directory, repeats=10000) -> dict:
+    def requests_seen():
+        return sum(server.requests.values())
+
+    cache = result_cache(directory)
+    before = requests_seen()
+    started = time.perf_counter()
+    await stock_search.search_platforms("Red  Car", cache=cache)
+    cold_ms = (time.perf_counter() - started) * 1000
+    cold_requests = requests_seen() - before
+
+    before = requests_seen()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        await stock_search.search_platforms("red car", cache=cache)
+    memory_us = (time.perf_counter() - started) / repeats * 1e6
+    memory_requests = requests_seen() - before
+
+    restarted = result_cache(directory)
+    started = time.perf_counter()
+    results, _ = await stock_search.search_platforms("red car", cache=restarted)
+    disk_ms = (time.perf_counter() - started) * 1000
+    disk_requests = requests_seen() - before - memory_requests
+
+    stale = result_cache(directory, ttl=0)
+    before = requests_seen()
+    started = time.perf_counter()
+    await stock_search.search_platforms("red car", cache=stale)
+    stale_us = (time.perf_counter() - started) * 1e6
+    await asyncio.sleep(max(server.delay_ms.values()) / 1000 + 0.2)
+    return {
+        "cold_ms": round(cold_ms, 1),
+        "cold_requests": cold_requests,
+        "memory_hit_us": round(memory_us, 1),
+        "memory_hit_requests": memory_requests,
+        "disk_hit_ms": round(disk_ms, 2),
+        "disk_hit_requests": disk_requests,
+        "disk_platforms": sorted(results),
+        "stale_hit_us": round(stale_us, 1),
+        "background_revalidations": requests_seen() - before,
+        "stats": cache.stats(),
+    }
+
+
+def record_memory(images, count=10000) -> dict:
+    def traced(build):
+        tracemalloc.start()
+        try:
+            rows = build()
+            return tracemalloc.get_traced_memory()[0] // 1024, rows
+        finally:
+            tracemalloc.stop()
+
+    sample = [images[i % len(images)] for i in range(count)]
+    as_dicts, _ = traced(lambda: [{"id": img.id, "url": img.url[:], "preview_url": img.preview_url[:],
+                                   "photographer": img.photographer, "alt": img.alt, "width": img.width,
+                                   "height": img.height, "platform": img.platform} for img in sample])
+    as_records, _ = traced(lambda: [stock_search.StockImage(*img.to_list()) for img in sample])
+    return {"records": count, "dicts_kb": as_dicts, "stock_images_kb": as_records}
+
+
+async def run_payload(query, per_page, max_chars) -> dict:
+    results, _ = await stock_search.search_platforms(query, per_page=per_page)
+    unmerged = [img for images in results.values() for img in images]
+    merged = stock_search.merge_results(results, query)
+    sizes = {
+        "markdown_unmerged": len(stock_search.format_markdown(query, unmerged, {})),
+        "markdown": len(stock_search.format_markdown(query, merged, {})),
+        "compact": len(stock_search.format_compact(query, merged, {})),
+        f"compact_max_{max_chars}": len(stock_search.format_compact(query, merged, {}, max_chars)),
+    }
+    return {
+        "results": len(unmerged),
+        "after_dedup": len(merged),
+        "chars": sizes,
+        "compact_reduction": round(sizes["markdown_unmerged"] / sizes["compact"], 1),
+        "memory": record_memory(unmerged),
+    }
+
+
+async def run(args) -> dict:
+    delays = {name: int(ms) for name, _, ms in (item.partition("=") for item in args.delay_ms)}
+    async with MockStockAPI(port=0, delay_ms=delays) as server:
+        stock_search.API_URLS.update(server.api_urls())
+        stock_search.API_KEYS.update({name: "bench" for name in stock_search.PLATFORMS})
+        queries = [f"query {i}" for i in range(args.searches)]
+        try:
+            results = {
+                "delay_ms": dict(server.delay_ms),
+                "sequential": await run_sequential(server, queries),
+                "concurrent": await run_concurrent(server, queries),
+                "slow_provider": await run_slow_provider(server, args.timeout, queries[:5]),
+            }
+            with tempfile.TemporaryDirectory() as tmp:
+                results["cache"] = await run_cache(server, tmp)
+            results["payload"] = await run_payload("red car", 10, args.max_chars)
+        finally:
+            await stock_search.close_clients()
+        results["speedup"] = round(results["sequential"]["mean_ms"] / results["concurrent"]["mean_ms"], 2)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--searches", type=int, default=20)
+    parser.add_argument("--delay-ms", nargs="*", default=["pexels=120", "unsplash=250", "pixabay=180"],
+                        metavar="PROVIDER=MS", help="mock response delay per provider")
+    parser.add_argument("--timeout", type=float, default=0.4, help="deadline for the slow provider, seconds")
+    parser.add_argument("--max-chars", type=int, default=1500, help="budget for the capped compact payload")
+    parser.add_argument("--out", help="write the JSON results here as well as to stdout")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
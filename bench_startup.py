@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: process launch to "ready to take a call" for the agents,
+and to the first tool call answered for the stock-images MCP server.
+
+1. Agents: each agent script runs --runs times against an in-process mock Live
+   server (GEMINI_LIVE_URL, with --setup-delay-ms standing in for the handshake
+   and setup of the real service) until it prints "Ready to take calls". The
+   agents also log when PortAudio finished enumerating devices. For reference,
+   the two big start-up costs are timed alone in fresh interpreters: importing
+   the Gemini SDK and pyaudio.PyAudio(). Their sum is what the agents paid in
+   series when both happened at import.
+2. MCP server: server.py runs --runs times over stdio against mock_stock_api.py
+   in its own process. Reports launch to the initialize response and launch to
+   the answer of a first search_stock_images call.
+
+Each agent is stopped as soon as it is ready, before it opens its devices.
+The agents are pointed at the system default devices (INPUT_DEVICE and
+OUTPUT_DEVICE set empty), so this runs on machines without the virtual cables;
+PortAudio still has to start and the defaults are still resolved.
+
+    python bench_startup.py --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_downloads import spawn_mock
+from mock_live_server import MockLiveServer
+
+HERE = Path(__file__).resolve().parent
+AGENTS = ("simpleVoiceAgentLive.py", "VoiceAgentOverCall.py")
+READY = re.compile(r"Ready to take calls \((\d+) ms after launch\)")
+PORTAUDIO = re.compile(r"PortAudio up with (\d+) devices in (\d+) ms")
+
+
+def summary(values) -> dict:
+    return {"median": round(statistics.median(values), 1), "min": round(min(values), 1),
+            "max": round(max(values), 1)}
+
+
+async def _drain(stream, lines):
+    while line := await stream.readline():
+        lines.append(line.decode("utf-8", "replace"))
+
+
+async def time_import(code) -> float:
+    """Milliseconds a fresh interpreter takes to run code (interpreter start-up included)."""
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(sys.executable, "-c", code, cwd=HERE,
+                                                   stdout=asyncio.subprocess.DEVNULL,
+                                                   stderr=asyncio.subprocess.DEVNULL)
+    await process.wait()
+    return (time.perf_counter() - started) * 1000
+
+
+async def run_agent(script, env, timeout) -> dict:
+    with tempfile.TemporaryDirectory() as cwd:  # Keeps transcripts.db and friends out of the repo
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(sys.executable, str(HERE / script), cwd=cwd, env=env,
+                                                       stdin=asyncio.subprocess.PIPE,
+                                                       stdout=asyncio.subprocess.PIPE,
+                                                       stderr=asyncio.subprocess.PIPE)
+        log = []
+        drain = asyncio.create_task(_drain(process.stderr, log))
+        try:
+            async with asyncio.timeout(timeout):
+                while line := (await process.stdout.readline()).decode("utf-8", "replace"):
+                    if match := READY.search(line):
+                        break
+                else:
+                    raise RuntimeError(f"{script} exited before it was ready:\n{''.join(log[-20:])}")
+        finally:
+            ready_ms = (time.perf_counter() - started) * 1000
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
+            await drain
+    portaudio = next((PORTAUDIO.search(line) for line in log if PORTAUDIO.search(line)), None)
+    return {
+        "ready_ms": ready_ms,
+        "ready_reported_ms": int(match.group(1)),
+        "portaudio_ms": int(portaudio.group(2)) if portaudio else None,
+        "devices": int(portaudio.group(1)) if portaudio else None,
+    }
+
+
+async def run_agents(args) -> dict:
+    results = {
+        "genai_import_ms": summary([await time_import("from google import genai") for _ in range(args.runs)]),
+        "portaudio_init_ms": summary([await time_import("import pyaudio; pyaudio.PyAudio()")
+                                      for _ in range(args.runs)]),
+        "interpreter_ms": summary([await time_import("pass") for _ in range(args.runs)]),
+    }
+    results["serial_estimate_ms"] = round(results["genai_import_ms"]["median"]
+                                          + results["portaudio_init_ms"]["median"]
+                                          - results["interpreter_ms"]["median"], 1)
+    server = await MockLiveServer(port=0, setup_delay_ms=args.setup_delay_ms).start()
+    try:
+        env = dict(os.environ, GEMINI_LIVE_URL=server.url, PYTHONUNBUFFERED="1", INPUT_DEVICE="", OUTPUT_DEVICE="")
+        env.pop("GEMINI_API_KEY", None)
+        for script in args.agents:
+            runs = [await run_agent(script, env, args.timeout) for _ in range(args.runs)]
+            results[script] = {
+                "ready_ms": summary([run["ready_ms"] for run in runs]),
+                "ready_reported_ms": summary([run["ready_reported_ms"] for run in runs]),
+                "portaudio_ms": summary([run["portaudio_ms"] for run in runs if run["portaudio_ms"] is not None]
+                                        or [0]),
+                "devices": runs[-1]["devices"],
+            }
+    finally:
+        await server.close()
+    return results
+
+
+async def _rpc(process, message, expect_id=None):
+    process.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+    await process.stdin.drain()
+    while expect_id is not None:
+        line = await process.stdout.readline()
+        if not line:
+            raise RuntimeError("server.py closed stdout")
+        reply = json.loads(line)
+        if reply.get("id") == expect_id:
+            return reply
+
+
+async def run_server(env, timeout) -> dict:
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(sys.executable, str(HERE / "server.py"), env=env,
+                                                   stdin=asyncio.subprocess.PIPE,
+                                                   stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.DEVNULL)
+    try:
+        async with asyncio.timeout(timeout):
+            await _rpc(process, {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+                "protocolVersion": "2024-11-05", "capabilities": {},
+                "clientInfo": {"name": "bench_startup", "version": "1"}}}, expect_id=1)
+            initialized_ms = (time.perf_counter() - started) * 1000
+            await _rpc(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+            reply = await _rpc(process, {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {
+                "name": "search_stock_images", "arguments": {"query": "startup", "output": "compact"}}},
+                               expect_id=2)
+            first_call_ms = (time.perf_counter() - started) * 1000
+    finally:
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+    if "error" in reply or reply["result"].get("isError"):
+        raise RuntimeError(f"search_stock_images failed: {reply}")
+    return {"initialize_ms": initialized_ms, "first_tool_call_ms": first_call_ms}
+
+
+async def run_servers(args) -> dict:
+    mock, url = spawn_mock(image_kb=64, latency_ms=args.search_delay_ms)
+    try:
+        with tempfile.TemporaryDirectory() as cache:
+            env = dict(os.environ, PYTHONUNBUFFERED="1", SEARCH_CACHE_DIR=cache,
+                       PEXELS_API_URL=f"{url}/pexels", UNSPLASH_API_URL=f"{url}/unsplash",
+                       PIXABAY_API_URL=f"{url}/pixabay", PEXELS_API_KEY="bench", UNSPLASH_API_KEY="bench",
+                       PIXABAY_API_KEY="bench")
+            runs = []
+            for _ in range(args.runs):
+                for path in Path(cache).glob("*.json"):
+                    path.unlink()  # Every run is a cold cache too
+                runs.append(await run_server(env, args.timeout))
+    finally:
+        mock.terminate()
+    return {
+        "search_delay_ms": args.search_delay_ms,
+        "initialize_ms": summary([run["initialize_ms"] for run in runs]),
+        "first_tool_call_ms": summary([run["first_tool_call_ms"] for run in runs]),
+    }
+
+
+async def run(args) -> dict:
+    results = {"runs": args.runs}
+    if args.agents:
+        results["agents"] = await run_agents(args)
+    if not args.skip_server:
+        results["mcp_server"] = await run_servers(args)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="launches per program")
+    parser.add_argument("--agents", nargs="*", default=list(AGENTS), help="agent scripts to launch (none to skip)")
+    parser.add_argument("--skip-server", action="store_true", help="do not launch server.py")
+    parser.add_argument("--setup-delay-ms", type=int, default=400, help="mock handshake + setup cost")
+    parser.add_argument("--search-delay-ms", type=int, default=150, help="mock provider latency")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds before a launch counts as hung")
+    parser.add_argument("--out", help="write the JSON results here as well as to stdout")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
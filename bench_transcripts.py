@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Transcript store benchmark: cost on the receive loop, ingest rate, and search
+latency over many calls.
+
+1. Listener cost: the time one TranscriptStore.publish() adds per fragment
+   on the event loop.
+2. Ingest: streams fragments for --calls synthetic calls (customer and agent
+   turns of a few words per fragment) through the background writer and
+   reports fragments/s, turns written and database size.
+3. Search: runs full-text queries ("calls where the customer mentioned
+   price") against the index and, for comparison, the same lookup as a LIKE
+   scan over the turns table.
+
+    python bench_transcripts.py --calls 5000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import transcript_store
+from transcript_store import TranscriptStore
+
+WORDS = ("so basically we are looking at the new plan for your team and honestly it works "
+         "great when you need more seats next month we can set up a quick demo call "
+         "budget timeline contract support onboarding discount renewal quarter").split()
+TOPICS = ["price", "refund", "competitor", "cancel", "invoice"]
+
+
+def synthetic_call(rng, turns=20, words_per_fragment=3):
+    """Yields (role, text) fragments of one call; some customer turns mention a topic."""
+    for i in range(turns):
+        role = "customer" if i % 2 else "agent"
+        words = rng.choices(WORDS, k=rng.randint(6, 24))
+        if role == "customer" and rng.random() < 0.05:
+            words.insert(rng.randrange(len(words)), rng.choice(TOPICS))
+        for j in range(0, len(words), words_per_fragment):
+            yield role, " " + " ".join(words[j:j + words_per_fragment])
+
+
+def publish_cost(path, fragments=200000) -> dict:
+    store = TranscriptStore(path, max_pending=fragments + 1)
+    started = time.perf_counter()
+    for _ in range(fragments):
+        store.publish("call-1", "customer", " hello there")
+    per_call_us = (time.perf_counter() - started) / fragments * 1e6
+    return {"publish_us": round(per_call_us, 2)}
+
+
+def ingest(path, calls, seed=1) -> dict:
+    rng = random.Random(seed)
+    store = TranscriptStore(path, flush_interval=0.05).start()
+    fragments = 0
+    started = time.perf_counter()
+    ts = time.time()
+    for n in range(calls):
+        session_id = f"call-{n}"
+        for role, text in synthetic_call(rng):
+            ts += 0.2
+            store.publish(session_id, role, text, ts)
+            fragments += 1
+        store.end_call(session_id, ts)
+        while len(store._pending) > 5000:
+            time.sleep(0.001)  # Let the writer catch up; real calls arrive far slower
+    store.close()
+    elapsed = time.perf_counter() - started
+    return {
+        "calls": calls,
+        "fragments": fragments,
+        "turns_written": store.turns_written,
+        "fragments_per_s": round(fragments / elapsed),
+        "seconds": round(elapsed, 1),
+        "db_mb": round(Path(path).stat().st_size / 1e6, 1),
+    }
+
+
+def timed(fn, repeat=20):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 2), result
+
+
+def search_latency(path) -> list:
+    db = transcript_store.connect(path)
+    results = []
+    for query in TOPICS[:3] + ['"quick demo"', "refund OR cancel"]:
+        fts_ms, calls = timed(lambda: transcript_store.find_calls(db, query, role="customer", limit=10000))
+        row = {"query": query, "calls": len(calls), "fts_ms": fts_ms}
+        if " " not in query:
+            like_ms, _ = timed(lambda: db.execute(
+                "SELECT DISTINCT call_id FROM turns WHERE role = 'customer' AND text LIKE ?",
+                (f"%{query}%",)).fetchall(), repeat=5)
+            row["like_scan_ms"] = like_ms
+        results.append(row)
+    db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=5000, help="synthetic calls to ingest")
+    parser.add_argument("--out", help="write the JSON results here as well as to stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "transcripts.db")
+        results = {
+            "listener": publish_cost(str(Path(tmp) / "publish.db")),
+            "ingest": ingest(path, args.calls),
+            "search": search_latency(path),
+        }
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,687 @@
+"""
+Per-call voice session and a supervisor that runs many of them on one event loop.
+
+A CallSession owns everything one phone line needs: its capture and playback
+engines (a device pair or any object with the same interface), the bounded
+output queue, the Live session and the operator guidance channel. Nothing is
+module-global, so a single process can drive as many calls as the box allows.
+
+Calls outlive their websocket: when the connection drops or the server sends
+GoAway, the session reconnects with the latest resumption handle while
+capture keeps filling a bounded backlog, which is sent first once the new
+connection is up. Playback and the output queue carry on across the gap.
+"""
+
+import asyncio
+import collections
+import contextlib
+import itertools
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from google.genai import errors, types
+from websockets.exceptions import ConnectionClosed
+
+import live_client
+from audio_buffers import DROP_OLDEST, FrameQueue
+from capture import CaptureEngine
+from control_plane import ControlPlane
+from echo import EchoSuppressor
+from greeting_cache import persona_key
+from metrics import MetricsReporter, SessionMetrics
+from playback import PlaybackEngine
+from recorder import AGENT, CUSTOMER, CallRecorder
+from transcript_store import TranscriptStore
+from vad import VoiceActivityGate
+
+DEFAULT_GUIDANCE_TEMPLATE = "[SYSTEM INSTRUCTION - CONVERSATION GUIDANCE: {text}]"
+
+_session_ids = itertools.count(1)
+
+
+class GoAway(Exception):
+    """The server announced it will close the connection soon."""
+
+
+# Errors that end a connection but not the call. Not bare OSError: PyAudio raises it for
+# a device that will not open, and that must end the call instead of reconnecting forever
+DISCONNECT_ERRORS = (ConnectionClosed, ConnectionError, TimeoutError, errors.APIError, GoAway)
+
+
+def is_disconnect(exc) -> bool:
+    if isinstance(exc, BaseExceptionGroup):
+        return all(is_disconnect(e) for e in exc.exceptions)
+    return isinstance(exc, DISCONNECT_ERRORS)
+
+
+def root_cause(exc):
+    while isinstance(exc, BaseExceptionGroup):
+        exc = exc.exceptions[0]
+    return exc
+
+
+@dataclass
+class AudioSettings:
+    """Audio pipeline knobs for one call."""
+    send_sample_rate: int = 16000
+    receive_sample_rate: int = 24000
+    channels: int = 1
+    capture_frame_ms: int = 20
+    capture_buffer_ms: int = 200
+    # Upstream coalescing: capture frames per send_realtime_input message, and how long
+    # the oldest frame may wait for the rest (None waits for send_frames frames)
+    send_frames: int = 1
+    send_max_delay_ms: Optional[int] = None
+    capture_policy: str = DROP_OLDEST
+    playback_frame_ms: int = 20
+    playback_jitter_ms: int = 60
+    output_queue_maxsize: int = 512
+    output_queue_policy: str = DROP_OLDEST
+    client_vad: bool = False
+    echo_suppression: bool = False  # Cancel the agent's own voice picked up by the capture device
+    reconnect_buffer_ms: int = 5000  # Speech kept while the Live connection is re-established
+    # Native device formats; None means the device is opened at the Live API format
+    input_device_rate: Optional[int] = None
+    input_device_channels: Optional[int] = None
+    output_device_rate: Optional[int] = None
+    output_device_channels: Optional[int] = None
+
+
+class CallSession:
+    """One voice call between a Live session and an audio source/sink pair."""
+
+    def __init__(self, client, model, config, pya=None, *, session_id=None,
+                 input_device_index=None, output_device_index=None, settings=None,
+                 guidance_template=DEFAULT_GUIDANCE_TEMPLATE, capture=None, playback=None,
+                 live_url=None, rtt_interval=5.0, pool=None, pickup_prompt=None,
+                 max_reconnect_attempts=5, reconnect_delay=0.5, greeting_cache=None, record_dir=None):
+        self.client = client
+        self.model = model
+        self.config = config
+        self.live_url = live_url
+        self.rtt_interval = rtt_interval
+        self.pool = pool
+        self.pickup_prompt = pickup_prompt
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self.reconnect_delay = reconnect_delay
+        self.greeting_cache = greeting_cache
+        self.record_dir = record_dir
+        self.recorder = None
+        self.greeting_key = persona_key(model, config) if greeting_cache else None
+        self._greeting = None  # Cached greeting played at pickup
+        self._greeting_recording = None  # (pcm, transcript) of the model's opener on a cache miss
+        self.session_id = session_id or f"call-{next(_session_ids)}"
+        self.settings = settings = settings or AudioSettings()
+        self.guidance_template = guidance_template
+
+        self.capture = capture or CaptureEngine(
+            pya,
+            rate=settings.send_sample_rate,
+            channels=settings.channels,
+            device_index=input_device_index,
+            frame_ms=settings.capture_frame_ms,
+            capacity_ms=settings.capture_buffer_ms,
+            policy=settings.capture_policy,
+            device_rate=settings.input_device_rate,
+            device_channels=settings.input_device_channels,
+        )
+        self.playback = playback or PlaybackEngine(
+            pya,
+            rate=settings.receive_sample_rate,
+            channels=settings.channels,
+            device_index=output_device_index,
+            frame_ms=settings.playback_frame_ms,
+            jitter_ms=settings.playback_jitter_ms,
+            device_rate=settings.output_device_rate,
+            device_channels=settings.output_device_channels,
+        )
+        self.output_queue = FrameQueue(settings.output_queue_maxsize, policy=settings.output_queue_policy)
+        self.guidance = asyncio.Queue()
+        self.transcript_listeners = []  # callables (session_id, role, text), must not block
+        self.vad = VoiceActivityGate(rate=settings.send_sample_rate, frame_ms=settings.capture_frame_ms) if settings.client_vad else None
+        self.echo = None
+        if settings.echo_suppression:
+            self.echo = EchoSuppressor(
+                rate=settings.send_sample_rate,
+                frame_ms=settings.capture_frame_ms,
+                ref_rate=getattr(self.playback, "device_rate", self.playback.rate),
+                ref_channels=getattr(self.playback, "device_channels", self.playback.channels),
+            )
+            self.playback.taps.append(self.echo)
+        self.live = None
+        self.resume_handle = None
+        # (frame, gated) captured or left unsent across a reconnect; gated frames already passed the VAD gate
+        self._backlog = collections.deque(maxlen=max(1, settings.reconnect_buffer_ms // settings.capture_frame_ms))
+        self._gap_task = None
+        self._greeting_task = None  # Writing a recorded greeting to the cache, on a worker thread
+        self._pending = []  # Frames of the next upstream message
+        self._pending_since = None  # (read_at, age_ms) of its oldest captured frame
+
+        # Counters
+        self.metrics = SessionMetrics(self.session_id)
+        self.cpu_seconds = 0.0
+        self.last_response_ms = None
+        self.pickup_to_audio_ms = None
+        self._picked_up_at = None
+        self._disconnected_at = None
+        self._received = False
+        self.gap_dropped_frames = 0
+        self._last_input_at = None
+        self._turn_has_audio = False
+
+    def __repr__(self):
+        return f"CallSession({self.session_id!r})"
+
+    async def run(self):
+        """Connects to Gemini (or GEMINI_LIVE_URL) and runs the call until it ends or is cancelled.
+
+        With a pool the call picks up an already connected session; otherwise
+        it connects here. pickup_prompt, if set, asks the model to open the call;
+        with a greeting cache, a cached opener plays right away instead and the
+        model is told it has been said. Dropped connections are re-established
+        up to max_reconnect_attempts times in a row.
+        """
+        self._picked_up_at = time.perf_counter()
+        if self.record_dir:
+            self._start_recording()
+        if self.greeting_cache:
+            self._play_cached_greeting()
+        try:
+            # Once per call, outside the reconnect loop: a device error is not a disconnect
+            await self.capture.start()
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._play_audio())
+                tg.create_task(self._stay_connected())
+        finally:
+            await self._stop_gap_buffer()
+            self.close()
+            if self.recorder:
+                await asyncio.to_thread(self.recorder.close)
+            if self._greeting_task is not None:
+                await self._greeting_task
+
+    def _start_recording(self):
+        """Taps both legs into a stereo WAV: customer left, agent right."""
+        os.makedirs(self.record_dir, exist_ok=True)
+        path = os.path.join(self.record_dir, f"{self.session_id}-{time.strftime('%Y%m%d-%H%M%S')}.wav")
+        self.recorder = CallRecorder(path, rate=self.settings.send_sample_rate).start()
+        capture, playback = self.capture, self.playback
+        capture.taps.append(self.recorder.leg(CUSTOMER, capture.rate, capture.channels))
+        playback.taps.append(self.recorder.leg(AGENT, getattr(playback, "device_rate", playback.rate),
+                                               getattr(playback, "device_channels", playback.channels)))
+
+    async def _stay_connected(self):
+        attempts = 0
+        while True:
+            self._received = False
+            try:
+                await self._run_connection()
+            except Exception as e:
+                if not is_disconnect(e):
+                    raise
+                attempts = 1 if self._received else attempts + 1
+                if attempts > self.max_reconnect_attempts:
+                    raise
+                self._on_disconnect(e)
+                await asyncio.sleep(self.reconnect_delay * (attempts - 1))
+
+    async def _run_connection(self):
+        """Opens one Live connection and streams over it until it fails."""
+        if self.pool and self.live is None:
+            opener = self.pool.session()
+        else:
+            opener = live_client.connect(self.client, self.model, self._connect_config(), url=self.live_url)
+        async with opener as live:
+            first = self.live is None
+            self.live = live
+            if first:
+                connect_ms = (time.perf_counter() - self._picked_up_at) * 1000
+                self.metrics.connect_ms.observe(connect_ms)
+                logging.info("[%s] Connected to %s in %.0f ms.", self.session_id,
+                             live_client.live_url(self.live_url) or "Gemini", connect_ms)
+                if self._greeting:
+                    await self._send_greeting_context()
+                elif self.pickup_prompt:
+                    await live.send_client_content(
+                        turns=[{"role": "user", "parts": [{"text": self.pickup_prompt}]}],
+                        turn_complete=True
+                    )
+            else:
+                reconnect_ms = (time.perf_counter() - self._disconnected_at) * 1000
+                self.metrics.reconnects += 1
+                self.metrics.reconnect_ms.observe(reconnect_ms)
+                logging.info("[%s] Reconnected in %.0f ms (%s); sending %d ms of speech captured meanwhile.",
+                             self.session_id, reconnect_ms, "resumed" if self.resume_handle else "new conversation",
+                             len(self._backlog) * self.settings.capture_frame_ms)
+            await self._stop_gap_buffer()
+
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._send_realtime())
+                tg.create_task(self._receive_audio())
+                tg.create_task(self._send_guidance())
+                if self.rtt_interval:
+                    tg.create_task(self._probe_rtt())
+
+    def _play_cached_greeting(self):
+        """Queues the cached opener for playback at pickup, or arms recording the model's."""
+        greeting = self.greeting_cache.get(self.greeting_key)
+        if greeting is None:
+            if self.pickup_prompt:
+                self._greeting_recording = (bytearray(), [])
+            logging.info("[%s] No cached greeting for persona %s; recording the model's.",
+                         self.session_id, self.greeting_key)
+            return
+        self._greeting = greeting
+        for chunk in greeting.chunks():
+            self.output_queue.put_nowait(chunk)
+        self.output_queue.put_nowait(None)
+        self._mark_first_audio()
+        logging.info("[%s] Playing cached greeting (%.1f s).", self.session_id, greeting.duration_ms / 1000)
+
+    async def _send_greeting_context(self):
+        """Adds the pickup prompt and the cached greeting to the history without asking for a reply."""
+        turns = []
+        if self.pickup_prompt:
+            turns.append({"role": "user", "parts": [{"text": self.pickup_prompt}]})
+        if self._greeting.text:
+            turns.append({"role": "model", "parts": [{"text": self._greeting.text}]})
+        if turns:
+            await self.live.send_client_content(turns=turns, turn_complete=False)
+
+    def _store_greeting(self, pcm, transcript):
+        """Caches the model's first turn as the persona's greeting; blocking, so it runs on a worker thread."""
+        try:
+            if pcm and self.greeting_cache.put(self.greeting_key, pcm, "".join(transcript).strip()):
+                logging.info("[%s] Cached the model's greeting for persona %s.", self.session_id, self.greeting_key)
+        except OSError as e:
+            logging.warning("[%s] Could not cache the greeting: %s", self.session_id, e)
+
+    def _mark_first_audio(self):
+        if self.pickup_to_audio_ms is None:
+            self.pickup_to_audio_ms = round((time.perf_counter() - self._picked_up_at) * 1000, 1)
+            self.metrics.pickup_to_audio_ms.observe(self.pickup_to_audio_ms)
+
+    def _connect_config(self):
+        """The call's config, resuming the previous conversation when the server gave a handle."""
+        if not self.resume_handle:
+            return self.config
+        if isinstance(self.config, dict):
+            return {**self.config, "session_resumption": {"handle": self.resume_handle}}
+        return self.config.model_copy(
+            update={"session_resumption": types.SessionResumptionConfig(handle=self.resume_handle)}
+        )
+
+    def _on_disconnect(self, exc):
+        self._disconnected_at = time.perf_counter()
+        self._greeting_recording = None
+        if self.live is not None:
+            logging.warning("[%s] Live connection lost (%r); reconnecting.", self.session_id, root_cause(exc))
+            if not self.resume_handle:
+                logging.warning("[%s] No session resumption handle: the model will not remember this call.",
+                                self.session_id)
+            if self._gap_task is None:
+                self._gap_task = asyncio.create_task(self._buffer_gap())
+        # A reply cut off mid-turn still drains what already arrived
+        if self._turn_has_audio:
+            self._turn_has_audio = False
+            with contextlib.suppress(asyncio.QueueFull):
+                self.output_queue.put_nowait(None)
+
+    async def _buffer_gap(self):
+        """Keeps reading capture while disconnected so the customer's speech is not lost."""
+        backlog = self._backlog
+        while True:
+            frame, _, _ = await self._read_frame()
+            if len(backlog) == backlog.maxlen:
+                self.gap_dropped_frames += 1
+            backlog.append((bytes(frame), False))
+
+    async def _stop_gap_buffer(self):
+        if self._gap_task is not None:
+            self._gap_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._gap_task
+            self._gap_task = None
+
+    def send_guidance(self, text: str):
+        """Queues hidden operator guidance for this call."""
+        text = text.strip()
+        if text:
+            self.guidance.put_nowait(text)
+
+    def gauges(self) -> dict:
+        """Point-in-time values for the metrics reporter."""
+        playback = self.playback.stats()
+        return {
+            "cpu_ms": round(self.cpu_seconds * 1000, 1),
+            "output_queue_depth": len(self.output_queue),
+            "capture_buffered_ms": self.capture.stats()["buffered_ms"],
+            "playback_buffered_ms": playback["buffered_ms"],
+            "playback_underruns": playback.get("underruns", 0),
+        }
+
+    def stats(self) -> dict:
+        response_ms = self.metrics.response_ms
+        return {
+            "session_id": self.session_id,
+            "cpu_ms": round(self.cpu_seconds * 1000, 1),
+            "turns": self.metrics.turns,
+            "barge_ins": self.metrics.barge_ins,
+            "last_response_ms": self.last_response_ms,
+            "pickup_to_audio_ms": self.pickup_to_audio_ms,
+            "reconnects": self.metrics.reconnects,
+            "gap_dropped_frames": self.gap_dropped_frames,
+            "mean_response_ms": round(response_ms.sum / response_ms.count, 1) if response_ms.count else None,
+            "output_queue": self.output_queue.stats(),
+            "capture": self.capture.stats(),
+            "playback": self.playback.stats(),
+            "vad": self.vad.stats() if self.vad else None,
+            "echo": self.echo.stats() if self.echo else None,
+            "recorder": self.recorder.stats() if self.recorder else None,
+        }
+
+    def close(self):
+        self.capture.close()
+        self.playback.close()
+        logging.info("[%s] Call stats: %s", self.session_id, self.stats())
+
+    async def _send_realtime(self):
+        """Sends audio frames from the capture engine to the Live session.
+
+        Frames are coalesced settings.send_frames to a message; a shorter batch
+        goes out once its oldest frame has waited settings.send_max_delay_ms, at
+        the end of speech, and after the reconnect backlog. Both settings are
+        read per message, so they can be changed during the call. Frames still
+        unsent when the connection drops go back to the backlog.
+        """
+        blob = types.Blob(data=b"", mime_type="audio/pcm")
+        try:
+            while self._backlog:
+                frame, gated = self._backlog.popleft()
+                await self._send_frame(blob, frame, gated=gated)
+            await self._flush(blob)
+            while True:
+                max_delay_ms = self.settings.send_max_delay_ms
+                if self._pending_since is None or max_delay_ms is None:
+                    frame, read_at, age_ms = await self._read_frame()
+                else:
+                    read_at, age_ms = self._pending_since
+                    wait = max_delay_ms / 1000 - age_ms / 1000 - (time.perf_counter() - read_at)
+                    try:
+                        async with asyncio.timeout(max(0.0, wait)):
+                            frame, read_at, age_ms = await self._read_frame()
+                    except TimeoutError:
+                        await self._flush(blob)
+                        continue
+                await self._send_frame(blob, frame, read_at, age_ms)
+        finally:
+            # Older than anything in the backlog, so they go in front; if they do not all fit, the oldest go
+            room = self._backlog.maxlen - len(self._backlog)
+            kept = self._pending[len(self._pending) - room:] if room < len(self._pending) else self._pending
+            self.gap_dropped_frames += len(self._pending) - len(kept)
+            self._backlog.extendleft((frame, True) for frame in reversed(kept))
+            self._pending.clear()
+            self._pending_since = None
+
+    async def _read_frame(self):
+        """Reads the next capture frame, echo-suppressed if enabled; returns (frame, read_at, age_ms)."""
+        frame = await self.capture.read_frame()
+        read_at = time.perf_counter()
+        age_ms = self.capture.frame_age_ms()
+        if self.echo is not None:
+            started = time.thread_time()
+            frame = self.echo.process(frame, read_at - age_ms / 1000)
+            self.cpu_seconds += time.thread_time() - started
+        return frame, read_at, age_ms
+
+    async def _send_frame(self, blob, frame, read_at=None, age_ms=0.0, gated=False) -> bool:
+        """Queues one capture frame (through the VAD gate if enabled) and sends the batch when it is due.
+
+        gated frames already went through the gate before a reconnect and skip
+        it. True if the frame produced audio for upstream.
+        """
+        started = time.thread_time()
+        if self.vad is None or gated:
+            frames, speech_ended = [bytes(frame)], False
+        else:
+            frames, speech_ended = self.vad.process(frame)
+        self.cpu_seconds += time.thread_time() - started
+        if frames:
+            if self._pending_since is None and read_at is not None:
+                self._pending_since = (read_at, age_ms)
+            self._pending.extend(frames)
+        if speech_ended or len(self._pending) >= self.settings.send_frames:
+            await self._flush(blob)
+        if speech_ended:
+            self._last_input_at = time.perf_counter()
+            await self.live.send_realtime_input(audio_stream_end=True)
+        return bool(frames)
+
+    async def _flush(self, blob):
+        """Sends the pending frames as one realtime input message."""
+        if not self._pending:
+            return
+        metrics = self.metrics
+        blob.data = data = self._pending[0] if len(self._pending) == 1 else b"".join(self._pending)
+        await self.live.send_realtime_input(audio=blob)
+        self._pending.clear()
+        metrics.messages_sent += 1
+        metrics.bytes_sent += len(data)
+        if self._pending_since is not None:
+            read_at, age_ms = self._pending_since
+            metrics.capture_to_send_ms.observe(age_ms + (time.perf_counter() - read_at) * 1000)
+            self._pending_since = None
+
+    async def _send_guidance(self):
+        """Forwards queued operator guidance to the model as a hidden user turn."""
+        while True:
+            text = await self.guidance.get()
+            guidance = self.guidance_template.format(text=text)
+            await self.live.send_client_content(
+                turns=[{"role": "user", "parts": [{"text": guidance}]}],
+                turn_complete=True
+            )
+
+    async def _receive_audio(self):
+        """Receives responses from GenAI and puts audio into the output queue."""
+        while True:
+            async for response in self.live.receive():
+                self._received = True
+                update = response.session_resumption_update
+                if update and update.resumable and update.new_handle:
+                    self.resume_handle = update.new_handle
+                if response.go_away:
+                    raise GoAway(f"server closing in {response.go_away.time_left}")
+                if not response.server_content:
+                    continue
+                for chunk in self._handle_content(response.server_content):
+                    await self.output_queue.put(chunk)
+
+            # Turn complete: let playback drain the tail of the turn
+            self.metrics.turns += 1
+            if self._greeting_recording:
+                # Written on a worker thread so the receive loop goes straight on to the next turn
+                recording, self._greeting_recording = self._greeting_recording, None
+                self._greeting_task = asyncio.create_task(asyncio.to_thread(self._store_greeting, *recording))
+            self._turn_has_audio = False
+            await self.output_queue.put(None)
+
+    def _handle_content(self, content) -> list:
+        """Handles one server_content message and returns its audio chunks."""
+        started = time.thread_time()
+        chunks = []
+
+        # Customer talked over the agent: flush playback immediately
+        if content.interrupted:
+            self._barge_in()
+
+        if content.input_transcription:
+            self._last_input_at = time.perf_counter()
+            print(f"[{self.session_id}] Input Transcript:", content.input_transcription.text)
+            self._publish_transcript("customer", content.input_transcription.text)
+
+        if content.output_transcription:
+            print(f"[{self.session_id}] Transcript:", content.output_transcription.text)
+            self._publish_transcript("agent", content.output_transcription.text)
+            if self._greeting_recording:
+                self._greeting_recording[1].append(content.output_transcription.text or "")
+
+        if content.model_turn:
+            for part in content.model_turn.parts:
+                if part.inline_data and isinstance(part.inline_data.data, bytes):
+                    chunks.append(part.inline_data.data)
+                if part.text:
+                    print(part.text)
+            if chunks and not self._turn_has_audio:
+                self._turn_has_audio = True
+                self._record_response_latency()
+                self._mark_first_audio()
+            if chunks and self._greeting_recording:
+                self._greeting_recording[0].extend(b"".join(chunks))
+
+        self.cpu_seconds += time.thread_time() - started
+        return chunks
+
+    def _publish_transcript(self, role, text):
+        for listener in self.transcript_listeners:
+            listener(self.session_id, role, text)
+
+    def _record_response_latency(self):
+        """Time from the customer's last detected speech to the first audio of the reply."""
+        if self._last_input_at is None:
+            return
+        self.last_response_ms = round((time.perf_counter() - self._last_input_at) * 1000, 1)
+        self.metrics.response_ms.observe(self.last_response_ms)
+        self._last_input_at = None
+
+    def _barge_in(self):
+        """Stops agent playback at frame granularity when the customer talks over it."""
+        started = time.perf_counter()
+        dropped_chunks = self.output_queue.clear()
+        dropped_ms = self.playback.flush()
+        flush_ms = (time.perf_counter() - started) * 1000
+        self.metrics.barge_ins += 1
+        self.metrics.barge_in_dropped_ms.observe(dropped_ms)
+        self._turn_has_audio = False
+        self._greeting_recording = None
+        logging.info(
+            "[%s] Barge-in: dropped %d queued chunks and %.0f ms of buffered audio in %.2f ms (silent within %.0f ms)",
+            self.session_id, dropped_chunks, dropped_ms, flush_ms,
+            flush_ms + self.settings.playback_frame_ms + self.playback.device_latency_ms(),
+        )
+
+    async def _probe_rtt(self):
+        """Measures the websocket round trip with a ping every rtt_interval seconds."""
+        ws = getattr(self.live, "_ws", None)
+        if ws is None:
+            return
+        while True:
+            await asyncio.sleep(self.rtt_interval)
+            started = time.perf_counter()
+            pong = await ws.ping()
+            await pong
+            self.metrics.ws_rtt_ms.observe((time.perf_counter() - started) * 1000)
+
+    async def _play_audio(self):
+        """Feeds model audio from the output queue into the playback engine."""
+        await self.playback.start()
+        while True:
+            chunk = await self.output_queue.get()
+            if chunk is None:
+                self.playback.end_turn()
+                continue
+            await self.playback.write(chunk)
+
+
+class CallSupervisor:
+    """Runs many CallSessions concurrently on one event loop and reports on them."""
+
+    def __init__(self, report_interval=10.0, metrics_path=None, metrics_interval=5.0, metrics_port=None,
+                 control_port=None, transcript_path=None):
+        self.report_interval = report_interval
+        self.sessions = {}
+        self.metrics = None
+        if metrics_path or metrics_port is not None:
+            self.metrics = MetricsReporter(self.sessions, path=metrics_path, interval=metrics_interval, port=metrics_port)
+        self.control = ControlPlane(self.sessions, port=control_port) if control_port is not None else None
+        self.transcripts = TranscriptStore(transcript_path) if transcript_path else None
+
+    def add(self, session: CallSession) -> CallSession:
+        self.sessions[session.session_id] = session
+        if self.control:
+            self.control.attach(session)
+        if self.transcripts:
+            self.transcripts.attach(session)
+        return session
+
+    def route_guidance(self, line: str):
+        """Routes 'session_id: text' to that call; bare text goes to a lone call."""
+        session_id, sep, text = line.partition(":")
+        if sep and session_id.strip() in self.sessions:
+            self.sessions[session_id.strip()].send_guidance(text)
+        elif len(self.sessions) == 1:
+            next(iter(self.sessions.values())).send_guidance(line)
+        else:
+            print(f"Unknown call. Use '<session_id>: <guidance>' with one of: {', '.join(self.sessions)}")
+
+    async def console_guidance(self):
+        """Reads guidance from the console and routes it to the addressed call."""
+        print("Guidance console ready. Type instructions to guide the AI (customer won't know).")
+        while True:
+            line = await asyncio.to_thread(input)
+            if line.strip():
+                self.route_guidance(line)
+
+    async def run(self):
+        """Runs every registered call until all of them have ended.
+
+        The report, metrics and control plane run alongside in a TaskGroup, so
+        if one of them fails (say the control port is taken) the calls are
+        cancelled and run() raises its error instead of carrying on without it.
+        """
+        if self.transcripts:
+            self.transcripts.start()
+        try:
+            async with asyncio.TaskGroup() as tg:
+                background = [tg.create_task(self._report())]
+                if self.metrics:
+                    background.append(tg.create_task(self.metrics.run()))
+                if self.control:
+                    background.append(tg.create_task(self.control.run()))
+                try:
+                    await asyncio.gather(*(self._run_session(s) for s in self.sessions.values()))
+                finally:
+                    for task in background:
+                        task.cancel()
+        finally:
+            if self.transcripts:
+                await asyncio.to_thread(self.transcripts.close)
+
+    async def _run_session(self, session: CallSession):
+        # One failing line must not take the other calls down with it
+        try:
+            await session.run()
+        except Exception:
+            logging.exception("[%s] Call failed", session.session_id)
+        finally:
+            if self.transcripts:
+                self.transcripts.end_call(session.session_id)
+
+    async def _report(self):
+        wall, cpu = time.perf_counter(), time.process_time()
+        while True:
+            await asyncio.sleep(self.report_interval)
+            now_wall, now_cpu = time.perf_counter(), time.process_time()
+            logging.info("Supervisor: %d calls, process CPU %.1f%%",
+                         len(self.sessions), 100 * (now_cpu - cpu) / (now_wall - wall))
+            wall, cpu = now_wall, now_cpu
+            for session in self.sessions.values():
+                s = session.stats()
+                logging.info(
+                    "[%s] cpu=%.1fms output_queue=%d capture=%.0fms playback=%.0fms response=%sms",
+                    s["session_id"], s["cpu_ms"], s["output_queue"]["depth"],
+                    s["capture"]["buffered_ms"], s["playback"]["buffered_ms"], s["last_response_ms"],
+                )
@@ -0,0 +1,144 @@
+"""
+Callback-driven capture engine.
+
+PortAudio pushes input frames straight into a preallocated PCM ring buffer
+from its own thread; the sender awaits complete frames from the ring without
+a thread-pool hop or a per-frame dict.
+"""
+
+import asyncio
+import time
+
+import pyaudio
+
+from audio_buffers import BLOCK, DROP_OLDEST, POLICIES, PCMRingBuffer
+from resample import StreamResampler
+
+SAMPLE_WIDTH = 2  # paInt16
+
+
+class CaptureEngine:
+    """Captures 16-bit PCM through a PyAudio callback stream into a ring buffer.
+
+    Frames are delivered at rate/channels; if the device runs at a different
+    device_rate/device_channels the callback converts before writing the ring.
+    """
+
+    def __init__(self, pya, rate=16000, channels=1, device_index=None,
+                 frame_ms=20, capacity_ms=1000, policy=DROP_OLDEST,
+                 device_rate=None, device_channels=None):
+        if frame_ms < 10:
+            raise ValueError("frame_ms must be at least 10 ms")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {POLICIES}")
+        if policy == BLOCK:
+            raise ValueError("Capture cannot use the block policy: the PortAudio callback must never wait")
+        self.pya = pya
+        self.rate = rate
+        self.channels = channels
+        self.device_index = device_index
+        self.device_rate = device_rate or rate
+        self.device_channels = device_channels or channels
+        self.frame_ms = frame_ms
+        self.policy = policy
+
+        self._resampler = None
+        if (self.device_rate, self.device_channels) != (rate, channels):
+            self._resampler = StreamResampler(self.device_rate, rate, self.device_channels, channels)
+
+        self.frame_samples = int(rate * frame_ms / 1000)
+        self.frame_bytes = self.frame_samples * channels * SAMPLE_WIDTH
+        self._bytes_per_ms = rate * channels * SAMPLE_WIDTH / 1000
+        self._ring = PCMRingBuffer(max(int(capacity_ms * self._bytes_per_ms), 2 * self.frame_bytes))
+        self._frame = bytearray(self.frame_bytes)
+        self._frame_view = memoryview(self._frame)
+        self._loop = None
+        self._ready = None
+        self._stream = None
+        self._last_callback_at = 0.0
+        self.taps = []  # Optional recorder legs; get every captured chunk from the callback
+
+        # Counters
+        self.frames_read = 0
+        self.input_overflows = 0
+        self._rejected_bytes = 0
+
+    @property
+    def overruns(self) -> int:
+        return self._ring.overruns
+
+    @property
+    def dropped_frames(self) -> int:
+        return (self._ring.dropped_bytes + self._rejected_bytes) // self.frame_bytes
+
+    def bind(self, loop=None):
+        """Binds the engine to an event loop so the callback can wake the sender."""
+        self._loop = loop or asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+
+    async def start(self):
+        """Opens the input stream in callback mode."""
+        self.bind()
+        self._stream = await asyncio.to_thread(
+            self.pya.open,
+            format=pyaudio.paInt16,
+            channels=self.device_channels,
+            rate=self.device_rate,
+            input=True,
+            input_device_index=self.device_index,
+            frames_per_buffer=int(self.device_rate * self.frame_ms / 1000),
+            stream_callback=self._callback,
+        )
+
+    async def read_frame(self) -> memoryview:
+        """Waits for one full frame and returns a view of it.
+
+        The view points into a buffer reused by the next call, so copy it before
+        awaiting anything else if it has to outlive the current iteration.
+        """
+        while len(self._ring) < self.frame_bytes:
+            self._ready.clear()
+            if len(self._ring) >= self.frame_bytes:
+                break
+            await self._ready.wait()
+        self._ring.read_into(self._frame_view)
+        self.frames_read += 1
+        return self._frame_view
+
+    def frame_age_ms(self) -> float:
+        """How long ago the last sample of the frame just read was captured."""
+        newer_ms = len(self._ring) / self._bytes_per_ms
+        return (time.perf_counter() - self._last_callback_at) * 1000 + newer_ms
+
+    def stats(self) -> dict:
+        return {
+            "frames_read": self.frames_read,
+            "buffered_ms": round(len(self._ring) / self._bytes_per_ms, 1),
+            "policy": self.policy,
+            "overruns": self._ring.overruns,
+            "dropped_frames": self.dropped_frames,
+            "high_water_ms": round(self._ring.high_water / self._bytes_per_ms, 1),
+            "input_overflows": self.input_overflows,
+        }
+
+    def close(self):
+        if self._stream:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        self._last_callback_at = time.perf_counter()
+        if self._resampler:
+            in_data = self._resampler.process(in_data)
+        for tap in self.taps:
+            tap.write(in_data, self._last_callback_at - len(in_data) / self._bytes_per_ms / 1000)
+        # Never block PortAudio: if the sender stalls, the policy decides which audio to lose
+        if self.policy == DROP_OLDEST:
+            self._ring.write(in_data, overwrite=True)
+        else:
+            self._rejected_bytes += len(in_data) - self._ring.write(in_data)
+        if status & pyaudio.paInputOverflow:
+            self.input_overflows += 1
+        self._loop.call_soon_threadsafe(self._ready.set)
+        return (None, pyaudio.paContinue)
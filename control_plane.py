@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Operator control plane: steer any running call and watch its transcript.
+
+A local websocket endpoint next to the CallSupervisor. Operators send JSON
+messages; guidance addressed to a session id is queued on that call and goes
+out through its normal guidance template and send_client_content, without
+any thread blocking on input(). Subscribers get every transcript line (and
+the guidance other operators send) as it happens. Each subscriber has its own
+bounded drop-oldest queue, so a slow operator never holds up a call.
+
+Client -> server:
+    {"session": "call-1", "guidance": "ask about the budget"}
+    {"subscribe": ["call-1"]}      (or "*", [] / omitted for every call)
+    {"list": true}
+
+Server -> client:
+    {"event": "ack", "session": ...}        {"event": "error", "error": ...}
+    {"event": "sessions", "sessions": [...]}
+    {"event": "transcript", "session": ..., "role": "customer" | "agent", "text": ..., "ts": ...}
+    {"event": "guidance", "session": ..., "text": ..., "ts": ...}
+
+From a shell:
+    python control_plane.py send call-1 "ask about the budget"
+    python control_plane.py watch [call-1 ...]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+
+from websockets.asyncio.client import connect as ws_connect
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from audio_buffers import DROP_OLDEST, FrameQueue
+
+DEFAULT_PORT = 8770
+
+
+class ControlPlane:
+    """Websocket endpoint routing guidance to sessions and fanning transcripts out to subscribers."""
+
+    def __init__(self, sessions, host="127.0.0.1", port=DEFAULT_PORT, queue_size=256):
+        self.sessions = sessions  # mapping of session_id -> CallSession, may grow at runtime
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self._subscribers = {}  # websocket -> (set of session ids or None for all, FrameQueue)
+
+        # Counters
+        self.guidance_sent = 0
+        self.events_dropped = 0
+
+    def attach(self, session):
+        session.transcript_listeners.append(self.publish_transcript)
+
+    async def run(self):
+        async with serve(self._handle, self.host, self.port) as server:
+            if self.port == 0:
+                self.port = server.sockets[0].getsockname()[1]
+            logging.info("Control plane on ws://%s:%d", self.host, self.port)
+            await asyncio.Future()
+
+    def publish_transcript(self, session_id, role, text):
+        self._publish(session_id, {"event": "transcript", "session": session_id, "role": role,
+                                   "text": text, "ts": round(time.time(), 3)})
+
+    def _publish(self, session_id, event: dict):
+        if not self._subscribers:
+            return
+        message = json.dumps(event)
+        for sessions, queue in self._subscribers.values():
+            if sessions is None or session_id in sessions:
+                if len(queue) >= queue.maxsize:
+                    self.events_dropped += 1
+                queue.put_nowait(message)
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self._subscribers), "guidance_sent": self.guidance_sent,
+                "events_dropped": self.events_dropped}
+
+    async def _handle(self, ws):
+        outbox = FrameQueue(self.queue_size, policy=DROP_OLDEST)
+        writer = asyncio.create_task(self._write(ws, outbox))
+        try:
+            async for raw in ws:
+                try:
+                    reply = self._command(ws, outbox, json.loads(raw))
+                except (ValueError, TypeError, AttributeError) as e:
+                    reply = {"event": "error", "error": f"bad message: {e}"}
+                outbox.put_nowait(json.dumps(reply))
+        except ConnectionClosed:
+            pass
+        finally:
+            self._subscribers.pop(ws, None)
+            writer.cancel()
+
+    def _command(self, ws, outbox, message: dict) -> dict:
+        if "guidance" in message:
+            session_id = message.get("session")
+            if session_id is None and len(self.sessions) == 1:
+                session_id = next(iter(self.sessions))
+            session = self.sessions.get(session_id)
+            if session is None:
+                return {"event": "error", "error": f"unknown session {session_id!r}",
+                        "sessions": list(self.sessions)}
+            text = str(message["guidance"]).strip()
+            if not text:
+                return {"event": "error", "error": "empty guidance"}
+            session.send_guidance(text)
+            self.guidance_sent += 1
+            self._publish(session_id, {"event": "guidance", "session": session_id, "text": text,
+                                       "ts": round(time.time(), 3)})
+            return {"event": "ack", "session": session_id}
+        if "subscribe" in message:
+            wanted = message["subscribe"]
+            sessions = None if not wanted or wanted == "*" else set([wanted] if isinstance(wanted, str) else wanted)
+            self._subscribers[ws] = (sessions, outbox)
+            return {"event": "ack", "subscribe": sorted(sessions) if sessions else "*"}
+        if message.get("list"):
+            return {"event": "sessions", "sessions": list(self.sessions)}
+        return {"event": "error", "error": "expected 'guidance', 'subscribe' or 'list'"}
+
+    async def _write(self, ws, outbox: FrameQueue):
+        try:
+            while True:
+                await ws.send(await outbox.get())
+        except ConnectionClosed:
+            pass
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=f"ws://127.0.0.1:{DEFAULT_PORT}")
+    commands = parser.add_subparsers(dest="command", required=True)
+    send = commands.add_parser("send", help="send guidance to a call")
+    send.add_argument("session")
+    send.add_argument("text", nargs="+")
+    watch = commands.add_parser("watch", help="stream transcripts (all calls by default)")
+    watch.add_argument("sessions", nargs="*")
+    commands.add_parser("list", help="list running calls")
+    args = parser.parse_args()
+
+    async with ws_connect(args.url) as ws:
+        if args.command == "send":
+            await ws.send(json.dumps({"session": args.session, "guidance": " ".join(args.text)}))
+            print(await ws.recv())
+        elif args.command == "list":
+            await ws.send(json.dumps({"list": True}))
+            print(await ws.recv())
+        else:
+            await ws.send(json.dumps({"subscribe": args.sessions or "*"}))
+            async for raw in ws:
+                event = json.loads(raw)
+                if event.get("event") == "transcript":
+                    print(f"[{event['session']}] {event['role']}: {event['text']}")
+                elif event.get("event") == "guidance":
+                    print(f"[{event['session']}] guidance: {event['text']}")
+                else:
+                    print(raw, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
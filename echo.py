@@ -0,0 +1,292 @@
+"""
+Acoustic echo suppression for the capture path.
+
+When the agent's voice goes out to a virtual cable or speaker and the capture
+device (stereo mix, a phone on speaker) picks it back up, the model hears
+itself: upstream bandwidth is wasted on its own words and they trigger false
+barge-ins. EchoSuppressor removes that echo, using what playback actually
+played as the reference:
+
+- Playback hands over every chunk it plays, with the time it will be heard,
+  through the same tap interface as the call recorder (a deque append in the
+  PortAudio callback). Chunks are resampled and placed on a timeline at the
+  capture rate on the event loop.
+- A GCC-PHAT cross-correlation between recent capture and reference finds the
+  bulk delay of the echo path (device buffers, loopback, room), so the
+  adaptive filter only has to model the tail.
+- A partitioned-block frequency-domain NLMS filter (one block per capture
+  frame, overlap-save) estimates the echo and subtracts it. Adaptation
+  freezes during double talk so the customer's voice does not detune it.
+- A residual gate attenuates what is left while only the agent is talking.
+
+Everything is vectorized NumPy per frame; frames without recent far-end audio
+pass through untouched at almost no cost.
+"""
+
+import collections
+import math
+
+import numpy as np
+
+from resample import StreamResampler
+
+
+class EchoSuppressor:
+    """Removes the playback signal's echo from 16-bit mono capture frames."""
+
+    def __init__(self, rate=16000, frame_ms=20, ref_rate=None, ref_channels=1, tail_ms=120,
+                 max_delay_ms=500, mu=0.5, dt_margin_db=6.0, gate_db=-30.0, far_floor_db=-55.0,
+                 hold_ms=100, estimate_every_ms=1000, history_ms=2000, max_pending=500):
+        self.rate = rate
+        self.frame_ms = frame_ms
+        self.block = block = rate * frame_ms // 1000
+        self.partitions = max(1, math.ceil(rate * tail_ms / 1000 / block))
+        self.max_delay = rate * max_delay_ms // 1000
+        self.mu = mu
+        # Residual this much above what echo alone leaves means the customer is talking
+        self.dt_factor = 10.0 ** (dt_margin_db / 10)
+        self.gate_gain = 10.0 ** (gate_db / 20)
+        self.hold_frames = max(1, hold_ms // frame_ms)
+        self._far_floor = block * (32768.0 * 10.0 ** (far_floor_db / 20)) ** 2
+        self.max_pending = max_pending
+        self._resampler = None
+        if (ref_rate or rate, ref_channels) != (rate, 1):
+            self._resampler = StreamResampler(ref_rate or rate, rate, ref_channels, 1)
+
+        # Reference timeline: sample i (at `rate`, perf_counter * rate) lives at _ref[i % len]
+        self._ref = np.zeros(self.max_delay + (self.partitions + 2) * block + rate * history_ms // 1000, dtype=np.float32)
+        self._ref_end = None  # Index just past the newest reference sample
+        self._pending = collections.deque()
+        self._slack = block  # Timestamp jitter tolerated on a continuous stream
+
+        # Capture timeline and the window the delay estimator correlates against
+        self._mic_end = None
+        self._mic_history = np.zeros(rate * estimate_every_ms // 1000, dtype=np.float32)
+        self._estimate_every = max(1, estimate_every_ms // frame_ms)
+        self._since_estimate = 0
+        self._candidate = None
+        self.delay = 0  # Bulk echo delay in samples, as currently applied
+
+        # Adaptive filter state (overlap-save, block = frame, partitions cover the tail)
+        bins = block + 1
+        self._W = np.zeros((self.partitions, bins), dtype=np.complex128)
+        self._X = np.zeros((self.partitions, bins), dtype=np.complex128)
+        self._power = np.full(bins, 1.0)
+        self._prev_x = np.zeros(block, dtype=np.float32)
+        self._far_frames = 0  # Consecutive frames without far-end audio, capped
+        self._adapted = 0
+        self._frozen_run = 0
+        self._diverging = 0
+        self._residual = 1.0  # Smoothed residual-to-capture power ratio on echo-only frames
+        self._gain = 1.0
+        self._hold = 0
+
+        # Counters
+        self.frames = 0
+        self.far_end_frames = 0
+        self.double_talk_frames = 0
+        self.gated_frames = 0
+        self.delay_changes = 0
+        self.resets = 0
+        self.dropped_chunks = 0
+        self._erle = 0.0
+
+    # --- reference side (PortAudio callback thread) ---
+
+    def write(self, data, ts):
+        """Playback tap: queues a chunk the device plays at perf_counter time ts."""
+        if len(self._pending) >= self.max_pending:
+            self.dropped_chunks += 1
+            return
+        self._pending.append((ts, data))
+
+    # --- capture side (event loop) ---
+
+    def process(self, frame, ts) -> bytes:
+        """Returns the echo-suppressed copy of one capture frame whose last sample was captured at ts."""
+        block = self.block
+        self.frames += 1
+        self._drain()
+        end = round(ts * self.rate)
+        if self._mic_end is not None and abs(end - block - self._mic_end) <= self._slack:
+            end = self._mic_end + block  # Keep consecutive frames contiguous despite timing jitter
+        self._mic_end = end
+
+        d = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+        self._mic_history[:-block] = self._mic_history[block:]
+        self._mic_history[-block:] = d
+
+        x = self._reference(end - block - self.delay, block)
+        far = float(np.dot(x, x)) > self._far_floor
+        if far:
+            self._far_frames = 0
+            self.far_end_frames += 1
+            self._since_estimate += 1
+            # Until the delay is locked, look twice as often
+            if self._since_estimate >= self._estimate_every >> (not self.delay_changes):
+                self._since_estimate = 0
+                self._estimate_delay(end)
+                x = self._reference(end - block - self.delay, block)
+        else:
+            self._far_frames = min(self._far_frames + 1, 1 << 30)
+        if self._far_frames > self.partitions + 1:
+            # No far-end audio anywhere in the filter's reach: nothing to cancel
+            if self._far_frames == self.partitions + 2:
+                self._X[:] = 0
+            self._prev_x = x
+            self._gain = 1.0
+            self._hold = 0
+            return bytes(frame)
+
+        # Echo estimate for this block
+        X = np.fft.rfft(np.concatenate((self._prev_x, x)))
+        self._prev_x = x
+        self._X[1:] = self._X[:-1]
+        self._X[0] = X
+        y = np.fft.irfft((self._W * self._X).sum(axis=0), 2 * block)[block:]
+        e = d - y
+
+        pd = float(np.dot(d, d))
+        pe = float(np.dot(e, e))
+        py = float(np.dot(y, y))
+        ratio = pe / (pd + 1.0)
+        threshold = min(0.5, max(0.02, self.dt_factor * self._residual))
+        double_talk = far and self._adapted > 50 and ratio > threshold
+        if double_talk:
+            self.double_talk_frames += 1
+            self._frozen_run += 1
+            if self._frozen_run > 2000 // self.frame_ms:
+                self._adapted = 0  # Frozen too long: the echo path changed, relearn it
+        else:
+            self._frozen_run = 0
+        if far and not double_talk:
+            self._diverging = self._diverging + 1 if pe > 2 * pd + self._far_floor else 0
+            if self._diverging > 5:
+                self._reset()  # The filter adds more than it removes
+            else:
+                self._adapt(e, X)
+            self._residual += 0.05 * (ratio - self._residual)
+
+        # Residual gate: while only the agent talks, what is left is echo. A short
+        # hold keeps it closed across brief dips; double talk opens it at once
+        if double_talk:
+            self._hold = 0
+        elif far and pe < py:
+            self._hold = self.hold_frames
+        elif self._hold:
+            self._hold -= 1
+        target = self.gate_gain if self._hold else 1.0
+        self._gain = target if target < self._gain else self._gain + 0.2 * (1.0 - self._gain)
+        if self._gain < 0.5:
+            self.gated_frames += 1
+        out = e * self._gain
+        if far and not double_talk and pd > self._far_floor:
+            erle = 10 * math.log10(pd / (float(np.dot(out, out)) + 1.0))
+            self._erle += 0.05 * (erle - self._erle)
+        return np.clip(out, -32768, 32767).astype(np.int16).tobytes()
+
+    def reset(self):
+        """Forgets the echo path (call after the output device or volume changes)."""
+        self._reset()
+        self._candidate = None
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "far_end_frames": self.far_end_frames,
+            "double_talk_frames": self.double_talk_frames,
+            "gated_frames": self.gated_frames,
+            "delay_ms": round(self.delay * 1000 / self.rate, 1),
+            "delay_changes": self.delay_changes,
+            "erle_db": round(self._erle, 1),
+            "resets": self.resets,
+            "dropped_chunks": self.dropped_chunks,
+        }
+
+    def _reset(self):
+        self._W[:] = 0
+        self._X[:] = 0
+        self._power[:] = 1.0
+        self._residual = 1.0
+        self._adapted = 0
+        self._frozen_run = 0
+        self._diverging = 0
+        self.resets += 1
+
+    def _adapt(self, e, X):
+        block = self.block
+        E = np.fft.rfft(np.concatenate((np.zeros(block, dtype=np.float32), e)))
+        if self._adapted:
+            self._power += 0.3 * (np.abs(X) ** 2 - self._power)
+        else:
+            self._power[:] = np.abs(X) ** 2
+        G = self.mu / self.partitions * np.conj(self._X) * E / (self._power + 1e3)
+        # Gradient constraint: keep each partition a causal block-length filter
+        g = np.fft.irfft(G, 2 * block, axis=1)
+        g[:, block:] = 0
+        self._W += np.fft.rfft(g, axis=1)
+        self._adapted += 1
+
+    def _drain(self):
+        pending = self._pending
+        for _ in range(len(pending)):
+            ts, data = pending.popleft()
+            if self._resampler:
+                data = self._resampler.process(data)
+            self._place(round(ts * self.rate), np.frombuffer(data, dtype=np.int16))
+
+    def _place(self, pos, samples):
+        samples = samples[-len(self._ref):]
+        if self._ref_end is None or pos > self._ref_end + len(self._ref):
+            self._ref_end = pos
+        elif pos > self._ref_end + self._slack:
+            # Playback stopped for a while: nothing was heard in between
+            self._write_ring(self._ref_end, np.zeros(pos - self._ref_end, dtype=np.float32))
+            self._ref_end = pos
+        # Otherwise the stream is continuous and the timestamp difference is jitter
+        self._write_ring(self._ref_end, samples)
+        self._ref_end += len(samples)
+
+    def _write_ring(self, start, samples):
+        ref = self._ref
+        i = start % len(ref)
+        first = min(len(samples), len(ref) - i)
+        ref[i:i + first] = samples[:first]
+        ref[:len(samples) - first] = samples[first:]
+
+    def _reference(self, start, n) -> np.ndarray:
+        """Reference samples [start, start + n); silence where nothing was played."""
+        out = np.zeros(n, dtype=np.float32)
+        if self._ref_end is None:
+            return out
+        lo = max(start, self._ref_end - len(self._ref))
+        hi = min(start + n, self._ref_end)
+        if hi > lo:
+            idx = np.arange(lo, hi) % len(self._ref)
+            out[lo - start:hi - start] = self._ref[idx]
+        return out
+
+    def _estimate_delay(self, end):
+        """Re-estimates the bulk delay with GCC-PHAT over the last window of capture."""
+        mic = self._mic_history
+        window = len(mic)
+        ref = self._reference(end - window - self.max_delay, window + self.max_delay)
+        n = 1 << (window + self.max_delay - 1).bit_length()
+        cross = np.conj(np.fft.rfft(mic, n)) * np.fft.rfft(ref, n)
+        corr = np.fft.irfft(cross / (np.abs(cross) + 1e-6), n)[:self.max_delay + 1]
+        peak = int(np.argmax(corr))
+        if peak == 0 or corr[peak] < 6 * np.std(corr):
+            return  # No clear echo (or the customer is talking over it), or beyond max_delay
+        # corr[k] matches mic[t] with ref[t + k - max_delay]; leave a little room for causal taps
+        delay = max(0, self.max_delay - peak - self.block // 4)
+        if abs(delay - self.delay) <= self.block // 8:
+            self._candidate = None
+        elif not self.delay_changes or (self._candidate is not None
+                                        and abs(delay - self._candidate) <= self.block // 8):
+            # The first lock is taken at once; moving an established delay needs two estimates
+            self.delay = delay
+            self._candidate = None
+            self.delay_changes += 1
+            self._reset()
+        else:
+            self._candidate = delay  # Wait for a second estimate to agree
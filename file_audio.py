@@ -0,0 +1,202 @@
+"""
+File-backed audio source and sink with the CaptureEngine/PlaybackEngine interface.
+
+They let a CallSession run from WAV files instead of PyAudio devices, in real
+time or faster, and record the timestamps a latency benchmark needs: when each
+utterance in the source ends and when the first byte of each reply arrives.
+
+Where an utterance ends is decided by the same rule mock_live_server.py
+endpoints with (frame RMS above a threshold is speech; a turn ends after
+silence_ms without it), so a measured latency includes the endpoint's own
+wait for silence instead of starting from a different guess of where speech
+stopped.
+"""
+
+import asyncio
+import time
+import wave
+
+import numpy as np
+
+from resample import StreamResampler
+
+SAMPLE_WIDTH = 2
+# mock_live_server.MockLiveServer's endpointing defaults
+SPEECH_THRESHOLD = 500
+SILENCE_MS = 500
+
+
+def read_wav(path, rate=16000, channels=1) -> bytes:
+    """Reads a 16-bit WAV and converts it to rate/channels PCM."""
+    with wave.open(str(path), "rb") as wf:
+        if wf.getsampwidth() != SAMPLE_WIDTH:
+            raise ValueError(f"{path}: only 16-bit WAV files are supported")
+        src_rate, src_channels = wf.getframerate(), wf.getnchannels()
+        pcm = wf.readframes(wf.getnframes())
+    if (src_rate, src_channels) == (rate, channels):
+        return pcm
+    return StreamResampler(src_rate, rate, src_channels, channels).process(pcm)
+
+
+def speech_end_frames(pcm, rate=16000, frame_ms=20, threshold=SPEECH_THRESHOLD, silence_ms=SILENCE_MS):
+    """Returns the last frame of each utterance: RMS above threshold, then at least silence_ms below it."""
+    frame_samples = rate * frame_ms // 1000
+    x = np.frombuffer(pcm, dtype=np.int16)
+    x = x[:len(x) // frame_samples * frame_samples].reshape(-1, frame_samples).astype(np.float32)
+    voiced = np.sqrt(np.mean(x * x, axis=1)) > threshold
+
+    ends, quiet, last_voiced = [], 0, None
+    min_quiet = -(-silence_ms // frame_ms)
+    for i, v in enumerate(voiced):
+        if v:
+            last_voiced, quiet = i, 0
+        elif last_voiced is not None:
+            quiet += 1
+            if quiet == min_quiet:
+                ends.append(last_voiced)
+                last_voiced = None
+    if last_voiced is not None:
+        ends.append(last_voiced)  # The file's tail of silence is added by WavSource
+    return ends
+
+
+def split_turns(pcm, turns, turn_ms=2000, gap_ms=3000, rate=16000, channels=1) -> bytes:
+    """A caller taking `turns` turns: consecutive turn_ms slices of pcm, each followed by gap_ms of silence.
+
+    The gap has to outlast the endpoint's silence wait, its think time and the
+    reply, or the next turn talks over the reply and interrupts it.
+    """
+    step = rate * turn_ms // 1000 * channels * SAMPLE_WIDTH
+    if not pcm or not turns:
+        return pcm
+    gap = bytes(rate * gap_ms // 1000 * channels * SAMPLE_WIDTH)
+    slices = max(1, len(pcm) // step)
+    return b"".join(bytes(pcm[i % slices * step:(i % slices + 1) * step]) + gap for i in range(turns))
+
+
+class WavSource:
+    """Replays a WAV file as capture frames, paced at `speed` times real time.
+
+    With `turns`, the file is cut into that many utterances (see split_turns)
+    instead of being replayed as recorded.
+    """
+
+    def __init__(self, path, rate=16000, channels=1, frame_ms=20, speed=1.0, tail_ms=2000, turns=0,
+                 turn_ms=2000, gap_ms=3000, speech_threshold=SPEECH_THRESHOLD, silence_ms=SILENCE_MS):
+        self.path = path
+        self.rate = rate
+        self.channels = channels
+        self.frame_ms = frame_ms
+        self.speed = speed
+        self.frame_bytes = rate * frame_ms // 1000 * channels * SAMPLE_WIDTH
+        pcm = read_wav(path, rate, channels)
+        if turns:
+            pcm = split_turns(pcm, turns, turn_ms, gap_ms, rate, channels)
+        self._pcm = memoryview(pcm)
+        self._silence = memoryview(bytes(self.frame_bytes))
+        self.total_frames = len(self._pcm) // self.frame_bytes + tail_ms // frame_ms
+        self.speech_ends = set(speech_end_frames(self._pcm, rate, frame_ms, speech_threshold, silence_ms))
+        self.finished = asyncio.Event()
+        self._started = None
+        self._due = 0.0
+        self.taps = []  # Optional recorder legs
+
+        # Timestamps (perf_counter) at which each utterance's last frame was sent
+        self.speech_end_times = []
+        self.frames_read = 0
+
+    async def start(self):
+        self._started = time.perf_counter()
+
+    async def read_frame(self) -> memoryview:
+        i = self.frames_read
+        if i >= self.total_frames:
+            self.finished.set()
+        due = self._started + (i + 1) * self.frame_ms / 1000 / self.speed
+        self._due = due
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.frames_read += 1
+        if i in self.speech_ends:
+            self.speech_end_times.append(time.perf_counter())
+        offset = i * self.frame_bytes
+        if offset + self.frame_bytes <= len(self._pcm):
+            frame = self._pcm[offset:offset + self.frame_bytes]
+        else:
+            frame = self._silence
+        for tap in self.taps:
+            tap.write(frame, due - self.frame_ms / 1000 / self.speed)
+        return frame
+
+    def frame_age_ms(self) -> float:
+        """A device would have captured the frame's last sample at its due time."""
+        return max(0.0, (time.perf_counter() - self._due) * 1000)
+
+    def stats(self) -> dict:
+        return {"frames_read": self.frames_read, "buffered_ms": 0.0, "dropped_frames": 0}
+
+    def close(self):
+        pass
+
+
+class WavSink:
+    """Collects reply audio like a playback device; optionally writes it to a WAV file."""
+
+    def __init__(self, path=None, rate=24000, channels=1):
+        self.path = path
+        self.rate = rate
+        self.channels = channels
+        self._wav = None
+        self._in_turn = False
+        self.taps = []  # Optional recorder legs, echo reference
+
+        # Timestamps (perf_counter) of the first chunk of each reply
+        self.first_byte_times = []
+        self.bytes_written = 0
+        self.flushes = 0
+
+    async def start(self):
+        if self.path:
+            self._wav = wave.open(str(self.path), "wb")
+            self._wav.setnchannels(self.channels)
+            self._wav.setsampwidth(SAMPLE_WIDTH)
+            self._wav.setframerate(self.rate)
+
+    async def write(self, data):
+        now = time.perf_counter()
+        if not self._in_turn:
+            self._in_turn = True
+            self.first_byte_times.append(now)
+        self.bytes_written += len(data)
+        for tap in self.taps:
+            tap.write(data, now)
+        if self._wav:
+            self._wav.writeframes(data)
+
+    def end_turn(self):
+        self._in_turn = False
+
+    def flush(self) -> float:
+        self._in_turn = False
+        self.flushes += 1
+        return 0.0
+
+    def device_latency_ms(self) -> float:
+        return 0.0
+
+    def buffered_ms(self) -> float:
+        return 0.0
+
+    def stats(self) -> dict:
+        return {
+            "buffered_ms": 0.0,
+            "bytes_written": self.bytes_written,
+            "replies": len(self.first_byte_times),
+            "flushes": self.flushes,
+        }
+
+    def close(self):
+        if self._wav:
+            self._wav.close()
+            self._wav = None
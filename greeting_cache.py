@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of pre-rendered opening greetings, keyed by persona.
+
+A call that opens with a greeting otherwise plays silence until the model's
+first audio arrives. With a cached greeting the call enqueues it at pickup,
+straight from a memory-mapped file, and tells the model the greeting was
+already said so it carries on from there.
+
+Greetings are raw PCM (16-bit, 24 kHz mono by default) plus a small JSON file
+with the transcript, stored under a key that hashes the model, the system
+instruction and the voice settings: changing the persona starts a new entry.
+Entries are recorded from the model's own first turn on a cache miss, or
+supplied from WAV files:
+
+    python greeting_cache.py add <key> hello.wav --text "Hey! It's Sonu here..."
+    python greeting_cache.py list
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+
+from file_audio import read_wav
+
+DEFAULT_DIR = "greetings"
+
+
+def _config_value(config, name):
+    if isinstance(config, dict):
+        return config.get(name)
+    return getattr(config, name, None)
+
+
+def persona_key(model, config) -> str:
+    """Stable hash of what makes a greeting sound the way it does."""
+    persona = {
+        "model": model,
+        "system_instruction": _config_value(config, "system_instruction"),
+        "speech_config": _config_value(config, "speech_config"),
+    }
+    blob = json.dumps(persona, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+class Greeting:
+    """A cached greeting: a read-only view of its PCM and its transcript."""
+
+    def __init__(self, pcm: memoryview, text: str, rate: int):
+        self.pcm = pcm
+        self.text = text
+        self.rate = rate
+
+    @property
+    def duration_ms(self) -> float:
+        return len(self.pcm) * 1000 / (self.rate * 2)
+
+    def chunks(self, chunk_ms=40):
+        step = self.rate * chunk_ms // 1000 * 2
+        return [self.pcm[i:i + step] for i in range(0, len(self.pcm), step)]
+
+
+class GreetingCache:
+    """Greeting PCM files in a directory, memory-mapped on first use."""
+
+    def __init__(self, directory=DEFAULT_DIR, rate=24000, max_ms=15000):
+        self.directory = Path(directory)
+        self.rate = rate
+        self.max_ms = max_ms  # Longer first turns are not greetings worth caching
+        self._maps = {}
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _paths(self, key):
+        return self.directory / f"{key}.pcm", self.directory / f"{key}.json"
+
+    def get(self, key):
+        """Returns the cached Greeting for key, or None."""
+        if key not in self._maps:
+            pcm_path, meta_path = self._paths(key)
+            if not pcm_path.exists() or not pcm_path.stat().st_size:
+                self.misses += 1
+                return None
+            meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+            with open(pcm_path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[key] = (mapped, meta)
+        mapped, meta = self._maps[key]
+        self.hits += 1
+        return Greeting(memoryview(mapped), meta.get("text", ""), meta.get("rate", self.rate))
+
+    def put(self, key, pcm, text="") -> bool:
+        """Stores a greeting atomically; returns False if it is empty or too long."""
+        if not pcm or len(pcm) * 1000 / (self.rate * 2) > self.max_ms:
+            return False
+        self.directory.mkdir(parents=True, exist_ok=True)
+        pcm_path, meta_path = self._paths(key)
+        for path, data in ((pcm_path, bytes(pcm)),
+                           (meta_path, json.dumps({"text": text, "rate": self.rate}).encode("utf-8"))):
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        self._maps.pop(key, None)  # Any old mapping keeps serving calls already using it
+        self.stores += 1
+        return True
+
+    def put_wav(self, key, path, text="") -> bool:
+        return self.put(key, read_wav(path, self.rate, 1), text)
+
+    def keys(self) -> list:
+        return sorted(p.stem for p in self.directory.glob("*.pcm"))
+
+    def stats(self) -> dict:
+        return {"entries": len(self.keys()), "hits": self.hits, "misses": self.misses, "stores": self.stores}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=DEFAULT_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="store a WAV file as the greeting for a persona key")
+    add.add_argument("key", help="persona key, as logged by the agent at startup")
+    add.add_argument("wav")
+    add.add_argument("--text", default="", help="what the greeting says (given to the model as context)")
+    commands.add_parser("list", help="list cached greetings")
+    args = parser.parse_args()
+
+    cache = GreetingCache(args.dir)
+    if args.command == "add":
+        if not cache.put_wav(args.key, args.wav, args.text):
+            raise SystemExit(f"{args.wav}: empty or longer than {cache.max_ms} ms")
+    for key in cache.keys():
+        greeting = cache.get(key)
+        print(f"{key}  {greeting.duration_ms / 1000:5.1f}s  {greeting.text!r}")
+
+
+if __name__ == "__main__":
+    main()
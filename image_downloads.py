@@ -0,0 +1,205 @@
+"""
+Concurrent, resumable, deduplicating image downloads.
+
+ImageStore.download() fetches a batch of URLs with a fixed number of workers
+over the shared keep-alive client from stock_search. Each image streams to a
+.part file in chunks, hashed on the way, so memory stays at a chunk per
+worker however large the originals are. File I/O (the chunk writes, hashing
+a partial file, the index) runs on worker threads, so a large batch does not
+stall the event loop the MCP server answers other tool calls on. When a
+transfer breaks, the next attempt (or the next call) continues from the bytes
+already on disk with a Range request.
+
+Finished files are stored under their SHA-256, so the same picture found on
+two platforms is written once: the second copy is still downloaded (its hash
+is only known at the end) but then discarded. index.json maps each URL to its
+file, so a URL downloaded before is not fetched again at all.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import httpx
+
+from stock_search import http_client
+
+DEFAULT_DIR = "downloads"
+EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp", "image/gif": ".gif"}
+
+
+def _hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest
+
+
+def _append(f, digest, chunk):
+    digest.update(chunk)
+    f.write(chunk)
+
+
+class ImageStore:
+    """A directory of content-addressed images and the URLs they came from."""
+
+    def __init__(self, directory=DEFAULT_DIR, workers=4, chunk_size=64 * 1024, attempts=3):
+        self.directory = Path(directory)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.attempts = attempts
+        self._partial = self.directory / "partial"
+        self._index_path = self.directory / "index.json"
+        self._index = None  # url -> file name, loaded on first use
+        self._digests = None  # sha256 hex -> file name of the files on disk, loaded on first use
+        self._commit_lock = asyncio.Lock()  # One finished download at a time checks and claims its hash
+        self._inflight = {}  # url -> task downloading it, so overlapping download() calls share one transfer
+
+    def _load_index(self) -> dict:
+        if self._index is None:
+            try:
+                self._index = json.loads(self._index_path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _load_digests(self) -> dict:
+        if self._digests is None:
+            digests = {}
+            if self.directory.exists():
+                for path in self.directory.iterdir():
+                    if path.is_file() and len(path.stem) == 64:
+                        digests.setdefault(path.stem, path.name)
+            self._digests = digests
+        return self._digests
+
+    def _save_index(self):
+        tmp = self._index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._index, indent=0), encoding="utf-8")
+        os.replace(tmp, self._index_path)
+
+    def path_for(self, url):
+        """Where a URL downloaded earlier is stored, or None."""
+        name = self._load_index().get(url)
+        if name and (self.directory / name).exists():
+            return self.directory / name
+        return None
+
+    async def download(self, urls) -> dict:
+        """Downloads urls with `workers` concurrent transfers.
+
+        Returns a report: one entry per URL (status downloaded, duplicate,
+        cached or error, with its path) and batch totals. disk_bytes_saved
+        counts duplicates, which were downloaded but not stored again;
+        network_bytes_saved counts cached URLs, which were not downloaded.
+        """
+        await asyncio.to_thread(self._partial.mkdir, parents=True, exist_ok=True)
+        await asyncio.to_thread(self._load_index)
+        await asyncio.to_thread(self._load_digests)
+        unique = list(dict.fromkeys(urls))
+        queue = asyncio.Queue()
+        for url in unique:
+            queue.put_nowait(url)
+        items = {}
+        started = time.perf_counter()
+
+        async def worker():
+            while not queue.empty():
+                url = queue.get_nowait()
+                try:
+                    items[url] = await self._download_shared(url)
+                except (httpx.HTTPError, httpx.InvalidURL, OSError) as e:
+                    # InvalidURL is not an HTTPError: a malformed URL must only fail its own item
+                    items[url] = {"status": "error", "error": str(e) or type(e).__name__}
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(unique)))))
+        await asyncio.to_thread(self._save_index)
+        seconds = time.perf_counter() - started
+
+        received = sum(item.get("received", 0) for item in items.values())
+        written = sum(item["bytes"] for item in items.values() if item["status"] == "downloaded")
+        disk_saved = sum(item["bytes"] for item in items.values() if item["status"] == "duplicate")
+        network_saved = sum(item["bytes"] for item in items.values() if item["status"] == "cached")
+        counts = {}
+        for item in items.values():
+            counts[item["status"]] = counts.get(item["status"], 0) + 1
+        return {
+            "items": {url: items[url] for url in unique},
+            "counts": counts,
+            "bytes_received": received,
+            "bytes_written": written,
+            "disk_bytes_saved": disk_saved,
+            "network_bytes_saved": network_saved,
+            "seconds": round(seconds, 3),
+            "throughput_mb_s": round(received / seconds / 1e6, 2) if seconds else 0.0,
+        }
+
+    async def _download_shared(self, url) -> dict:
+        """One transfer per URL at a time: a second writer would append to the same .part file."""
+        task = self._inflight.get(url)
+        if task is None:
+            task = self._inflight[url] = asyncio.ensure_future(self._download_one(url))
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def _download_one(self, url) -> dict:
+        existing = await asyncio.to_thread(self.path_for, url)
+        if existing is not None:
+            return {"status": "cached", "path": str(existing), "bytes": existing.stat().st_size}
+        part = self._partial / (hashlib.sha256(url.encode("utf-8")).hexdigest()[:24] + ".part")
+        received = 0
+        for attempt in range(self.attempts):
+            before = part.stat().st_size if part.exists() else 0
+            try:
+                digest, content_type, got = await self._stream(url, part)
+                received += got
+                break
+            except httpx.TransportError:
+                # Keep what arrived; the next attempt resumes after it
+                received += max(0, (part.stat().st_size if part.exists() else 0) - before)
+                if attempt == self.attempts - 1:
+                    raise
+        size = part.stat().st_size
+        suffix = Path(urlsplit(url).path).suffix.lower() or EXTENSIONS.get(content_type, "")
+        sha = digest.hexdigest()
+        async with self._commit_lock:
+            # Matched on the hash alone: the same picture may come as .jpg from one platform and .jpeg from another
+            name = self._digests.get(sha)
+            if name is not None and (self.directory / name).exists():
+                part.unlink()
+                status = "duplicate"
+            else:
+                name = self._digests[sha] = sha + suffix
+                os.replace(part, self.directory / name)
+                status = "downloaded"
+        target = self.directory / name
+        self._index[url] = name
+        return {"status": status, "path": str(target), "bytes": size, "received": received}
+
+    async def _stream(self, url, part):
+        """Appends the rest of url to part; returns (sha256 of the whole file, content type, bytes received)."""
+        offset = part.stat().st_size if part.exists() else 0
+        digest = await asyncio.to_thread(_hash_file, part) if offset else hashlib.sha256()
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        received = 0
+        async with http_client().stream("GET", url, headers=headers) as response:
+            if response.status_code == 416 and offset:
+                return digest, response.headers.get("content-type", ""), 0  # Already complete
+            response.raise_for_status()
+            if response.status_code != 206:
+                offset = 0  # No range support: start over
+                digest = hashlib.sha256()
+            content_type = response.headers.get("content-type", "").split(";")[0]
+            f = await asyncio.to_thread(open, part, "ab" if offset else "wb")
+            try:
+                async for chunk in response.aiter_bytes(self.chunk_size):
+                    await asyncio.to_thread(_append, f, digest, chunk)
+                    received += len(chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+        return digest, content_type, received
@@ -1,6 +1,8 @@
 import pyaudio
 import wave
 
+from audio_devices import DeviceResolver
+
 # Settings
 RECORD_SECONDS = 10
 WAVE_OUTPUT_FILENAME = "test_capture.wav"
@@ -9,19 +11,23 @@ FORMAT = pyaudio.paInt16
 CHANNELS = 2
 # Try 48000 if 44100 fails (standard for Windows Realtek)
 RATE = 48000 
-DEVICE_INDEX = 26
+# By name (any part of it) or index; `python audio_devices.py` lists the devices
+DEVICE = "Voicemeeter Out B2"
 # Voicemeeter Out B2 (VB-Audio Voicemeeter VAIO)
 # sterio device
 p = pyaudio.PyAudio()
 
-print(f"Opening Device {DEVICE_INDEX} for 10 seconds...")
-
 try:
+    # The device's closest supported format to RATE x CHANNELS, on its lowest-latency host API
+    device = DeviceResolver(p).resolve(DEVICE, "input", RATE, CHANNELS)
+    RATE, CHANNELS = device.rate, device.channels
+    print(f"Opening {device} for 10 seconds...")
+
     stream = p.open(format=FORMAT,
                     channels=CHANNELS,
                     rate=RATE,
                     input=True,
-                    input_device_index=DEVICE_INDEX,
+                    input_device_index=device.index,
                     frames_per_buffer=CHUNK)
 
     print("* Recording system audio...")
@@ -51,4 +57,4 @@ try:
 
 except Exception as e:
     print(f"Error: {e}")
-    print("TIP: If it fails, try changing DEVICE_INDEX to 10 or 2 from your list.")
\ No newline at end of file
+    print("TIP: If it fails, set DEVICE to a name from `python audio_devices.py`.")
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+Opens Live sessions on Gemini or on a local endpoint such as mock_live_server.py.
+
+Set GEMINI_LIVE_URL (e.g. ws://127.0.0.1:8765) to point the agents at a local
+server. The SDK always dials wss:// on the Google endpoint for API-key
+clients, so for a local URL we open the websocket ourselves and wrap it in the
+SDK's own AsyncSession: sending and receiving still go through the exact
+serialization the agents use in production. Only the setup fields a local
+server cares about (the model and the session resumption handle) are sent.
+"""
+
+import contextlib
+import json
+import os
+
+from google.genai import live
+from websockets.asyncio.client import connect as ws_connect
+
+LIVE_URL_ENV = "GEMINI_LIVE_URL"
+
+
+def live_url(url=None):
+    return url or os.getenv(LIVE_URL_ENV)
+
+
+def _config_value(config, name):
+    if isinstance(config, dict):
+        return config.get(name)
+    return getattr(config, name, None)
+
+
+def _setup_message(model, config) -> dict:
+    setup = {"model": f"models/{model}"}
+    resumption = _config_value(config, "session_resumption")
+    if resumption is not None:
+        handle = _config_value(resumption, "handle")
+        setup["sessionResumption"] = {"handle": handle} if handle else {}
+    return {"setup": setup}
+
+
+@contextlib.asynccontextmanager
+async def connect(client, model, config, url=None):
+    """Async context manager yielding a Live session, like client.aio.live.connect()."""
+    url = live_url(url)
+    if not url:
+        async with client.aio.live.connect(model=model, config=config) as session:
+            yield session
+        return
+
+    async with ws_connect(url, max_size=None) as ws:
+        await ws.send(json.dumps(_setup_message(model, config)))
+        response = json.loads(await ws.recv())
+        if "setupComplete" not in response:
+            raise ConnectionError(f"Unexpected setup response from {url}: {response}")
+        yield live.AsyncSession(api_client=client._api_client, websocket=ws)
@@ -0,0 +1,168 @@
+"""
+Low-overhead per-call instrumentation.
+
+The hot path only bumps counters and drops values into fixed-bucket
+histograms; nothing is logged per frame. A reporter turns the aggregates into
+one JSON line per call per interval, and an optional local HTTP endpoint
+serves the same data in the Prometheus text format.
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import time
+
+LATENCY_BUCKETS_MS = (5, 10, 20, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two additions."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float):
+        """Upper bound of the bucket holding the q-quantile (None if empty)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 1) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class SessionMetrics:
+    """Counters and histograms for one call's hot path."""
+
+    HISTOGRAMS = ("capture_to_send_ms", "response_ms", "ws_rtt_ms", "barge_in_dropped_ms",
+                  "connect_ms", "pickup_to_audio_ms", "reconnect_ms")
+    COUNTERS = ("messages_sent", "bytes_sent", "barge_ins", "turns", "reconnects")
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.started = time.time()
+        for name in self.HISTOGRAMS:
+            setattr(self, name, Histogram())
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+
+    def histograms(self) -> dict:
+        return {name: getattr(self, name) for name in self.HISTOGRAMS}
+
+    def counters(self) -> dict:
+        return {name: getattr(self, name) for name in self.COUNTERS}
+
+
+def render_prometheus(sessions) -> str:
+    """Renders the metrics of every session in the Prometheus text exposition format."""
+    lines = []
+    sessions = list(sessions)
+    if not sessions:
+        return ""
+
+    for name in SessionMetrics.HISTOGRAMS:
+        lines.append(f"# TYPE voice_{name} histogram")
+        for session in sessions:
+            label = f'session="{session.session_id}"'
+            hist = session.metrics.histograms()[name]
+            cumulative = 0
+            for bound, n in zip(hist.buckets + ("+Inf",), hist.counts):
+                cumulative += n
+                lines.append(f'voice_{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"voice_{name}_sum{{{label}}} {hist.sum}")
+            lines.append(f"voice_{name}_count{{{label}}} {hist.count}")
+
+    for name in SessionMetrics.COUNTERS:
+        lines.append(f"# TYPE voice_{name}_total counter")
+        for session in sessions:
+            lines.append(f'voice_{name}_total{{session="{session.session_id}"}} {session.metrics.counters()[name]}')
+
+    gauges = [(session, session.gauges()) for session in sessions]
+    for name in gauges[0][1]:
+        lines.append(f"# TYPE voice_{name} gauge")
+        for session, values in gauges:
+            lines.append(f'voice_{name}{{session="{session.session_id}"}} {values[name]}')
+    return "\n".join(lines) + "\n"
+
+
+class MetricsReporter:
+    """Writes one JSON line per call every interval; optionally serves /metrics over HTTP."""
+
+    def __init__(self, sessions, path=None, interval=5.0, port=None, host="127.0.0.1"):
+        self.sessions = sessions  # mapping of session_id -> CallSession, may grow at runtime
+        self.path = path
+        self.interval = interval
+        self.port = port
+        self.host = host
+        self._last = {}
+        self._server = None
+
+    async def run(self):
+        if self.port is not None:
+            self._server = await asyncio.start_server(self._serve_http, self.host, self.port)
+            logging.info("Metrics endpoint on http://%s:%d/metrics", self.host, self.port)
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                if self.path:
+                    self.write_snapshot()
+        finally:
+            if self._server:
+                self._server.close()
+
+    def snapshot(self, session) -> dict:
+        m = session.metrics
+        now = time.perf_counter()
+        last_time, last_sent = self._last.get(session.session_id, (now - self.interval, 0))
+        self._last[session.session_id] = (now, m.messages_sent)
+        return {
+            "ts": round(time.time(), 3),
+            "session_id": session.session_id,
+            "send_rate_per_s": round((m.messages_sent - last_sent) / max(now - last_time, 1e-9), 1),
+            **m.counters(),
+            **{name: hist.summary() for name, hist in m.histograms().items()},
+            **session.gauges(),
+        }
+
+    def write_snapshot(self):
+        lines = [json.dumps(self.snapshot(s)) for s in list(self.sessions.values())]
+        if lines:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+    async def _serve_http(self, reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            if request.split(b" ")[1:2] == [b"/metrics"]:
+                body = render_prometheus(self.sessions.values()).encode()
+                status = b"200 OK"
+            else:
+                body, status = b"not found\n", b"404 Not Found"
+            writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+            await writer.drain()
+        finally:
+            writer.close()
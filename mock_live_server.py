@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini Live websocket API.
+
+Speaks the subset of the BidiGenerateContent protocol the agents use: setup,
+realtime audio input (with audioStreamEnd), client content, model_turn inline
+audio, input/output transcriptions, turn completion, interruptions, session
+resumption handles and GoAway. Connections can be dropped or sent a GoAway on
+purpose to exercise the client's reconnect path. Replies
+are either an echo of the caller's last utterance or scripted clips, after a
+configurable delay, so the whole pipeline can be exercised offline.
+
+    python mock_live_server.py --port 8765 --mode echo
+    GEMINI_LIVE_URL=ws://127.0.0.1:8765 python simpleVoiceAgentLive.py
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import itertools
+import logging
+import time
+import wave
+
+import numpy as np
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+INPUT_RATE = 16000
+OUTPUT_RATE = 24000
+OUTPUT_MIME = f"audio/pcm;rate={OUTPUT_RATE}"
+
+
+def load_script(path):
+    """Loads a JSON list of replies: {"text": ..., "wav": path} or {"text": ..., "tone_ms": n}."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def tone(duration_ms, freq=440.0, rate=OUTPUT_RATE):
+    t = np.arange(int(rate * duration_ms / 1000)) / rate
+    return (6000 * np.sin(2 * np.pi * freq * t)).astype(np.int16).tobytes()
+
+
+def read_wav_mono(path, rate=OUTPUT_RATE):
+    """Reads a 16-bit WAV as mono PCM at rate (linear interpolation is plenty for a mock)."""
+    with wave.open(path, "rb") as wf:
+        channels, src_rate = wf.getnchannels(), wf.getframerate()
+        x = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    x = x.reshape(-1, channels).mean(axis=1)
+    return convert_rate(x, src_rate, rate)
+
+
+def convert_rate(x, src_rate, dst_rate):
+    if src_rate != dst_rate:
+        n = int(len(x) * dst_rate / src_rate)
+        x = np.interp(np.arange(n) * src_rate / dst_rate, np.arange(len(x)), x)
+    return x.astype(np.int16).tobytes()
+
+
+class MockLiveServer:
+    """Scriptable fake Live endpoint; one conversation per websocket connection."""
+
+    def __init__(self, host="127.0.0.1", port=8765, mode="echo", script=None,
+                 response_delay_ms=300, chunk_ms=40, realtime_factor=2.0,
+                 silence_ms=500, speech_threshold=500, barge_in_ms=200, greeting=None,
+                 setup_delay_ms=0, drop_after_s=None, go_away_after_s=None, go_away_time_left_s=2.0):
+        if mode not in ("echo", "script"):
+            raise ValueError(f"Unknown mode {mode!r}, expected 'echo' or 'script'")
+        self.host = host
+        self.port = port
+        self.mode = mode
+        self.script = script or [{"text": "Hello from the mock server.", "tone_ms": 1000}]
+        self.response_delay_ms = response_delay_ms
+        self.chunk_ms = chunk_ms
+        self.realtime_factor = realtime_factor  # 0 sends a whole reply without pacing
+        self.silence_ms = silence_ms
+        self.speech_threshold = speech_threshold
+        self.barge_in_ms = barge_in_ms
+        self.greeting = greeting
+        self.setup_delay_ms = setup_delay_ms  # Emulates handshake + setup cost of the real service
+        self.drop_after_s = drop_after_s  # Abort each connection after this long (no close frame)
+        self.go_away_after_s = go_away_after_s  # Send GoAway, then close once its time is up
+        self.go_away_time_left_s = go_away_time_left_s
+        self._server = None
+        self._handles = itertools.count(1)
+        self.resumable = {}  # handle -> number of replies already given in that conversation
+
+        # Counters
+        self.connections = 0
+        self.audio_ms_in = 0.0
+        self.responses = 0
+        self.interruptions = 0
+        self.resumptions = 0
+        self.drops = 0
+        self.go_aways = 0
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await serve(self._handle, self.host, self.port, max_size=None)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+        logging.info("Mock Live server listening on %s (%s mode)", self.url, self.mode)
+        return self
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "audio_ms_in": round(self.audio_ms_in, 1),
+            "responses": self.responses,
+            "interruptions": self.interruptions,
+            "resumptions": self.resumptions,
+            "drops": self.drops,
+            "go_aways": self.go_aways,
+        }
+
+    def new_handle(self, replies) -> str:
+        """Issues a resumption handle that restores a conversation after `replies` replies."""
+        handle = f"mock-{next(self._handles)}"
+        self.resumable[handle] = replies
+        return handle
+
+    def next_reply(self, index):
+        item = self.script[index % len(self.script)]
+        if "wav" in item:
+            audio = read_wav_mono(item["wav"])
+        else:
+            audio = tone(item.get("tone_ms", 1000))
+        return item.get("text", ""), audio
+
+    async def _handle(self, ws):
+        self.connections += 1
+        conversation = MockConversation(self, ws)
+        try:
+            await conversation.run()
+        except ConnectionClosed:
+            pass
+        finally:
+            conversation.cancel_reply()
+
+
+class MockConversation:
+    """Server-side state of one connection: speech detection and the reply in flight."""
+
+    def __init__(self, server: MockLiveServer, ws):
+        self.server = server
+        self.ws = ws
+        self.speech = bytearray()
+        self.in_speech = False
+        self.silence_ms = 0.0
+        self.voiced_during_reply_ms = 0.0
+        self.replies = 0
+        self.reply_task = None
+        self.resumption = False  # The client asked for resumption handles
+
+    async def send(self, message: dict):
+        await self.ws.send(json.dumps(message))
+
+    async def run(self):
+        setup = json.loads(await self.ws.recv())
+        if "setup" not in setup:
+            await self.ws.close(1007, "expected setup message")
+            return
+        resumption = setup["setup"].get("sessionResumption")
+        if resumption is not None:
+            handle = resumption.get("handle")
+            if handle:
+                if handle not in self.server.resumable:
+                    await self.ws.close(1008, "unknown session resumption handle")
+                    return
+                self.replies = self.server.resumable[handle]
+                self.server.resumptions += 1
+            self.resumption = True
+        await asyncio.sleep(self.server.setup_delay_ms / 1000)
+        await self.send({"setupComplete": {}})
+        if self.resumption:
+            await self.send_resumption_update()
+        if self.server.greeting and not self.replies:
+            self.start_reply(self.server.greeting, tone(1000))
+
+        lifetime = asyncio.create_task(self.lifetime())
+        try:
+            await self.receive()
+        finally:
+            lifetime.cancel()
+
+    async def lifetime(self):
+        """Ends the connection on purpose, like the real service recycling it."""
+        server = self.server
+        if server.go_away_after_s is not None:
+            await asyncio.sleep(server.go_away_after_s)
+            server.go_aways += 1
+            await self.send({"goAway": {"timeLeft": f"{server.go_away_time_left_s}s"}})
+            await asyncio.sleep(server.go_away_time_left_s)
+            await self.ws.close(1000, "session lifetime reached")
+        elif server.drop_after_s is not None:
+            await asyncio.sleep(server.drop_after_s)
+            server.drops += 1
+            self.ws.transport.abort()
+
+    async def send_resumption_update(self):
+        handle = self.server.new_handle(self.replies)
+        await self.send({"sessionResumptionUpdate": {"newHandle": handle, "resumable": True}})
+
+    async def receive(self):
+        async for raw in self.ws:
+            message = json.loads(raw)
+            realtime = message.get("realtime_input") or message.get("realtimeInput")
+            content = message.get("client_content") or message.get("clientContent")
+            if realtime:
+                await self.on_realtime_input(realtime)
+            elif content:
+                self.on_client_content(content)
+
+    async def on_realtime_input(self, realtime: dict):
+        audio = realtime.get("audio") or next(iter(realtime.get("mediaChunks") or []), None)
+        if audio:
+            pcm = base64.urlsafe_b64decode(audio["data"])  # The SDK sends URL-safe base64
+            self.on_audio(pcm)
+        if realtime.get("audioStreamEnd") or realtime.get("audio_stream_end"):
+            self.end_of_speech()
+
+    def on_audio(self, pcm: bytes):
+        x = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        if not len(x):
+            return
+        duration_ms = len(x) * 1000 / INPUT_RATE
+        self.server.audio_ms_in += duration_ms
+        voiced = float(np.sqrt(np.mean(x * x))) > self.server.speech_threshold
+
+        if self.reply_task and not self.reply_task.done():
+            self.voiced_during_reply_ms = self.voiced_during_reply_ms + duration_ms if voiced else 0.0
+            if self.voiced_during_reply_ms >= self.server.barge_in_ms:
+                self.interrupt()
+
+        if voiced:
+            self.in_speech = True
+            self.silence_ms = 0.0
+        if self.in_speech:
+            self.speech += pcm
+            if not voiced:
+                self.silence_ms += duration_ms
+                if self.silence_ms >= self.server.silence_ms:
+                    self.end_of_speech()
+
+    def end_of_speech(self):
+        if not self.speech:
+            return
+        speech, self.speech = bytes(self.speech), bytearray()
+        self.in_speech = False
+        self.silence_ms = 0.0
+        heard_ms = len(speech) * 1000 / (INPUT_RATE * 2)
+        if self.server.mode == "echo":
+            text, audio = "(echo)", convert_rate(np.frombuffer(speech, dtype=np.int16), INPUT_RATE, OUTPUT_RATE)
+        else:
+            text, audio = self.server.next_reply(self.replies)
+        self.start_reply(text, audio, heard=f"({heard_ms:.0f} ms of speech)")
+
+    def on_client_content(self, content: dict):
+        texts = [part.get("text", "") for turn in content.get("turns", []) for part in turn.get("parts", [])]
+        if content.get("turnComplete", content.get("turn_complete")):
+            text, audio = self.server.next_reply(self.replies)
+            self.start_reply(text or " ".join(texts), audio)
+
+    def start_reply(self, text, audio, heard=None):
+        self.cancel_reply()
+        self.replies += 1
+        self.voiced_during_reply_ms = 0.0
+        self.reply_task = asyncio.create_task(self.reply(text, audio, heard))
+
+    def cancel_reply(self):
+        if self.reply_task and not self.reply_task.done():
+            self.reply_task.cancel()
+
+    def interrupt(self):
+        self.cancel_reply()
+        self.server.interruptions += 1
+        asyncio.create_task(self.send_interrupted())
+
+    async def send_interrupted(self):
+        await self.send({"serverContent": {"interrupted": True}})
+        await self.send({"serverContent": {"turnComplete": True}})
+
+    async def reply(self, text, audio, heard):
+        server = self.server
+        await asyncio.sleep(server.response_delay_ms / 1000)
+        if heard:
+            await self.send({"serverContent": {"inputTranscription": {"text": heard}}})
+
+        chunk_bytes = int(OUTPUT_RATE * server.chunk_ms / 1000) * 2
+        started = time.perf_counter()
+        for i, offset in enumerate(range(0, len(audio), chunk_bytes)):
+            chunk = audio[offset:offset + chunk_bytes]
+            await self.send({"serverContent": {"modelTurn": {"parts": [
+                {"inlineData": {"mimeType": OUTPUT_MIME, "data": base64.b64encode(chunk).decode("ascii")}}
+            ]}}})
+            if server.realtime_factor:
+                due = started + (i + 1) * server.chunk_ms / 1000 / server.realtime_factor
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+
+        if text:
+            await self.send({"serverContent": {"outputTranscription": {"text": text}}})
+        await self.send({"serverContent": {"turnComplete": True}})
+        server.responses += 1
+        if self.resumption:
+            await self.send_resumption_update()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mode", choices=("echo", "script"), default="echo")
+    parser.add_argument("--script", help="JSON list of replies for script mode")
+    parser.add_argument("--response-delay-ms", type=int, default=300)
+    parser.add_argument("--chunk-ms", type=int, default=40)
+    parser.add_argument("--realtime-factor", type=float, default=2.0, help="reply pacing; 0 disables pacing")
+    parser.add_argument("--greeting", help="transcript of an opener sent right after setup")
+    parser.add_argument("--setup-delay-ms", type=int, default=0, help="extra delay before setupComplete")
+    parser.add_argument("--drop-after", type=float, help="abort every connection after this many seconds")
+    parser.add_argument("--go-away-after", type=float, help="send GoAway after this many seconds")
+    args = parser.parse_args()
+
+    server = MockLiveServer(
+        host=args.host,
+        port=args.port,
+        mode=args.mode,
+        script=load_script(args.script) if args.script else None,
+        response_delay_ms=args.response_delay_ms,
+        chunk_ms=args.chunk_ms,
+        realtime_factor=args.realtime_factor,
+        greeting=args.greeting,
+        setup_delay_ms=args.setup_delay_ms,
+        drop_after_s=args.drop_after,
+        go_away_after_s=args.go_away_after,
+    )
+    async with server:
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("Mock server stopped.")
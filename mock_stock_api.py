@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Pexels, Unsplash and Pixabay search APIs.
+
+One HTTP/1.1 server (keep-alive, so connection reuse shows up in its
+counters) answers all three providers' search endpoints with results in each
+provider's own JSON shape, after a configurable per-provider delay. The
+image URLs in those results are served too (/images/<provider>/<id>.jpg, with
+Range requests), and their bytes depend only on the id, so the same id under
+two providers is a cross-platform duplicate. Optional per-provider quotas
+are enforced like the real APIs do: fixed windows, X-Ratelimit-* headers,
+and 429 with Retry-After once a window is used up. Point stock_search.py at
+it with the *_API_URL variables:
+
+    python mock_stock_api.py --port 8780 --delay-ms pexels=120 unsplash=250 pixabay=180
+    python mock_stock_api.py --rate-limit pexels=20/1 pixabay=100/60
+    PEXELS_API_URL=http://127.0.0.1:8780/pexels ... python server.py
+"""
+
+import argparse
+import asyncio
+import json
+import hashlib
+import logging
+import math
+import time
+import zlib
+from urllib.parse import parse_qs, urlsplit
+
+PROVIDERS = ("pexels", "unsplash", "pixabay")
+SEARCH_PATHS = {"pexels": "/pexels/search", "unsplash": "/unsplash/search/photos", "pixabay": "/pixabay/"}
+MAX_PER_PAGE = {"pexels": 80, "unsplash": 30, "pixabay": 200}
+
+REASONS = {200: "OK", 206: "Partial Content", 400: "Bad Request", 404: "Not Found",
+           416: "Range Not Satisfiable", 429: "Too Many Requests"}
+
+
+def image_bytes(pid, size) -> bytes:
+    """Deterministic, incompressible stand-in for the image with this id."""
+    seed = hashlib.sha256(str(pid).encode("ascii")).digest()
+    block = b"".join(hashlib.sha256(seed + bytes([i])).digest() for i in range(128))  # 4 KiB
+    return (b"\xff\xd8" + block * (size // len(block) + 1))[:size]
+
+
+def photo(provider, query, i, base_url) -> dict:
+    """One result in the provider's format; ids and sizes are stable per (query, i).
+
+    Every fourth result is the same picture on all three providers (same
+    photographer and size, different ids and URLs), as happens when one
+    photographer uploads to several sites. URLs carry query strings as long as
+    the real CDNs' do.
+    """
+    pid = zlib.crc32(f"{provider}:{query}:{i}".encode("utf-8")) % 10_000_000
+    shared = i % 4 == 0
+    width, height = 4000 + 8 * (i % 50), 3000 + 6 * (i % 50)
+    if not shared:
+        width += PROVIDERS.index(provider)
+    by = f"Ana Lima {i}" if shared else f"{provider.title()} Photographer {i}"
+    sig = hashlib.sha1(f"{pid}".encode("ascii")).hexdigest()
+    image = f"{base_url}/images/{provider}/{pid}.jpg?ixid=M3w{sig}fHx8fDE3MDAwMDAwMDB8MA&ixlib=rb-4.0.3&fm=jpg&q=85"
+    preview = image + "&auto=compress&cs=tinysrgb&fit=max&w=1080"
+    alt = f"{query} photo {i} in natural light with a soft background, shot on location"
+    if provider == "pexels":
+        return {"id": pid, "width": width, "height": height, "photographer": by,
+                "alt": alt, "src": {"original": image, "medium": preview}}
+    if provider == "unsplash":
+        return {"id": f"u{pid}", "width": width, "height": height, "alt_description": alt,
+                "user": {"name": by}, "urls": {"full": image, "regular": preview}}
+    return {"id": pid, "imageWidth": width, "imageHeight": height, "user": by,
+            "tags": f"{query}, photo, natural light", "largeImageURL": image, "webformatURL": preview}
+
+
+class MockStockAPI:
+    """Fake search endpoints for all three providers on one port."""
+
+    def __init__(self, host="127.0.0.1", port=8780, delay_ms=None, total=500, image_size=1 << 20,
+                 cut_first_download=False, rate_limits=None):
+        self.host = host
+        self.port = port
+        self.delay_ms = {name: 0 for name in PROVIDERS}
+        self.delay_ms.update(delay_ms or {})
+        self.total = total  # Results available per query
+        self.image_size = image_size  # Bytes per full-size image; previews (?w=) are 1/8 of that
+        self.cut_first_download = cut_first_download  # Drop the connection halfway through each image once
+        self._cut = set()
+        # provider -> (requests, window seconds), enforced in fixed windows with each API's headers
+        self.rate_limits = dict(rate_limits or {})
+        self._windows = {}  # provider -> (window start, requests in it)
+        self._server = None
+
+        # Counters
+        self.connections = 0
+        self.requests = {name: 0 for name in PROVIDERS}
+        self.throttled = {name: 0 for name in PROVIDERS}
+        self.image_requests = 0
+        self.image_bytes_sent = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def api_urls(self) -> dict:
+        """Base URLs to put in stock_search.API_URLS."""
+        return {"pexels": f"{self.url}/pexels", "unsplash": f"{self.url}/unsplash", "pixabay": f"{self.url}/pixabay"}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+        logging.info("Mock stock API on %s", self.url)
+        return self
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def stats(self) -> dict:
+        return {"connections": self.connections, "requests": dict(self.requests), "throttled": dict(self.throttled),
+                "image_requests": self.image_requests, "image_bytes_sent": self.image_bytes_sent}
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                status, extra, body = await self.respond(method, target, headers)
+                extra.setdefault("Content-Length", len(body))
+                head = [f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}"]
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+                if len(body) < int(extra["Content-Length"]):
+                    break  # A body shorter than announced: cut the connection mid-transfer
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            pass  # Client went away, or the server is shutting down mid-delay
+        finally:
+            writer.close()
+
+    async def respond(self, method, target, headers):
+        """Returns (status, headers, body) for one request."""
+        parts = urlsplit(target)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        for provider, path in SEARCH_PATHS.items():
+            if parts.path.rstrip("/") == path.rstrip("/"):
+                return await self.search(provider, query)
+        if parts.path.startswith("/images/"):
+            return await self.image(parts.path, query, headers)
+        return 404, {"Content-Type": "application/json"}, b'{"error": "not found"}'
+
+    def _rate_limit(self, provider):
+        """Counts a request against the provider's window; returns (allowed, headers)."""
+        if provider not in self.rate_limits:
+            return True, {}
+        limit, window = self.rate_limits[provider]
+        now = time.monotonic()
+        started, count = self._windows.get(provider, (now, 0))
+        if now - started >= window:
+            started, count = now, 0
+        allowed = count < limit
+        count += allowed
+        self._windows[provider] = (started, count)
+        reset_in = started + window - now
+        headers = {"X-Ratelimit-Limit": limit, "X-Ratelimit-Remaining": limit - count}
+        if provider == "pexels":
+            headers["X-Ratelimit-Reset"] = math.ceil(time.time() + reset_in)  # UNIX time
+        elif provider == "pixabay":
+            headers["X-Ratelimit-Reset"] = math.ceil(reset_in)  # Seconds left in the window
+        if not allowed:
+            headers["Retry-After"] = math.ceil(reset_in)
+        return allowed, headers
+
+    async def search(self, provider, params):
+        self.requests[provider] += 1
+        allowed, extra = self._rate_limit(provider)
+        extra["Content-Type"] = "application/json"
+        if not allowed:
+            self.throttled[provider] += 1
+            return 429, extra, b'{"error": "rate limit exceeded"}'
+        await asyncio.sleep(self.delay_ms[provider] / 1000)
+        text = params.get("query") or params.get("q") or ""
+        per_page = int(params.get("per_page", 10))
+        if provider == "pixabay" and not 3 <= per_page <= 200:
+            return 400, extra, b'[ERROR 400] "per_page" is out of valid range.'
+        per_page = min(per_page, MAX_PER_PAGE[provider])  # The others cap it silently
+        page = int(params.get("page", 1))
+        start = (page - 1) * per_page
+        photos = [photo(provider, text, i, self.url) for i in range(start, min(start + per_page, self.total))]
+        if provider == "pexels":
+            data = {"photos": photos, "page": page, "per_page": per_page, "total_results": self.total}
+        elif provider == "unsplash":
+            data = {"results": photos, "total": self.total, "total_pages": math.ceil(self.total / per_page)}
+        else:
+            data = {"hits": photos, "total": self.total, "totalHits": self.total}
+        return 200, extra, json.dumps(data).encode("utf-8")
+
+    async def image(self, path, params, headers):
+        """An image, honouring "Range: bytes=N-" and "bytes=N-M"."""
+        _, _, provider, name = path.split("/", 3)
+        stem = name.rsplit(".", 1)[0]
+        if provider not in PROVIDERS or not stem.isdigit():
+            return 404, {"Content-Type": "application/json"}, b'{"error": "not found"}'
+        self.image_requests += 1
+        await asyncio.sleep(self.delay_ms[provider] / 1000)
+        data = image_bytes(int(stem), self.image_size // 8 if "w" in params else self.image_size)
+        extra = {"Content-Type": "image/jpeg", "Accept-Ranges": "bytes"}
+        status, start, end = 200, 0, len(data)
+        spec = headers.get("range", "")
+        if spec.startswith("bytes="):
+            first, _, last = spec[6:].partition("-")
+            start = int(first or 0)
+            end = min(len(data), int(last) + 1) if last else len(data)
+            if start >= len(data):
+                return 416, {"Content-Range": f"bytes */{len(data)}"}, b""
+            status = 206
+            extra["Content-Range"] = f"bytes {start}-{end - 1}/{len(data)}"
+        body = data[start:end]
+        if self.cut_first_download and path not in self._cut:
+            self._cut.add(path)
+            extra["Content-Length"] = len(body)
+            body = body[:len(body) // 2]
+        self.image_bytes_sent += len(body)
+        return status, extra, body
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--delay-ms", nargs="*", default=[], metavar="PROVIDER=MS")
+    parser.add_argument("--image-kb", type=int, default=1024, help="size of each full-size image")
+    parser.add_argument("--rate-limit", nargs="*", default=[], metavar="PROVIDER=N/S",
+                        help="allow N searches per S seconds, then answer 429")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    delays = {name: int(ms) for name, _, ms in (item.partition("=") for item in args.delay_ms)}
+    limits = {}
+    for item in args.rate_limit:
+        name, _, spec = item.partition("=")
+        count, _, seconds = spec.partition("/")
+        limits[name] = (int(count), float(seconds or 60))
+    async with MockStockAPI(args.host, args.port, delays, image_size=args.image_kb * 1024, rate_limits=limits):
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,173 @@
+"""
+Callback-driven playback engine.
+
+PortAudio pulls fixed-size frames from a preallocated PCM ring buffer, so the
+event loop only copies model audio into the ring instead of hopping to a
+thread for every chunk. Playback starts once the ring holds the target jitter
+depth and underruns are filled with silence.
+"""
+
+import asyncio
+import time
+
+import pyaudio
+
+from audio_buffers import PCMRingBuffer
+from resample import StreamResampler
+
+SAMPLE_WIDTH = 2  # paInt16
+
+
+class PlaybackEngine:
+    """Plays 16-bit PCM written from asyncio through a PyAudio callback stream.
+
+    Audio is written at rate/channels; if the device runs at a different
+    device_rate/device_channels it is converted before it enters the ring.
+    """
+
+    def __init__(self, pya, rate=24000, channels=1, device_index=None,
+                 frame_ms=20, jitter_ms=60, capacity_ms=2000,
+                 device_rate=None, device_channels=None):
+        self.pya = pya
+        self.rate = rate
+        self.channels = channels
+        self.device_index = device_index
+        self.device_rate = device_rate or rate
+        self.device_channels = device_channels or channels
+        self.frame_ms = frame_ms
+        self.jitter_ms = jitter_ms
+
+        self._resampler = None
+        if (self.device_rate, self.device_channels) != (rate, channels):
+            self._resampler = StreamResampler(rate, self.device_rate, channels, self.device_channels)
+
+        # The ring holds audio in the device format
+        self._bytes_per_ms = self.device_rate * self.device_channels * SAMPLE_WIDTH / 1000
+        self._frame_bytes = int(self.device_rate * frame_ms / 1000) * self.device_channels * SAMPLE_WIDTH
+        self._target_bytes = int(jitter_ms * self._bytes_per_ms)
+        self._ring = PCMRingBuffer(max(int(capacity_ms * self._bytes_per_ms), self._target_bytes + self._frame_bytes))
+        self._out = bytearray(self._frame_bytes)
+        self._silence = bytes(self._frame_bytes)
+        self._primed = False
+        self._draining = False
+        self._generation = 0
+        self._stream = None
+        self._output_latency = 0.0
+        self.taps = []  # Recorder legs, echo reference: get exactly what the device plays, silence included
+
+        # Counters
+        self.underruns = 0
+        self.device_underflows = 0
+        self.flushes = 0
+
+    @property
+    def overruns(self) -> int:
+        return self._ring.overruns
+
+    def buffered_ms(self) -> float:
+        return len(self._ring) / self._bytes_per_ms
+
+    async def start(self):
+        """Opens the output stream in callback mode."""
+        self._stream = await asyncio.to_thread(
+            self.pya.open,
+            format=pyaudio.paInt16,
+            channels=self.device_channels,
+            rate=self.device_rate,
+            output=True,
+            output_device_index=self.device_index,
+            frames_per_buffer=self._frame_bytes // (self.device_channels * SAMPLE_WIDTH),
+            stream_callback=self._callback,
+        )
+        self._output_latency = self._stream.get_output_latency()
+
+    async def write(self, data):
+        """Queues PCM for playback, waiting a frame at a time while the ring is full."""
+        generation = self._generation
+        if self._resampler:
+            data = self._resampler.process(data)
+        view = memoryview(data).cast("B")
+        while True:
+            n = self._ring.write(view)
+            view = view[n:]
+            if not view:
+                return
+            await asyncio.sleep(self.frame_ms / 1000)
+            if generation != self._generation:
+                return  # Flushed while waiting; the rest of this chunk is stale
+
+    def flush(self) -> float:
+        """Drops all buffered audio and returns how many ms of it were discarded.
+
+        The callback picks this up on its next period, so at most one frame plus
+        the device latency is still heard after a flush.
+        """
+        self._generation += 1
+        if self._resampler:
+            self._resampler.reset()
+        self._draining = False
+        self._primed = False
+        self.flushes += 1
+        return self._ring.clear() / self._bytes_per_ms
+
+    def device_latency_ms(self) -> float:
+        if not self._stream:
+            return 0.0
+        return self._stream.get_output_latency() * 1000
+
+    def end_turn(self):
+        """Plays out whatever is buffered even if it is below the jitter depth."""
+        self._draining = True
+
+    def stats(self) -> dict:
+        return {
+            "buffered_ms": round(self.buffered_ms(), 1),
+            "underruns": self.underruns,
+            "overruns": self._ring.overruns,
+            "dropped_bytes": self._ring.dropped_bytes,
+            "high_water_ms": round(self._ring.high_water / self._bytes_per_ms, 1),
+            "device_underflows": self.device_underflows,
+            "flushes": self.flushes,
+        }
+
+    def close(self):
+        if self._stream:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        need = frame_count * self.device_channels * SAMPLE_WIDTH
+        if len(self._out) < need:
+            self._out = bytearray(need)
+            self._silence = bytes(need)
+        out = memoryview(self._out)[:need]
+        if status & pyaudio.paOutputUnderflow:
+            self.device_underflows += 1
+
+        if not self._primed:
+            buffered = len(self._ring)
+            if buffered >= self._target_bytes or (self._draining and buffered):
+                self._primed = True
+            else:
+                if self.taps:
+                    self._tap(self._silence[:need])
+                return (self._silence[:need], pyaudio.paContinue)
+
+        n = self._ring.read_into(out)
+        if n < need:
+            out[n:] = memoryview(self._silence)[:need - n]
+            if self._draining:
+                self._draining = False
+            else:
+                self.underruns += 1
+            self._primed = False
+        data = bytes(out)
+        if self.taps:
+            self._tap(data)
+        return (data, pyaudio.paContinue)
+
+    def _tap(self, data):
+        heard_at = time.perf_counter() + self._output_latency
+        for tap in self.taps:
+            tap.write(data, heard_at)
@@ -0,0 +1,127 @@
+"""
+Token-bucket request scheduling that follows the provider's own counters.
+
+Each stock image provider gets a TokenBucket sized from its documented quota.
+A request takes a token if one is free and otherwise sleeps until one
+refills, so a burst of tool calls queues up instead of collecting HTTP 429s.
+Every response's rate-limit headers (X-Ratelimit-Limit / -Remaining /
+-Reset) correct the bucket, so the local view follows the provider's count
+even when other processes share the key, and a 429 pauses the bucket for
+Retry-After.
+"""
+
+import asyncio
+import time
+
+
+def _header(headers, name):
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """`limit` requests per `window` seconds, with bursts of up to `limit`."""
+
+    def __init__(self, limit, window):
+        self.window = window
+        self.limit = limit
+        self.rate = limit / window
+        self._tokens = float(limit)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = 0  # Requests sleeping until their turn
+
+        # Counters
+        self.requests = 0
+        self.waits = 0
+        self.waited_s = 0.0
+        self.rejected = 0
+        self.throttled = 0
+
+    def _refill(self, now):
+        self._tokens = min(self.limit, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a request made now could be sent, counting the ones already waiting."""
+        now = time.monotonic()
+        self._refill(now)
+        return max(self._paused_until - now, (1 + self._waiting - self._tokens) / self.rate, 0.0)
+
+    async def acquire(self, max_wait=None) -> bool:
+        """Waits for this request's turn; False if that is more than max_wait away."""
+        if max_wait is not None and self.delay() > max_wait:
+            self.rejected += 1
+            return False
+        self.requests += 1
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(self._paused_until - now, (1 - self._tokens) / self.rate, 0.0)
+        if wait > 0:
+            # Waiters re-check after every sleep, so a pause from a later response holds them too
+            started = now
+            self.waits += 1
+            self._waiting += 1
+            try:
+                while wait > 0:
+                    await asyncio.sleep(wait)
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = max(self._paused_until - now, (1 - self._tokens) / self.rate, 0.0)
+            finally:
+                self._waiting -= 1
+            self.waited_s += now - started
+        self._tokens -= 1
+        return True
+
+    def update(self, headers):
+        """Adopts the provider's view from a response's rate-limit headers."""
+        now = time.monotonic()
+        self._refill(now)
+        limit = _header(headers, "x-ratelimit-limit")
+        if limit and limit != self.limit:
+            self.limit = limit
+            self.rate = limit / self.window
+        remaining = _header(headers, "x-ratelimit-remaining")
+        if remaining is not None:
+            # Only ever lower: requests still in flight are not in this count yet
+            self._tokens = min(self._tokens, remaining)
+            if remaining <= 0:
+                reset = _header(headers, "x-ratelimit-reset")
+                self.pause(self._reset_in(reset) if reset is not None else 1 / self.rate)
+
+    def throttle(self, headers):
+        """A 429: stop sending until Retry-After (or the reset time) has passed."""
+        self.throttled += 1
+        retry_after = _header(headers, "retry-after")
+        reset = _header(headers, "x-ratelimit-reset")
+        if retry_after is not None:
+            self.pause(retry_after)
+        elif reset is not None:
+            self.pause(self._reset_in(reset))
+        else:
+            self.pause(1 / self.rate)
+        self._tokens = min(self._tokens, 0.0)
+
+    def pause(self, seconds):
+        self._paused_until = max(self._paused_until, time.monotonic() + max(0.0, seconds))
+
+    @staticmethod
+    def _reset_in(reset) -> float:
+        # Pexels sends a UNIX time, Pixabay the seconds left in the window
+        return reset - time.time() if reset > 1e9 else reset
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "window_s": self.window,
+            "tokens": round(self._tokens, 2),
+            "requests": self.requests,
+            "waits": self.waits,
+            "waited_s": round(self.waited_s, 3),
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+        }
@@ -0,0 +1,170 @@
+"""
+Streaming stereo call recorder: customer on the left channel, agent on the right.
+
+The audio paths only hand their chunks over: a tap appends (leg, timestamp,
+bytes) to a bounded deque, which is safe from PortAudio callback threads and
+never blocks or allocates beyond the tuple. A background thread drains it,
+converts each leg to the recording format, places chunks on a shared
+timeline by their timestamps (continuous streams stay continuous, gaps become
+silence) and every flush_interval appends whatever is hold_ms older than the
+newest chunk to the WAV, rewriting the header so the file is always valid.
+Memory stays bounded by the queue and the hold window however long the call.
+"""
+
+import collections
+import logging
+import struct
+import threading
+import time
+
+import numpy as np
+
+from resample import StreamResampler
+
+CUSTOMER = 0
+AGENT = 1
+
+
+class RecorderLeg:
+    """Tap for one side of the call; write() is the only method used on the audio path."""
+
+    def __init__(self, recorder, channel, rate, channels):
+        self.recorder = recorder
+        self.channel = channel
+        self.resampler = StreamResampler(rate, recorder.rate, channels, 1)
+        self._slack = int(recorder.rate * recorder.gap_ms / 1000)
+        self.end = 0  # Sample index just past the last placed sample
+        self.buffer = np.zeros(recorder.rate, dtype=np.int16)  # Samples from recorder.committed onwards
+        self.length = 0  # Valid samples in buffer
+
+    def write(self, data, ts=None):
+        """Queues a chunk that started playing/being captured at ts (perf_counter, default now)."""
+        recorder = self.recorder
+        if len(recorder._pending) >= recorder.max_pending:
+            recorder.dropped_chunks += 1
+            return
+        recorder._pending.append((self, recorder.clock() if ts is None else ts, data))
+
+    def _place(self, ts, data):
+        samples = np.frombuffer(self.resampler.process(data), dtype=np.int16)
+        recorder = self.recorder
+        pos = round((ts - recorder.started) * recorder.rate)
+        if pos <= self.end + self._slack:
+            pos = self.end  # Timing jitter on a continuous stream
+        if pos < recorder.committed:
+            samples = samples[recorder.committed - pos:]
+            pos = recorder.committed
+        offset = pos - recorder.committed
+        needed = offset + len(samples)
+        if needed > len(self.buffer):
+            grown = np.zeros(max(needed, 2 * len(self.buffer)), dtype=np.int16)
+            grown[:self.length] = self.buffer[:self.length]
+            self.buffer = grown
+        if offset > self.length:
+            self.buffer[self.length:offset] = 0
+        self.buffer[offset:needed] = samples
+        self.length = max(self.length, needed)
+        self.end = pos + len(samples)
+
+    def _take(self, out, n):
+        """Moves the first n samples (silence past the data) into out and shifts the rest down."""
+        k = min(n, self.length)
+        out[:k] = self.buffer[:k]
+        rest = self.length - k
+        self.buffer[:rest] = self.buffer[k:self.length]
+        self.length = rest
+
+
+class CallRecorder:
+    """Writes a time-aligned stereo WAV of a call from a background thread."""
+
+    def __init__(self, path, rate=16000, flush_interval=1.0, hold_ms=500, gap_ms=60,
+                 max_pending=2000, clock=time.perf_counter):
+        self.path = path
+        self.rate = rate
+        self.flush_interval = flush_interval
+        self.hold_ms = hold_ms  # Late chunks within this window still land in place
+        self.gap_ms = gap_ms  # Larger holes in a leg are recorded as silence
+        self.max_pending = max_pending
+        self.clock = clock
+        self.legs = []
+        self._pending = collections.deque()
+        self._stop = threading.Event()
+        self._thread = None
+        self._file = None
+        self.started = None
+        self._latest = None
+        self.committed = 0  # Samples written to the file
+
+        # Counters
+        self.dropped_chunks = 0
+        self.high_water = 0
+
+    def leg(self, channel, rate, channels=1) -> RecorderLeg:
+        leg = RecorderLeg(self, channel, rate, channels)
+        self.legs.append(leg)
+        return leg
+
+    def start(self):
+        self._file = open(self.path, "wb")
+        self._file.write(self._header(0))
+        self.started = self._latest = self.clock()
+        self._thread = threading.Thread(target=self._run, name=f"recorder:{self.path}", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stops the writer, writes everything still buffered and finalizes the file."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._drain()
+        self._commit(max((leg.end for leg in self.legs), default=self.committed))
+        self._file.close()
+        logging.info("Recording saved to %s (%.1f s)", self.path, self.committed / self.rate)
+
+    def stats(self) -> dict:
+        return {
+            "seconds": round(self.committed / self.rate, 1),
+            "pending": len(self._pending),
+            "high_water": self.high_water,
+            "dropped_chunks": self.dropped_chunks,
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._drain()
+            # Commit by the newest chunk's timestamp, not the wall clock, so a writer
+            # that falls behind never cuts off chunks that are still queued
+            self._commit(round((self._latest - self.started - self.hold_ms / 1000) * self.rate))
+
+    def _drain(self):
+        pending = self._pending
+        count = len(pending)  # Only what is queued now, so commits keep up with a busy producer
+        self.high_water = max(self.high_water, count)
+        for _ in range(count):
+            leg, ts, data = pending.popleft()
+            leg._place(ts, data)
+            self._latest = max(self._latest, ts)
+
+    def _commit(self, upto):
+        n = upto - self.committed
+        if n <= 0:
+            return
+        frames = np.zeros((n, 2), dtype=np.int16)
+        for leg in self.legs:
+            leg._take(frames[:, leg.channel], n)
+            leg.end = max(leg.end, upto)
+        self._file.write(frames.tobytes())
+        self.committed = upto
+        # Keep the header current so the file is playable even if the process dies
+        self._file.seek(0)
+        self._file.write(self._header(self.committed * 4))
+        self._file.seek(0, 2)
+        self._file.flush()
+
+    def _header(self, data_bytes) -> bytes:
+        return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + data_bytes, b"WAVE", b"fmt ", 16, 1, 2,
+                           self.rate, self.rate * 4, 4, 16, b"data", data_bytes)
@@ -0,0 +1,83 @@
+"""
+Streaming polyphase resampler and channel mixer for 16-bit PCM.
+
+Lets the agents open capture and playback devices in their native format
+(e.g. 48 kHz stereo virtual cables) and convert to/from the Live API's 16 kHz
+and 24 kHz mono in NumPy, instead of relying on PortAudio or OS resampling.
+Filter history is carried across chunks, so any chunking gives the same output.
+"""
+
+from math import gcd
+
+import numpy as np
+
+
+def design_polyphase(up: int, down: int, taps_per_phase: int = 48, rolloff: float = 0.92,
+                     beta: float = 8.0) -> np.ndarray:
+    """Kaiser-windowed sinc low-pass split into `up` phases of `taps_per_phase` taps each."""
+    n_taps = up * taps_per_phase
+    cutoff = rolloff * 0.5 / max(up, down)  # cycles per sample at the upsampled rate
+    t = np.arange(n_taps) - (n_taps - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(n_taps, beta)
+    h *= up / h.sum()
+    # bank[p, k] = h[p + k * up], reversed so a dot with ascending input samples applies it
+    return np.ascontiguousarray(h.reshape(taps_per_phase, up).T[:, ::-1], dtype=np.float32)
+
+
+class StreamResampler:
+    """Converts interleaved int16 PCM between rates and channel counts, chunk by chunk."""
+
+    def __init__(self, in_rate: int, out_rate: int, in_channels: int = 1, out_channels: int = 1,
+                 taps_per_phase: int = 48):
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.in_channels = in_channels
+        self.out_channels = out_channels
+        g = gcd(in_rate, out_rate)
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.passthrough_rate = self.up == self.down
+        self._bank = design_polyphase(self.up, self.down, taps_per_phase) if not self.passthrough_rate else None
+        self._taps = taps_per_phase
+        self.reset()
+
+    def reset(self):
+        """Forgets the filter history, e.g. after a playback flush."""
+        self._history = np.zeros(self._taps - 1, dtype=np.float32)
+        self._consumed = 0  # input samples seen so far
+        self._produced = 0  # output samples emitted so far
+
+    def process(self, data) -> bytes:
+        """Converts one chunk of interleaved int16 PCM and returns the converted bytes."""
+        x = np.frombuffer(data, dtype=np.int16)
+        if self.in_channels > 1:
+            x = x.reshape(-1, self.in_channels).mean(axis=1, dtype=np.float32)
+        else:
+            x = x.astype(np.float32)
+
+        y = x if self.passthrough_rate else self._resample(x)
+
+        y = np.clip(np.rint(y), -32768, 32767).astype(np.int16)
+        if self.out_channels > 1:
+            y = np.repeat(y, self.out_channels)
+        return y.tobytes()
+
+    def _resample(self, x: np.ndarray) -> np.ndarray:
+        up, down, taps = self.up, self.down, self._taps
+        xs = np.concatenate((self._history, x))
+        total = self._consumed + len(x)
+
+        # Output n reads input sample floor(n * down / up) with phase (n * down) % up
+        last = (total * up - 1) // down  # last output whose newest input sample has arrived
+        n = np.arange(self._produced, last + 1, dtype=np.int64)
+        pos = n * down
+        newest = pos // up - self._consumed + (taps - 1)  # index into xs
+        phase = pos % up
+
+        windows = np.lib.stride_tricks.sliding_window_view(xs, taps)
+        y = np.einsum("nt,nt->n", windows[newest - (taps - 1)], self._bank[phase])
+
+        self._history = xs[len(xs) - (taps - 1):].copy()
+        self._consumed = total
+        self._produced = last + 1
+        return y
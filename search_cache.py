@@ -0,0 +1,246 @@
+"""
+Two-tier cache of stock image search results.
+
+Entries are keyed by (platform, normalized query, per_page), so "Red  Car"
+and "red car" share one entry. The memory tier is an LRU of recent entries:
+a hit is a dict lookup and needs no I/O. Behind it, every entry is also a
+small JSON file in a directory, so the cache survives restarts and a memory
+miss can still be answered without the network. Reading, writing and
+deleting those files, and pruning the directory, happens on worker threads
+rather than the event loop; the number of files is counted once and then
+kept in memory (and recounted at every prune).
+
+An entry is fresh for `ttl` seconds. After that, until `stale_ttl`, it is
+stale: it is still returned at once, and the caller refreshes it in the
+background (stale-while-revalidate, see stock_search.search_platforms). Older
+entries count as misses and are deleted.
+"""
+
+import asyncio
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_DIR = "search_cache"
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+class SearchCache:
+    """LRU memory tier with TTL in front of a directory of JSON entries."""
+
+    def __init__(self, directory=DEFAULT_DIR, ttl=3600.0, stale_ttl=86400.0, max_entries=1000,
+                 max_disk_entries=20000, encode=None, decode=None):
+        self.directory = Path(directory) if directory else None
+        # Per-result conversion to and from JSON values for the disk tier
+        self.encode = encode
+        self.decode = decode
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._entries = collections.OrderedDict()  # key -> (stored_at, images), least recent first
+        self._puts_since_prune = 0
+        self._pruning = None  # Task running prune() on a worker thread
+        self._disk_entries = None  # Files in the directory; counted on first use
+        self._lock = threading.Lock()  # Disk counters are updated from worker threads
+
+        # Counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expired = 0
+        self.disk_evictions = 0
+        self.disk_errors = 0
+
+    @staticmethod
+    def key(platform, query, per_page) -> tuple:
+        return platform, normalize_query(query), int(per_page)
+
+    async def get(self, key):
+        """Returns (images, fresh) for key, or None on a miss; the disk tier is read on a worker thread."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+        else:
+            entry = await asyncio.to_thread(self._load, key) if self.directory is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.disk_hits += 1
+        stored_at, images = entry
+        age = now - stored_at
+        if age > self.stale_ttl:
+            self._entries.pop(key, None)
+            if self.directory is not None:
+                await asyncio.to_thread(self._unlink, key)
+            self.expired += 1
+            self.misses += 1
+            return None
+        fresh = age <= self.ttl
+        if not fresh:
+            self.stale_hits += 1
+        return images, fresh
+
+    async def put(self, key, images):
+        """Stores images under key: in memory at once, then on disk from a worker thread."""
+        entry = (time.time(), images)
+        self._remember(key, entry)
+        self.stores += 1
+        if self.directory is None:
+            return
+        if not await asyncio.to_thread(self._write, key, entry):
+            return
+        self._puts_since_prune += 1
+        if self._puts_since_prune >= 256 and self._pruning is None:
+            self._puts_since_prune = 0
+            self._pruning = asyncio.ensure_future(asyncio.to_thread(self.prune))
+            self._pruning.add_done_callback(self._pruned)
+
+    def _pruned(self, task):
+        self._pruning = None
+        if not task.cancelled() and task.exception() is not None:
+            self.disk_errors += 1
+
+    def prune(self):
+        """Deletes expired disk entries, then the oldest ones beyond max_disk_entries; blocking."""
+        if self.directory is None or not self.directory.exists():
+            return
+        cutoff = time.time() - self.stale_ttl
+        files = []
+        evicted = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                mtime = path.stat().st_mtime
+                if mtime < cutoff:
+                    path.unlink()
+                    evicted += 1
+                else:
+                    files.append((mtime, path))
+            except OSError:
+                continue
+        files.sort()
+        excess = files[:max(0, len(files) - self.max_disk_entries)]
+        remaining = len(files)
+        for _, path in excess:
+            try:
+                path.unlink()
+                evicted += 1
+                remaining -= 1
+            except OSError:
+                pass
+        with self._lock:
+            self.disk_evictions += evicted
+            self._disk_entries = remaining
+
+    def clear(self):
+        self._entries.clear()
+        if self.directory is not None and self.directory.exists():
+            for path in self.directory.glob("*.json"):
+                path.unlink(missing_ok=True)
+            with self._lock:
+                self._disk_entries = 0
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._entries),
+            "disk_entries": self.disk_entries(),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else None,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "disk_evictions": self.disk_evictions,
+            "disk_errors": self.disk_errors,
+        }
+
+    def _path(self, key) -> Path:
+        digest = hashlib.sha256(json.dumps(list(key)).encode("utf-8")).hexdigest()[:24]
+        return self.directory / f"{digest}.json"
+
+    def _write(self, key, entry) -> bool:
+        """Writes one entry's file; blocking, so put() runs it on a worker thread."""
+        path = self._path(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            stored_at, images = entry
+            data = {"key": list(key), "stored_at": stored_at,
+                    "images": [self.encode(image) for image in images] if self.encode else images}
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            added = not path.exists()
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError):
+            with self._lock:
+                self.disk_errors += 1  # The memory tier still has it
+            return False
+        if added:
+            self._count_disk(1)
+        return True
+
+    def disk_entries(self) -> int:
+        """Files in the directory: listed the first time, then kept up to date in memory."""
+        if self.directory is None:
+            return 0
+        if self._disk_entries is None:
+            count = len(list(self.directory.glob("*.json"))) if self.directory.exists() else 0
+            with self._lock:
+                if self._disk_entries is None:
+                    self._disk_entries = count
+        return self._disk_entries
+
+    def _count_disk(self, delta):
+        with self._lock:
+            if self._disk_entries is not None:
+                self._disk_entries += delta
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _unlink(self, key):
+        try:
+            self._path(key).unlink()
+            self._count_disk(-1)
+        except FileNotFoundError:
+            pass
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        try:
+            data = json.loads(self._path(key).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            with self._lock:
+                self.disk_errors += 1
+            return None
+        if tuple(data.get("key", ())) != key:
+            return None  # Hash collision
+        images = data["images"]
+        if self.decode:
+            try:
+                images = [self.decode(image) for image in images]
+            except (TypeError, ValueError, KeyError):
+                return None  # Written in an older format; fetch it again
+        return data["stored_at"], images
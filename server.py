@@ -5,14 +5,17 @@ Supports multiple stock image platforms: Pexels, Unsplash, Pixabay
 """
 
 import os
-import requests
 import json
 import sys
 from typing import List, Dict, Optional, Any
 from pathlib import Path
-from urllib.parse import quote
 from dotenv import load_dotenv
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+
+from image_downloads import ImageStore
+from search_cache import SearchCache
+from stock_search import (StockImage, StockImageError, deep_search, format_compact, format_markdown, merge_results,
+                          search_platforms)
 
 # Load environment variables
 load_dotenv()
@@ -23,151 +26,151 @@ sys.stderr.flush()
 # Initialize the FastMCP server
 mcp = FastMCP("stock-images-mcp")
 
-# API Keys from environment variables
-PEXELS_API_KEY = os.getenv("PEXELS_API_KEY")
-UNSPLASH_API_KEY = os.getenv("UNSPLASH_API_KEY")
-PIXABAY_API_KEY = os.getenv("PIXABAY_API_KEY")
-
-# Create downloads directory
+# Downloads directory (ImageStore creates it on the first download, not at startup)
 DOWNLOADS_DIR = Path("downloads")
-DOWNLOADS_DIR.mkdir(exist_ok=True)
 
-class StockImageError(Exception):
-    """Custom exception for stock image API errors"""
-    pass
+# Search results are cached in memory and on disk; repeated queries skip the provider APIs
+SEARCH_CACHE = SearchCache(
+    os.getenv("SEARCH_CACHE_DIR", "search_cache"),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", "3600")),
+    stale_ttl=float(os.getenv("SEARCH_CACHE_STALE_TTL", "86400")),
+    encode=StockImage.to_list,
+    decode=StockImage.from_list,
+)
 
-def validate_api_key(platform: str, api_key: str) -> None:
-    """Validate that API key exists for the platform"""
-    if not api_key:
-        raise StockImageError(f"API key for {platform} not found. Please set {platform.upper()}_API_KEY in your .env file")
+IMAGE_STORE = ImageStore(DOWNLOADS_DIR, workers=int(os.getenv("DOWNLOAD_WORKERS", "4")))
 
-def search_pexels(query: str, per_page: int = 10) -> List[Dict[str, Any]]:
-    """Search images on Pexels"""
-    validate_api_key("Pexels", PEXELS_API_KEY)
-    
-    headers = {"Authorization": PEXELS_API_KEY}
-    url = f"https://api.pexels.com/v1/search?query={quote(query)}&per_page={per_page}"
-    
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        
-        images = []
-        for photo in data.get("photos", []):
-            images.append({
-                "id": photo["id"],
-                "url": photo["src"]["original"],
-                "preview_url": photo["src"]["medium"],
-                "photographer": photo["photographer"],
-                "alt": photo.get("alt", ""),
-                "width": photo["width"],
-                "height": photo["height"],
-                "platform": "pexels"
-            })
-        return images
-    except requests.RequestException as e:
-        raise StockImageError(f"Pexels API error: {str(e)}")
-
-def search_unsplash(query: str, per_page: int = 10) -> List[Dict[str, Any]]:
-    """Search images on Unsplash"""
-    validate_api_key("Unsplash", UNSPLASH_API_KEY)
-    
-    headers = {"Authorization": f"Client-ID {UNSPLASH_API_KEY}"}
-    url = f"https://api.unsplash.com/search/photos?query={quote(query)}&per_page={per_page}"
-    
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        
-        images = []
-        for photo in data.get("results", []):
-            images.append({
-                "id": photo["id"],
-                "url": photo["urls"]["full"],
-                "preview_url": photo["urls"]["regular"],
-                "photographer": photo["user"]["name"],
-                "alt": photo.get("alt_description", ""),
-                "width": photo["width"],
-                "height": photo["height"],
-                "platform": "unsplash"
-            })
-        return images
-    except requests.RequestException as e:
-        raise StockImageError(f"Unsplash API error: {str(e)}")
-
-def search_pixabay(query: str, per_page: int = 10) -> List[Dict[str, Any]]:
-    """Search images on Pixabay"""
-    validate_api_key("Pixabay", PIXABAY_API_KEY)
-    
-    url = f"https://pixabay.com/api/?key={PIXABAY_API_KEY}&q={quote(query)}&per_page={per_page}&image_type=photo"
-    
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        
-        images = []
-        for hit in data.get("hits", []):
-            images.append({
-                "id": hit["id"],
-                "url": hit["largeImageURL"],
-                "preview_url": hit["webformatURL"],
-                "photographer": hit["user"],
-                "alt": hit.get("tags", ""),
-                "width": hit["imageWidth"],
-                "height": hit["imageHeight"],
-                "platform": "pixabay"
-            })
-        return images
-    except requests.RequestException as e:
-        raise StockImageError(f"Pixabay API error: {str(e)}")
+# "platform:id" of images in recent search results -> full-size URL, for download_images
+RECENT_IMAGES = {}
+MAX_RECENT_IMAGES = 5000
+
+MAX_DEEP_PAGES = 10
+
+def remember_images(images: List[StockImage]) -> None:
+    """Keeps each image's ID resolvable for download_images"""
+    for img in images:
+        RECENT_IMAGES.pop(img.key, None)
+        RECENT_IMAGES[img.key] = img.url
+    while len(RECENT_IMAGES) > MAX_RECENT_IMAGES:
+        del RECENT_IMAGES[next(iter(RECENT_IMAGES))]
+
+def render_results(query: str, results: Dict[str, List[StockImage]], errors: Dict[str, str],
+                   output: str = "markdown", max_chars: int = 0) -> str:
+    """Merges the platforms' results (duplicates removed, best first) and formats them"""
+    images = merge_results(results, query)
+    remember_images(images)
+    if output == "compact":
+        return format_compact(query, images, errors, max_chars)
+    return format_markdown(query, images, errors, max_chars)
 
 @mcp.tool()
-async def search_stock_images(query: str, platform: str = "all", per_page: int = 10) -> str:
+async def search_stock_images(query: str, platform: str = "all", per_page: int = 10,
+                              output: str = "markdown", max_chars: int = 0) -> str:
     """
     Search for stock images across multiple platforms (Pexels, Unsplash, Pixabay)
     
     Args:
         query: Search query for images
         platform: Platform to search on (all, pexels, unsplash, pixabay). Default: all
-        per_page: Number of images to return per platform (1-50). Default: 10
+        per_page: Number of images to return per platform (1-80; Unsplash stops at 30). Default: 10
+        output: "markdown" (with preview and full URLs) or "compact" (JSON rows of ID, size, photographer and alt text; several times smaller). Default: markdown
+        max_chars: Cut the response to about this many characters, dropping the lowest-ranked results (0 = no limit). Default: 0
     """
     print(f"MCP Tool (Stock Images): search_stock_images called with query: {query}, platform: {platform}", file=sys.stderr)
     
     try:
-        results = {}
+        # Platforms are searched concurrently; a slow or failing one only loses its own results
+        results, errors = await search_platforms(query, platform, per_page, SEARCH_CACHE)
         
-        if platform in ["all", "pexels"] and PEXELS_API_KEY:
-            results["pexels"] = search_pexels(query, per_page)
-        
-        if platform in ["all", "unsplash"] and UNSPLASH_API_KEY:
-            results["unsplash"] = search_unsplash(query, per_page)
-        
-        if platform in ["all", "pixabay"] and PIXABAY_API_KEY:
-            results["pixabay"] = search_pixabay(query, per_page)
-        
-        if not results:
+        if not results and not errors:
             return "No API keys configured. Please set up your API keys in the .env file."
         
-        # Format results for display
-        formatted_results = []
-        for platform_name, images in results.items():
-            formatted_results.append(f"\n## {platform_name.title()} Results ({len(images)} images):")
-            for i, img in enumerate(images, 1):
-                formatted_results.append(
-                    f"{i}. **{img['photographer']}** - {img['width']}x{img['height']}\n"
-                    f"   Preview: {img['preview_url']}\n"
-                    f"   Full: {img['url']}\n"
-                    f"   Alt: {img['alt']}\n"
-                )
-        
-        return f"# Stock Image Search Results for '{query}'\n" + "\n".join(formatted_results)
+        return render_results(query, results, errors, output, max_chars)
         
     except StockImageError as e:
         return f"Error: {str(e)}"
 
+@mcp.tool()
+async def deep_search_stock_images(query: str, ctx: Context, platform: str = "all", pages: int = 3, per_page: int = 30,
+                                   output: str = "compact", max_chars: int = 0) -> str:
+    """
+    Search several pages of stock images per platform at once, for when one page is not enough
+    
+    Args:
+        query: Search query for images
+        platform: Platform to search on (all, pexels, unsplash, pixabay). Default: all
+        pages: Pages to fetch per platform (1-10). Default: 3
+        per_page: Images per page; clamped to what each platform allows. Default: 30
+        output: "compact" (JSON rows) or "markdown", as for search_stock_images. Default: compact
+        max_chars: Cut the response to about this many characters (0 = no limit). Default: 0
+    """
+    print(f"MCP Tool (Stock Images): deep_search_stock_images called with query: {query}, pages: {pages}", file=sys.stderr)
+    
+    pages = min(max(pages, 1), MAX_DEEP_PAGES)
+    pages_by_platform, errors = {}, {}
+    received = 0
+    # Pages arrive in whatever order the providers answer; progress is reported for each one
+    async for platform_name, page, images in deep_search(query, platform, pages, per_page):
+        received += 1
+        if isinstance(images, StockImageError):
+            errors[f"{platform_name} page {page}"] = str(images)
+            await ctx.warning(f"{platform_name.title()} page {page}: {images}")
+        else:
+            pages_by_platform.setdefault(platform_name, {})[page] = images
+            await ctx.info(f"{platform_name.title()} page {page}: {len(images)} images")
+        await ctx.report_progress(received)
+    
+    if not pages_by_platform and not errors:
+        return "No API keys configured. Please set up your API keys in the .env file."
+    results = {name: [img for page in sorted(by_page) for img in by_page[page]]
+               for name, by_page in pages_by_platform.items()}
+    return render_results(query, results, errors, output, max_chars)
+
+@mcp.tool()
+async def download_images(images: List[str]) -> str:
+    """
+    Download full-size images into the downloads folder
+    
+    Args:
+        images: Image URLs, or IDs from search results (e.g. "pexels:12345")
+    """
+    print(f"MCP Tool (Stock Images): download_images called with {len(images)} images", file=sys.stderr)
+    
+    urls, unknown = [], []
+    for image in images:
+        url = image if image.startswith(("http://", "https://")) else RECENT_IMAGES.get(image)
+        if url:
+            urls.append(url)
+        else:
+            unknown.append(image)
+    
+    # Streams to disk with a bounded number of concurrent transfers; identical images are stored once
+    report = await IMAGE_STORE.download(urls)
+    
+    lines = []
+    for url, item in report["items"].items():
+        if item["status"] == "error":
+            lines.append(f"- {url}: failed ({item['error']})")
+        else:
+            lines.append(f"- {url}: {item['status']} -> {item['path']}")
+    for image in unknown:
+        lines.append(f"- {image}: unknown ID (search for it first, or pass its URL)")
+    counts = ", ".join(f"{n} {status}" for status, n in report["counts"].items())
+    summary = (
+        f"# Downloaded {len(report['items'])} images ({counts})\n"
+        f"Received {report['bytes_received'] / 1e6:.1f} MB in {report['seconds']:.1f} s "
+        f"({report['throughput_mb_s']:.1f} MB/s); {report['network_bytes_saved'] / 1e6:.1f} MB already downloaded, "
+        f"{report['disk_bytes_saved'] / 1e6:.1f} MB of duplicates not stored again\n"
+    )
+    return summary + "\n".join(lines)
+
+@mcp.tool()
+async def search_cache_stats() -> str:
+    """
+    Report stock image search cache statistics: entries in memory and on disk, hits, misses and evictions
+    """
+    return json.dumps(SEARCH_CACHE.stats(), indent=2)
+
 def main():
     """Main function to run the MCP server"""
     mcp.run(transport='stdio')
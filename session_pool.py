@@ -0,0 +1,165 @@
+"""
+Pool of pre-connected Live sessions, so a call does not pay for the connect at pickup.
+
+Opening a Live session costs a TLS/websocket handshake plus the setup round
+trip with the full system instruction, which otherwise lands in the first
+seconds of every call. The pool keeps `size` sessions connected and idle,
+pings them every health_interval and replaces them before max_age_s, when the
+server would end them anyway. A session serves exactly one call: it carries
+that call's conversation, so the slot reconnects a fresh one once it is
+returned. When no idle session is ready, the call connects cold instead of
+waiting.
+"""
+
+import asyncio
+import collections
+import contextlib
+import logging
+import time
+
+import live_client
+
+
+class _Lease:
+    """One idle pooled session and the events that hand it to a call and back."""
+
+    def __init__(self, session):
+        self.session = session
+        self.connected_at = time.monotonic()
+        self.taken = asyncio.Event()
+        self.released = asyncio.Event()
+        self.retired = False
+
+
+class LiveSessionPool:
+    """Keeps `size` configured Live sessions connected and ready for new calls."""
+
+    def __init__(self, client, model, config, size=2, url=None, max_age_s=540.0,
+                 health_interval=15.0, retry_delay=2.0):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.client = client
+        self.model = model
+        self.config = config
+        self.size = size
+        self.url = url
+        self.max_age_s = max_age_s  # Stay under the server's connection lifetime
+        self.health_interval = health_interval
+        self.retry_delay = retry_delay
+        self._ready = collections.deque()
+        self._slots = []
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.connects = 0
+        self.recycled = 0
+        self.failures = 0
+        self.connect_ms = None  # Duration of the last pooled connect
+
+    async def start(self):
+        self._slots = [asyncio.create_task(self._slot(i)) for i in range(self.size)]
+        return self
+
+    async def close(self):
+        for task in self._slots:
+            task.cancel()
+        await asyncio.gather(*self._slots, return_exceptions=True)
+        self._slots = []
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def idle(self) -> int:
+        return sum(not lease.retired for lease in self._ready)
+
+    async def wait_ready(self, count=None, timeout=30.0):
+        """Waits until `count` (default: all) sessions are connected and idle."""
+        count = self.size if count is None else count
+        async with asyncio.timeout(timeout):
+            while self.idle() < count:
+                await asyncio.sleep(0.01)
+
+    @contextlib.asynccontextmanager
+    async def session(self):
+        """Yields a hot session if one is idle, otherwise connects a new one."""
+        lease = self._take()
+        if lease is None:
+            self.misses += 1
+            async with live_client.connect(self.client, self.model, self.config, url=self.url) as session:
+                yield session
+            return
+
+        self.hits += 1
+        try:
+            yield lease.session
+        finally:
+            lease.released.set()
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": self.idle(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "connects": self.connects,
+            "recycled": self.recycled,
+            "failures": self.failures,
+            "connect_ms": self.connect_ms,
+        }
+
+    def _take(self):
+        while self._ready:
+            lease = self._ready.popleft()
+            if not lease.retired:
+                lease.taken.set()
+                return lease
+        return None
+
+    async def _slot(self, index):
+        """Keeps one pooled session connected: connect, idle, hand out or recycle, repeat."""
+        while True:
+            try:
+                started = time.perf_counter()
+                async with live_client.connect(self.client, self.model, self.config, url=self.url) as session:
+                    self.connects += 1
+                    self.connect_ms = round((time.perf_counter() - started) * 1000, 1)
+                    lease = _Lease(session)
+                    self._ready.append(lease)
+                    if await self._hold(lease):
+                        await lease.released.wait()
+                    else:
+                        self.recycled += 1
+            except Exception as e:
+                self.failures += 1
+                logging.warning("Session pool slot %d: %s; retrying in %.0fs", index, e, self.retry_delay)
+                await asyncio.sleep(self.retry_delay)
+
+    async def _hold(self, lease: _Lease) -> bool:
+        """Health-checks an idle session; returns True once a call takes it, False to recycle it."""
+        ws = getattr(lease.session, "_ws", None)
+        try:
+            while True:
+                with contextlib.suppress(TimeoutError):
+                    async with asyncio.timeout(self.health_interval):
+                        await lease.taken.wait()
+                if lease.taken.is_set():
+                    return True
+                if time.monotonic() - lease.connected_at >= self.max_age_s:
+                    return False
+                if ws is not None:
+                    async with asyncio.timeout(self.health_interval):
+                        await (await ws.ping())
+                if lease.taken.is_set():
+                    return True
+        except Exception as e:
+            if lease.taken.is_set():
+                return True  # The call owns it now and will see the failure itself
+            logging.info("Session pool: idle session failed its health check (%s)", e)
+            return False
+        finally:
+            if not lease.taken.is_set():
+                lease.retired = True
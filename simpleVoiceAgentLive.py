@@ -1,30 +1,106 @@
 import asyncio
 import logging
-from google import genai
-import pyaudio
 import os
-from dotenv import load_dotenv
-from google.genai import types
+
+from audio_backend import AudioBackend, since_launch
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# PortAudio enumerates every device when it starts: run that on a thread from the
+# first line, so it overlaps with loading the Gemini SDK below and with session setup
+audio = AudioBackend().start()
+
+from dotenv import load_dotenv
+from google import genai
+from google.genai import types
+
+from audio_buffers import DROP_OLDEST
+from audio_devices import DeviceResolver, device_setting
+from call_session import AudioSettings, CallSession, CallSupervisor
+from live_client import LIVE_URL_ENV
+from greeting_cache import GreetingCache
+from session_pool import LiveSessionPool
+
 # Load environment variables
 load_dotenv()
 
-# Initialize API client
+# API key (a local GEMINI_LIVE_URL, e.g. mock_live_server.py, needs no real key)
 api_key = os.getenv("GEMINI_API_KEY")
+if not api_key and os.getenv(LIVE_URL_ENV):
+    api_key = "mock"
+
+
+def create_client():
+    """Created in run(), not at import, so nothing but the key check stands before the event loop."""
+    return genai.Client(api_key=api_key, http_options={"api_version": "v1alpha"})
 
-client = genai.Client(api_key=api_key,http_options={"api_version": "v1alpha"})
 
 # --- pyaudio config ---
-FORMAT = pyaudio.paInt16
 CHANNELS = 1
 SEND_SAMPLE_RATE = 16000
 RECEIVE_SAMPLE_RATE = 24000
-CHUNK_SIZE = 1024
-
-pya = pyaudio.PyAudio()
+CAPTURE_FRAME_MS = 20  # 10-20 ms keeps upstream latency low
+# Capture frames per websocket message, and the most the first of them may wait for
+# the rest (None: always SEND_FRAMES). See bench_frames.py for the latency/overhead trade-off
+SEND_FRAMES = 1
+SEND_MAX_DELAY_MS = None
+
+# Playback engine: callback period and how much audio to buffer before starting
+PLAYBACK_FRAME_MS = 20
+PLAYBACK_JITTER_MS = 60
+
+# Backpressure: bound both legs so a stalled websocket or a long model turn
+# cannot build up seconds of stale audio (drop-oldest, drop-newest or block)
+CAPTURE_BUFFER_MS = 200
+CAPTURE_POLICY = DROP_OLDEST
+OUTPUT_QUEUE_MAXSIZE = 512  # model audio chunks
+OUTPUT_QUEUE_POLICY = DROP_OLDEST
+
+# Client-side VAD: only stream speech upstream, with sparse keep-alives in silence
+CLIENT_VAD = False
+
+# Cancel the agent's voice coming back from the speakers into the mic (not needed with headphones)
+ECHO_SUPPRESSION = False
+
+# Native device formats (see listen.py: the virtual cables run at 48 kHz stereo).
+# Audio is resampled/mixed in NumPy; None opens each device at the format closest to
+# the Live API's that it supports (see audio_devices.py).
+INPUT_DEVICE_RATE = None
+INPUT_DEVICE_CHANNELS = None
+OUTPUT_DEVICE_RATE = None
+OUTPUT_DEVICE_CHANNELS = None
+
+# Devices by name (any part of it, case-insensitive) or index; None uses the system defaults.
+# `python audio_devices.py` lists them; probed formats are cached in DEVICE_CACHE.
+# The INPUT_DEVICE, OUTPUT_DEVICE and DEVICE_HOST_API environment variables override these.
+INPUT_DEVICE = device_setting("INPUT_DEVICE")
+OUTPUT_DEVICE = device_setting("OUTPUT_DEVICE")
+DEVICE_HOST_API = os.getenv("DEVICE_HOST_API") or None  # e.g. "WASAPI" or "MME" to only use that host API
+DEVICE_CACHE = "audio_devices.json"
+
+# Instrumentation: per-call JSON lines and an optional local Prometheus /metrics port
+METRICS_PATH = None  # e.g. "call_metrics.jsonl"
+METRICS_PORT = None  # e.g. 9464
+
+# Operator control plane (websocket): guidance by session id and live transcripts,
+# see control_plane.py. None falls back to typing guidance into this console.
+CONTROL_PORT = None
+
+# Stereo call recordings (customer left, agent right), written in the background; None disables
+RECORDINGS_DIR = None
+
+# Turn-by-turn transcripts of every call, searchable with transcript_store.py; None disables
+TRANSCRIPTS_DB = None
+
+# Pre-warmed Live sessions: connect and set up ahead of pickup (0 connects at pickup)
+POOL_SIZE = 0
+# Hidden first turn sent at pickup so the model opens the call (None waits for the caller)
+PICKUP_PROMPT = None
+
+# Cached opening greetings (recorded from the model's first turn, or added with
+# greeting_cache.py) play the moment the call connects; None disables the cache
+GREETING_CACHE_DIR = None
 
 # --- Live API config ---
 MODEL = "gemini-2.5-flash-native-audio-preview-12-2025"
@@ -37,6 +113,9 @@ CONFIG = {
             "end_of_speech_sensitivity": types.EndSensitivity.END_SENSITIVITY_LOW,
         }
     },
+    # Long calls outlive a single connection: resume on reconnect and keep the context bounded
+    "session_resumption": {},
+    "context_window_compression": {"sliding_window": {}},
     "output_audio_transcription": {},  # This enables the text transcript
     "input_audio_transcription": {},
     "proactivity": {"proactive_audio": True},
@@ -46,114 +125,75 @@ CONFIG = {
     "system_instruction": " you are ai agent talking to customer "
 }
 
-audio_queue_output = asyncio.Queue()
-audio_queue_mic = asyncio.Queue(maxsize=5)
-audio_stream = None
-
-async def listen_audio():
-    """Listens for audio and puts it into the mic audio queue."""
-    global audio_stream
-    mic_info = pya.get_default_input_device_info()
-    audio_stream = await asyncio.to_thread(
-        pya.open,
-        format=FORMAT,
-        channels=CHANNELS,
-        rate=SEND_SAMPLE_RATE,
-        input=True,
-        input_device_index=mic_info["index"],
-        frames_per_buffer=CHUNK_SIZE,
-    )
-    kwargs = {"exception_on_overflow": False} if __debug__ else {}
-    while True:
-        data = await asyncio.to_thread(audio_stream.read, CHUNK_SIZE, **kwargs)
-        await audio_queue_mic.put({"data": data, "mime_type": "audio/pcm"})
-
-async def send_realtime(session):
-    """Sends audio from the mic audio queue to the GenAI session."""
-    while True:
-        msg = await audio_queue_mic.get()
-        await session.send_realtime_input(audio=msg)
-
-async def send_text_guidance(session):
-    """Reads text input from the console to guide the AI mid-conversation."""
-    while True:
-        # Run input() in a thread so it doesn't block your audio streams
-        text = await asyncio.to_thread(input)
-        if text.strip():
-            # Format as a system instruction
-            guidance = f"[SYSTEM INSTRUCTION - CONVERSATION GUIDANCE: {text}]"
-            
-            # Using the new non-deprecated method
-            await session.send_client_content(
-    turns=[{"role": "user", "parts": [{"text": guidance}]}],
-    turn_complete=True  # "Keep listening to the mic, don't interrupt yourself to reply to this text."
+SETTINGS = AudioSettings(
+    send_sample_rate=SEND_SAMPLE_RATE,
+    receive_sample_rate=RECEIVE_SAMPLE_RATE,
+    channels=CHANNELS,
+    capture_frame_ms=CAPTURE_FRAME_MS,
+    send_frames=SEND_FRAMES,
+    send_max_delay_ms=SEND_MAX_DELAY_MS,
+    capture_buffer_ms=CAPTURE_BUFFER_MS,
+    capture_policy=CAPTURE_POLICY,
+    playback_frame_ms=PLAYBACK_FRAME_MS,
+    playback_jitter_ms=PLAYBACK_JITTER_MS,
+    output_queue_maxsize=OUTPUT_QUEUE_MAXSIZE,
+    output_queue_policy=OUTPUT_QUEUE_POLICY,
+    client_vad=CLIENT_VAD,
+    echo_suppression=ECHO_SUPPRESSION,
+    input_device_rate=INPUT_DEVICE_RATE,
+    input_device_channels=INPUT_DEVICE_CHANNELS,
+    output_device_rate=OUTPUT_DEVICE_RATE,
+    output_device_channels=OUTPUT_DEVICE_CHANNELS,
 )
 
-async def receive_audio(session):
-    """Receives responses from GenAI and handles audio/transcriptions."""
-    while True:
-        # Note: session.receive() returns an async iterator
-        async for response in session.receive():
-            if not response.server_content:
-                continue
-            
-            # 1. Handle Input Transcription 
-            if response.server_content.input_transcription:
-                print('Input Transcript:', response.server_content.input_transcription.text)
-
-            # 2. Handle Output Transcription 
-            if response.server_content.output_transcription:
-                print("Transcript:", response.server_content.output_transcription.text)
-
-            # 3. Handle Audio Data
-            if response.server_content.model_turn:
-                parts = response.server_content.model_turn.parts
-                for part in parts:
-                    if part.inline_data:
-                        audio_queue_output.put_nowait(part.inline_data.data)
-                    if part.text:
-                        print(part.text)  # Print the text part for debugging
-
-        # Empty the queue on interruption to stop playback
-        while not audio_queue_output.empty():
-            audio_queue_output.get_nowait()
-
-async def play_audio():
-    """Plays audio from the speaker audio queue."""
-    stream = await asyncio.to_thread(
-        pya.open,
-        format=FORMAT,
-        channels=CHANNELS,
-        rate=RECEIVE_SAMPLE_RATE,
-        output=True,
-    )
-    while True:
-        bytestream = await audio_queue_output.get()
-        await asyncio.to_thread(stream.write, bytestream)
-
 async def run():
     """Main function to run the audio loop."""
+    client = create_client()
+    pool = None
+    if POOL_SIZE:
+        pool = await LiveSessionPool(client, MODEL, CONFIG, size=POOL_SIZE).start()
+    # The pool connects in the background while PortAudio finishes enumerating devices
+    pya = await audio.ready()
+    resolver = DeviceResolver(pya, DEVICE_CACHE, devices=audio.devices)
+    source, sink, settings = await asyncio.to_thread(resolver.configure, SETTINGS, INPUT_DEVICE, OUTPUT_DEVICE,
+                                                     DEVICE_HOST_API)
+    if pool:
+        await pool.wait_ready()
+    greeting_cache = GreetingCache(GREETING_CACHE_DIR) if GREETING_CACHE_DIR else None
+    supervisor = CallSupervisor(metrics_path=METRICS_PATH, metrics_port=METRICS_PORT, control_port=CONTROL_PORT,
+                                transcript_path=TRANSCRIPTS_DB)
+    supervisor.add(CallSession(
+        client, MODEL, CONFIG, pya,
+        input_device_index=source.index,
+        output_device_index=sink.index,
+        settings=settings,
+        pool=pool,
+        pickup_prompt=PICKUP_PROMPT,
+        greeting_cache=greeting_cache,
+        record_dir=RECORDINGS_DIR,
+    ))
+    print(f"Listening on {source}, playing on {sink}.")
+    print(f"Ready to take calls ({since_launch():.0f} ms after launch).", flush=True)
+    print("Start speaking! You can also type instructions here and press Enter to guide the AI.")
+    guidance = None
+    if CONTROL_PORT is None:
+        guidance = asyncio.create_task(supervisor.console_guidance())
+    else:
+        print(f"Steer calls with: python control_plane.py --url ws://127.0.0.1:{CONTROL_PORT} send <session_id> <guidance>")
     try:
-        async with client.aio.live.connect(
-            model=MODEL, config=CONFIG
-        ) as live_session:
-            print("Connected to Gemini. Start speaking! You can also type instructions here and press Enter to guide the AI.")
-            async with asyncio.TaskGroup() as tg:
-                tg.create_task(send_realtime(live_session))
-                tg.create_task(listen_audio())
-                tg.create_task(receive_audio(live_session))
-                tg.create_task(play_audio())
-                tg.create_task(send_text_guidance(live_session)) # Added text guidance task
+        await supervisor.run()
     except asyncio.CancelledError:
         pass
     finally:
-        if audio_stream:
-            audio_stream.close()
-        pya.terminate()
+        if guidance:
+            guidance.cancel()
+        if pool:
+            await pool.close()
+        audio.terminate()
         print("\nConnection closed.")
 
 if __name__ == "__main__":
     try:
         asyncio.run(run())
     except KeyboardInterrupt:
-        print("Interrupted by user.")
\ No newline at end of file
+        print("Interrupted by user.")
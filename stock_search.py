@@ -0,0 +1,422 @@
+"""
+Stock image search clients for Pexels, Unsplash and Pixabay.
+
+All requests go through one pooled httpx.AsyncClient per event loop, so
+repeated searches reuse warm keep-alive connections instead of a TCP and TLS
+handshake each time. search_platforms() queries every configured platform
+concurrently. Each platform has its own deadline, and a slow or failing
+provider only loses its own results: the others are returned with an error
+note for it. Total latency is the slowest provider's, not the sum. Given a
+search_cache.SearchCache, cached platforms skip the network entirely.
+
+Base URLs can be pointed at a local stand-in (mock_stock_api.py) with
+PEXELS_API_URL, UNSPLASH_API_URL and PIXABAY_API_URL.
+"""
+
+import asyncio
+import json
+import math
+import os
+import weakref
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+import httpx
+from dotenv import load_dotenv
+
+from rate_limit import TokenBucket
+
+load_dotenv()
+
+PLATFORMS = ("pexels", "unsplash", "pixabay")
+
+API_KEYS = {
+    "pexels": os.getenv("PEXELS_API_KEY"),
+    "unsplash": os.getenv("UNSPLASH_API_KEY"),
+    "pixabay": os.getenv("PIXABAY_API_KEY"),
+}
+
+API_URLS = {
+    "pexels": os.getenv("PEXELS_API_URL", "https://api.pexels.com/v1"),
+    "unsplash": os.getenv("UNSPLASH_API_URL", "https://api.unsplash.com"),
+    "pixabay": os.getenv("PIXABAY_API_URL", "https://pixabay.com/api"),
+}
+
+# Seconds each platform gets before its results are given up on
+TIMEOUTS = {"pexels": 5.0, "unsplash": 5.0, "pixabay": 5.0}
+
+# Smallest and largest per_page each API accepts (Pixabay rejects anything outside)
+PER_PAGE_LIMITS = {"pexels": (1, 80), "unsplash": (1, 30), "pixabay": (3, 200)}
+
+# Documented free-tier quotas as (requests, per seconds); response headers correct them
+RATE_LIMITS = {"pexels": (200, 3600), "unsplash": (50, 3600), "pixabay": (100, 60)}
+LIMITERS = {name: TokenBucket(*RATE_LIMITS[name]) for name in PLATFORMS}
+
+# Alt text kept per result in compact output
+COMPACT_ALT_CHARS = 60
+
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=120)
+
+_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+
+class StockImageError(Exception):
+    """Custom exception for stock image API errors"""
+    pass
+
+
+def validate_api_key(platform: str, api_key: str) -> None:
+    """Validate that API key exists for the platform"""
+    if not api_key:
+        raise StockImageError(f"API key for {platform} not found. Please set {platform.upper()}_API_KEY in your .env file")
+
+
+class StockImage:
+    """One search result, normalized across platforms."""
+
+    __slots__ = ("platform", "id", "url", "preview_url", "photographer", "alt", "width", "height", "also_on")
+
+    def __init__(self, platform, id, url, preview_url, photographer, alt, width, height, also_on=()):
+        self.platform = platform
+        self.id = id
+        self.url = url
+        self.preview_url = preview_url
+        self.photographer = photographer
+        self.alt = alt or ""
+        self.width = width
+        self.height = height
+        self.also_on = also_on  # "platform:id" of the same picture on other platforms
+
+    @property
+    def key(self) -> str:
+        return f"{self.platform}:{self.id}"
+
+    @property
+    def signature(self) -> tuple:
+        """What the same picture uploaded to two platforms has in common."""
+        return self.width, self.height, " ".join(self.photographer.casefold().split())
+
+    def to_list(self) -> list:
+        return [self.platform, self.id, self.url, self.preview_url, self.photographer, self.alt, self.width, self.height]
+
+    @classmethod
+    def from_list(cls, values):
+        return cls(*values)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def http_client() -> httpx.AsyncClient:
+    """The shared keep-alive client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(limits=POOL_LIMITS, follow_redirects=True)
+    return client
+
+
+async def close_clients():
+    """Closes the running loop's pooled client (e.g. at shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def _get_json(platform: str, url: str, params: dict, headers: dict = None, max_wait: float = None) -> dict:
+    """GET through the platform's rate limiter; a 429 waits out Retry-After and tries again within the deadline."""
+    name = platform.title()
+    limiter = LIMITERS[platform]
+    throttled = False
+    try:
+        async with asyncio.timeout(TIMEOUTS[platform] + (max_wait or 0)):
+            while True:
+                if not await limiter.acquire(max_wait):
+                    raise StockImageError(f"{name} rate limit: next request allowed in {limiter.delay():.1f} s")
+                response = await http_client().get(url, params=params, headers=headers)
+                if response.status_code == 429:
+                    limiter.throttle(response.headers)
+                    throttled = True
+                    continue
+                limiter.update(response.headers)
+                response.raise_for_status()
+                return response.json()
+    except TimeoutError:
+        reason = "rate limited" if throttled else "timed out"
+        raise StockImageError(f"{name} API {reason} after {TIMEOUTS[platform] + (max_wait or 0):g} s")
+    except (httpx.HTTPError, ValueError) as e:
+        raise StockImageError(f"{name} API error: {str(e)}")
+
+
+def clamp_per_page(platform: str, per_page: int) -> int:
+    low, high = PER_PAGE_LIMITS[platform]
+    return min(max(int(per_page), low), high)
+
+
+async def _pexels_page(query: str, per_page: int, page: int = 1, max_wait: float = None):
+    validate_api_key("Pexels", API_KEYS["pexels"])
+
+    params = {"query": query, "per_page": clamp_per_page("pexels", per_page), "page": page}
+    data = await _get_json("pexels", f"{API_URLS['pexels']}/search", params,
+                           {"Authorization": API_KEYS["pexels"]}, max_wait)
+    images = [StockImage("pexels", photo["id"], photo["src"]["original"], photo["src"]["medium"],
+                         photo["photographer"], photo.get("alt"), photo["width"], photo["height"])
+              for photo in data.get("photos", [])]
+    return images, data.get("total_results", data.get("total"))
+
+
+async def _unsplash_page(query: str, per_page: int, page: int = 1, max_wait: float = None):
+    validate_api_key("Unsplash", API_KEYS["unsplash"])
+
+    params = {"query": query, "per_page": clamp_per_page("unsplash", per_page), "page": page}
+    data = await _get_json("unsplash", f"{API_URLS['unsplash']}/search/photos", params,
+                           {"Authorization": f"Client-ID {API_KEYS['unsplash']}"}, max_wait)
+    images = [StockImage("unsplash", photo["id"], photo["urls"]["full"], photo["urls"]["regular"],
+                         photo["user"]["name"], photo.get("alt_description"), photo["width"], photo["height"])
+              for photo in data.get("results", [])]
+    return images, data.get("total")
+
+
+async def _pixabay_page(query: str, per_page: int, page: int = 1, max_wait: float = None):
+    validate_api_key("Pixabay", API_KEYS["pixabay"])
+
+    params = {"key": API_KEYS["pixabay"], "q": query, "per_page": clamp_per_page("pixabay", per_page),
+              "page": page, "image_type": "photo"}
+    data = await _get_json("pixabay", f"{API_URLS['pixabay']}/", params, None, max_wait)
+    images = [StockImage("pixabay", hit["id"], hit["largeImageURL"], hit["webformatURL"],
+                         hit["user"], hit.get("tags"), hit["imageWidth"], hit["imageHeight"])
+              for hit in data.get("hits", [])]
+    return images, data.get("totalHits")  # Pixabay serves at most totalHits, not total
+
+
+PAGES = {"pexels": _pexels_page, "unsplash": _unsplash_page, "pixabay": _pixabay_page}
+
+
+async def search_pexels(query: str, per_page: int = 10) -> List[StockImage]:
+    """Search images on Pexels"""
+    return (await _pexels_page(query, per_page))[0]
+
+
+async def search_unsplash(query: str, per_page: int = 10) -> List[StockImage]:
+    """Search images on Unsplash"""
+    return (await _unsplash_page(query, per_page))[0]
+
+
+async def search_pixabay(query: str, per_page: int = 10) -> List[StockImage]:
+    """Search images on Pixabay"""
+    return (await _pixabay_page(query, per_page))[0][:per_page]
+
+
+SEARCHES = {"pexels": search_pexels, "unsplash": search_unsplash, "pixabay": search_pixabay}
+
+
+_inflight = {}  # cache key -> task fetching it, so concurrent identical searches share one request
+
+
+async def _fetch(cache, key, name, query, per_page):
+    """One provider request per key at a time; the result goes into the cache."""
+    task = _inflight.get(key)
+    if task is None:
+        async def fetch():
+            images = await SEARCHES[name](query, per_page)
+            await cache.put(key, images)
+            return images
+        task = _inflight[key] = asyncio.ensure_future(fetch())
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+def _revalidate(cache, key, name, query, per_page):
+    if key in _inflight:
+        return
+    task = asyncio.ensure_future(_fetch(cache, key, name, query, per_page))
+    # A failed refresh keeps serving the stale entry
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+async def search_platforms(query: str, platform: str = "all", per_page: int = 10, cache=None):
+    """Searches every configured platform matching `platform` concurrently.
+
+    Returns (results, errors): images by platform for those that answered in
+    time, and an error message by platform for those that did not. With a
+    SearchCache, cached platforms are answered without the network (stale
+    entries are refreshed in the background) and only the rest are searched.
+    """
+    names = [name for name in PLATFORMS if platform in ("all", name) and API_KEYS[name]]
+    results, errors = {}, {}
+    searches = {}
+    for name in names:
+        if cache is None:
+            searches[name] = SEARCHES[name](query, per_page)
+            continue
+        key = cache.key(name, query, per_page)
+        hit = await cache.get(key)
+        if hit is None:
+            searches[name] = _fetch(cache, key, name, query, per_page)
+            continue
+        images, fresh = hit
+        if not fresh:
+            _revalidate(cache, key, name, query, per_page)
+        results[name] = images
+    if not searches:
+        return results, errors  # All cached
+
+    outcomes = await asyncio.gather(*searches.values(), return_exceptions=True)
+    for name, outcome in zip(searches, outcomes):
+        if isinstance(outcome, StockImageError):
+            errors[name] = str(outcome)
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results[name] = outcome
+    return {name: results[name] for name in names if name in results}, errors
+
+
+async def deep_search(query: str, platform: str = "all", pages: int = 5, per_page: int = 30, max_wait: float = 2.0):
+    """Fetches up to `pages` pages per platform, yielding (platform, page, images) as each arrives.
+
+    Every platform's first page goes out at once; its total then decides how
+    many more pages exist, and those are all requested concurrently. Each
+    request goes through the platform's rate limiter, and a page that would
+    have to wait more than max_wait for its turn is given up on. Failed pages
+    are yielded with a StockImageError in place of the images.
+    """
+    tasks = {}
+
+    def fetch(name, page, size):
+        task = asyncio.ensure_future(PAGES[name](query, size, page, max_wait))
+        tasks[task] = (name, page, size)
+
+    for name in PLATFORMS:
+        if platform in ("all", name) and API_KEYS[name]:
+            fetch(name, 1, clamp_per_page(name, per_page))
+    try:
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name, page, size = tasks.pop(task)
+                try:
+                    images, total = task.result()
+                except StockImageError as e:
+                    yield name, page, e
+                    continue
+                if page == 1:
+                    # Request the rest before handing this page over, so they are in flight meanwhile
+                    last = 1 if len(images) < size else pages if total is None else min(pages, math.ceil(total / size))
+                    for later in range(2, last + 1):
+                        fetch(name, later, size)
+                yield name, page, images
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _url_key(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.netloc + parts.path
+
+
+def merge_results(results: Dict[str, List[StockImage]], query: str = "") -> List[StockImage]:
+    """One ranked list from several platforms' results, with each picture once.
+
+    Each platform's own order is its relevance, so a result scores 1/(1 + its
+    position), plus a bonus for alt text containing the query's words and for
+    being found on more than one platform. Results with the same URL, or from
+    different platforms with the same dimensions and photographer, are one
+    picture: the best-scored copy is kept and lists the others in also_on.
+    """
+    words = set(query.casefold().split())
+    scored = []
+    for images in results.values():
+        for position, image in enumerate(images):
+            score = 1 / (1 + position)
+            if words:
+                score += 0.25 * len(words & set(image.alt.casefold().replace(",", " ").split())) / len(words)
+            scored.append((score, image))
+    scored.sort(key=lambda item: -item[0])
+
+    merged = []  # [score, image, also_on]
+    by_url, by_signature = {}, {}
+    for score, image in scored:
+        index = by_url.get(_url_key(image.url))
+        if index is None:
+            index = by_signature.get(image.signature)
+            if index is not None and merged[index][1].platform == image.platform:
+                index = None  # Same camera and photographer on one platform: different pictures
+        if index is not None:
+            merged[index][2].append(image.key)
+            merged[index][0] += 0.1
+            continue
+        by_url[_url_key(image.url)] = by_signature[image.signature] = len(merged)
+        merged.append([score, image, []])
+    merged.sort(key=lambda item: -item[0])
+
+    out = []
+    for _, image, also_on in merged:
+        if also_on:
+            # Cached records are shared, so the merged one is a copy
+            image = StockImage(*image.to_list(), also_on=tuple(also_on))
+        out.append(image)
+    return out
+
+
+def format_markdown(query: str, images: List[StockImage], errors: Dict[str, str], max_chars: int = 0) -> str:
+    """Markdown listing of ranked results, grouped by platform; past max_chars the lowest-ranked are left out."""
+    entries = {}
+    length = 0
+    for img in images:
+        entry = (
+            f"**{img.photographer}** - {img.width}x{img.height}\n"
+            f"   Preview: {img.preview_url}\n"
+            f"   Full: {img.url}\n"
+            f"   Alt: {img.alt}\n"
+            f"   ID: {img.key}\n"
+        )
+        if img.also_on:
+            entry += f"   Also on: {', '.join(img.also_on)}\n"
+        length += len(entry) + 5  # With its number
+        if max_chars and length > max_chars and entries:
+            break
+        entries[img.key] = entry
+
+    by_platform = {}
+    for img in images:
+        if img.key in entries:
+            by_platform.setdefault(img.platform, []).append(img)
+    formatted_results = []
+    for platform_name, platform_images in by_platform.items():
+        formatted_results.append(f"\n## {platform_name.title()} Results ({len(platform_images)} images):")
+        for i, img in enumerate(platform_images, 1):
+            formatted_results.append(f"{i}. {entries[img.key]}")
+    if len(entries) < len(images):
+        formatted_results.append(f"\n... {len(images) - len(entries)} more results (raise max_chars, or use output='compact')")
+    for platform_name, error in errors.items():
+        formatted_results.append(f"\n## {platform_name.title()}: no results ({error})")
+
+    return f"# Stock Image Search Results for '{query}'\n" + "\n".join(formatted_results)
+
+
+def format_compact(query: str, images: List[StockImage], errors: Dict[str, str], max_chars: int = 0) -> str:
+    """Ranked results as compact JSON rows (no URLs: download_images takes the IDs), cut to max_chars"""
+    def render(rows, alt_chars, omitted):
+        data = {"query": query, "fields": ["id", "w", "h", "by", "alt"],
+                "images": [[img.key, img.width, img.height, img.photographer, img.alt[:alt_chars]] for img in rows]}
+        if omitted:
+            data["more"] = omitted
+        if errors:
+            data["errors"] = errors
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    text = render(images, COMPACT_ALT_CHARS, 0)
+    if not max_chars or len(text) <= max_chars:
+        return text
+    # Over budget: shorten alt text first, then drop the lowest-ranked results
+    for alt_chars in (COMPACT_ALT_CHARS // 2, 0):
+        text = render(images, alt_chars, 0)
+        if len(text) <= max_chars:
+            return text
+    kept = len(images)
+    while kept > 1 and len(text) > max_chars:
+        kept = max(1, min(kept - 1, kept * max_chars // len(text)))
+        text = render(images[:kept], 0, len(images) - kept)
+    return text
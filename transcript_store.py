@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Persistent, searchable call transcripts.
+
+The Live API streams transcription in small fragments. The store's listener
+only appends (session, role, time, text) to a bounded deque, so the receive
+loop does no I/O. A background thread drains the deque. It merges fragments
+into turns: a turn ends when the other side speaks, when the speaker pauses
+for more than turn_gap_s, or when the call ends. Each flush writes the
+finished turns in one SQLite transaction and adds them to an FTS5 full-text
+index at the same time, so searches stay fast across thousands of calls
+without any batch reindexing.
+
+    python transcript_store.py search price --role customer
+    python transcript_store.py show 42
+    python transcript_store.py list
+"""
+
+import argparse
+import collections
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = "transcripts.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    turns INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY,
+    call_id INTEGER NOT NULL REFERENCES calls(id),
+    role TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_call ON turns(call_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(text, content='turns', content_rowid='id');
+"""
+
+
+class _OpenTurn:
+    __slots__ = ("role", "started_at", "last_at", "fragments")
+
+    def __init__(self, role, ts):
+        self.role = role
+        self.started_at = self.last_at = ts
+        self.fragments = []
+
+
+class TranscriptStore:
+    """Aggregates transcript fragments into turns and writes them to SQLite from a background thread."""
+
+    def __init__(self, path=DEFAULT_PATH, flush_interval=1.0, turn_gap_s=2.0, max_pending=10000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.turn_gap_s = turn_gap_s
+        self.max_pending = max_pending
+        self._pending = collections.deque()
+        self._stop = threading.Event()
+        self._thread = None
+        self._db = None
+        self._calls = {}  # session_id -> calls.id of the call running under that id
+        self._open = {}  # session_id -> _OpenTurn
+
+        # Counters
+        self.fragments = 0
+        self.turns_written = 0
+        self.dropped_fragments = 0
+        self.high_water = 0
+
+    def attach(self, session):
+        session.transcript_listeners.append(self.publish)
+
+    def publish(self, session_id, role, text, ts=None):
+        """Transcript listener: queues one fragment; never blocks or touches the database."""
+        if not text:
+            return
+        if len(self._pending) >= self.max_pending:
+            self.dropped_fragments += 1
+            return
+        self._pending.append((session_id, role, time.time() if ts is None else ts, text))
+
+    def end_call(self, session_id, ts=None):
+        """Closes the call's last turn; a later call under the same session id gets a new record."""
+        self._pending.append((session_id, None, time.time() if ts is None else ts, None))
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"transcripts:{self.path}", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stops the writer after it has written everything queued, open turns included."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "high_water": self.high_water,
+            "fragments": self.fragments,
+            "turns_written": self.turns_written,
+            "dropped_fragments": self.dropped_fragments,
+            "open_turns": len(self._open),
+        }
+
+    # --- writer thread ---
+
+    def _run(self):
+        self._db = connect(self.path)
+        try:
+            while not self._stop.wait(self.flush_interval):
+                self._flush()
+            self._flush(final=True)
+        finally:
+            self._db.close()
+            self._db = None
+
+    def _flush(self, final=False):
+        pending = self._pending
+        count = len(pending)  # Only what is queued now, so a busy producer cannot starve commits
+        self.high_water = max(self.high_water, count)
+        finished = []
+        ended = []
+        for _ in range(count):
+            session_id, role, ts, text = pending.popleft()
+            turn = self._open.get(session_id)
+            if role is None:
+                if turn:
+                    finished.append((session_id, self._open.pop(session_id)))
+                ended.append((session_id, ts))
+                continue
+            self.fragments += 1
+            if turn and (turn.role != role or ts - turn.last_at > self.turn_gap_s):
+                finished.append((session_id, self._open.pop(session_id)))
+                turn = None
+            if turn is None:
+                turn = self._open[session_id] = _OpenTurn(role, ts)
+            turn.fragments.append(text)
+            turn.last_at = ts
+
+        # Speakers that went quiet are done with their turn; make it searchable now
+        now = time.time()
+        for session_id, turn in list(self._open.items()):
+            if final or now - turn.last_at > self.turn_gap_s:
+                finished.append((session_id, self._open.pop(session_id)))
+
+        if finished or ended:
+            with self._db:
+                for session_id, turn in finished:
+                    self._write_turn(session_id, turn)
+                for session_id, ts in ended:
+                    call_id = self._calls.pop(session_id, None)
+                    if call_id is not None:
+                        self._db.execute("UPDATE calls SET ended_at = ? WHERE id = ?", (ts, call_id))
+
+    def _write_turn(self, session_id, turn):
+        text = "".join(turn.fragments).strip()
+        if not text:
+            return
+        call_id = self._calls.get(session_id)
+        if call_id is None:
+            call_id = self._calls[session_id] = self._db.execute(
+                "INSERT INTO calls (session_id, started_at) VALUES (?, ?)", (session_id, turn.started_at)
+            ).lastrowid
+        rowid = self._db.execute(
+            "INSERT INTO turns (call_id, role, started_at, ended_at, text) VALUES (?, ?, ?, ?, ?)",
+            (call_id, turn.role, turn.started_at, turn.last_at, text),
+        ).lastrowid
+        self._db.execute("INSERT INTO turns_fts (rowid, text) VALUES (?, ?)", (rowid, text))
+        self._db.execute("UPDATE calls SET turns = turns + 1 WHERE id = ?", (call_id,))
+        self.turns_written += 1
+
+
+def connect(path=DEFAULT_PATH) -> sqlite3.Connection:
+    """Opens (and if needed creates) a transcript database; WAL lets searches run during calls."""
+    db = sqlite3.connect(path)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+
+def search(db, query, role=None, limit=20) -> list:
+    """Turns matching an FTS5 query (e.g. 'price', '"call back"', 'price OR cost'), best first."""
+    sql = ("SELECT t.call_id, c.session_id, t.role, t.started_at, "
+           "snippet(turns_fts, 0, '[', ']', '...', 12) AS snippet "
+           "FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid JOIN calls c ON c.id = t.call_id "
+           "WHERE turns_fts MATCH ?")
+    params = [query]
+    if role:
+        sql += " AND t.role = ?"
+        params.append(role)
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    return [dict(row) for row in db.execute(sql, params)]
+
+
+def find_calls(db, query, role=None, limit=50) -> list:
+    """Calls with at least one turn matching query, most matches first."""
+    sql = ("SELECT c.id, c.session_id, c.started_at, c.ended_at, c.turns, COUNT(*) AS matches "
+           "FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid JOIN calls c ON c.id = t.call_id "
+           "WHERE turns_fts MATCH ?")
+    params = [query]
+    if role:
+        sql += " AND t.role = ?"
+        params.append(role)
+    sql += " GROUP BY c.id ORDER BY matches DESC, c.started_at DESC LIMIT ?"
+    params.append(limit)
+    return [dict(row) for row in db.execute(sql, params)]
+
+
+def transcript(db, call_id) -> list:
+    return [dict(row) for row in db.execute(
+        "SELECT role, started_at, ended_at, text FROM turns WHERE call_id = ? ORDER BY id", (call_id,))]
+
+
+def _when(ts):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    find = commands.add_parser("search", help="find calls by what was said (FTS5 query syntax)")
+    find.add_argument("query", nargs="+")
+    find.add_argument("--role", choices=["customer", "agent"])
+    find.add_argument("--limit", type=int, default=20)
+    show = commands.add_parser("show", help="print one call's transcript")
+    show.add_argument("call_id", type=int)
+    recent = commands.add_parser("list", help="list recent calls")
+    recent.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    db = connect(args.db)
+    if args.command == "search":
+        query = " ".join(args.query)
+        try:
+            calls = find_calls(db, query, args.role, args.limit)
+            turns = search(db, query, args.role, limit=len(calls) * 3)
+        except sqlite3.OperationalError as e:
+            raise SystemExit(f"bad query {query!r}: {e}")
+        for call in calls:
+            print(f"#{call['id']} {call['session_id']} {_when(call['started_at'])}  {call['matches']} matching turns")
+            for turn in turns:
+                if turn["call_id"] == call["id"]:
+                    print(f"    {turn['role']}: {turn['snippet']}")
+    elif args.command == "show":
+        for turn in transcript(db, args.call_id):
+            print(f"{_when(turn['started_at'])}  {turn['role']}: {turn['text']}")
+    else:
+        for call in db.execute("SELECT * FROM calls ORDER BY id DESC LIMIT ?", (args.limit,)):
+            print(f"#{call['id']} {call['session_id']} {_when(call['started_at'])}  {call['turns']} turns")
+
+
+if __name__ == "__main__":
+    main()
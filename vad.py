@@ -0,0 +1,110 @@
+"""
+Client-side voice activity detection that gates upstream audio.
+
+Frames are classified with vectorized NumPy energy and zero-crossing features
+against an adaptive noise floor. Speech frames pass through (preceded by a
+short pre-roll so word onsets are not clipped), a hangover keeps the gate open
+across short pauses, and during silence only sparse keep-alive frames are sent.
+"""
+
+import collections
+
+import numpy as np
+
+
+class VoiceActivityGate:
+    """Decides per capture frame whether it should be sent to the Live session."""
+
+    def __init__(self, rate=16000, frame_ms=20, margin_db=9.0, min_db=-55.0,
+                 max_zcr=0.35, onset_ms=40, hangover_ms=400, preroll_ms=200,
+                 keepalive_ms=1000):
+        self.rate = rate
+        self.frame_ms = frame_ms
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.max_zcr = max_zcr
+        self.onset_frames = max(1, onset_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.keepalive_frames = max(1, keepalive_ms // frame_ms) if keepalive_ms else 0
+
+        self.noise_floor_db = min_db
+        self.speaking = False
+        # (frame, already sent): a keep-alive stays in the pre-roll so later frames keep their context
+        self._preroll = collections.deque(maxlen=max(1, preroll_ms // frame_ms))
+        self._voiced_run = 0
+        self._quiet_run = 0
+        self._since_keepalive = 0
+
+        # Counters
+        self.frames_total = 0
+        self.frames_suppressed = 0
+
+    @property
+    def suppressed_fraction(self) -> float:
+        return self.frames_suppressed / self.frames_total if self.frames_total else 0.0
+
+    def is_voiced(self, frame) -> bool:
+        """Classifies one frame of 16-bit mono PCM and updates the noise floor."""
+        x = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+        power = float(np.dot(x, x)) / len(x)
+        level_db = 10.0 * np.log10(power / (32768.0 ** 2) + 1e-12)
+        zcr = np.count_nonzero(np.diff(np.signbit(x))) / len(x)
+
+        voiced = (level_db > self.min_db
+                  and level_db > self.noise_floor_db + self.margin_db
+                  and zcr < self.max_zcr)
+        if not voiced:
+            # Track the floor quickly downwards and slowly upwards
+            rate = 0.5 if level_db < self.noise_floor_db else 0.02
+            self.noise_floor_db += rate * (level_db - self.noise_floor_db)
+        return voiced
+
+    def process(self, frame):
+        """Returns (frames_to_send, speech_ended) for one capture frame.
+
+        frames_to_send is a list of bytes objects (possibly empty). speech_ended
+        is True exactly once when the gate closes, which is the moment to send
+        audio_stream_end so the server flushes its own detector.
+        """
+        self.frames_total += 1
+        voiced = self.is_voiced(frame)
+        self._voiced_run = self._voiced_run + 1 if voiced else 0
+        data = bytes(frame)
+
+        if self.speaking:
+            self._quiet_run = 0 if voiced else self._quiet_run + 1
+            if self._quiet_run < self.hangover_frames:
+                return [data], False
+            self.speaking = False
+            self._since_keepalive = 0
+            self._preroll.clear()
+            self.frames_suppressed += 1
+            return [], True
+
+        if self._voiced_run >= self.onset_frames:
+            self.speaking = True
+            self._quiet_run = 0
+            out = [held for held, sent in self._preroll if not sent]
+            # Pre-roll frames were counted as suppressed when they arrived
+            self.frames_suppressed -= len(out)
+            out.append(data)
+            self._preroll.clear()
+            return out, False
+
+        self._since_keepalive += 1
+        if self.keepalive_frames and self._since_keepalive >= self.keepalive_frames:
+            self._since_keepalive = 0
+            # Sent now, but the pre-roll keeps it and the frames before it: speech may already be starting
+            self._preroll.append((data, True))
+            return [data], False
+        self._preroll.append((data, False))
+        self.frames_suppressed += 1
+        return [], False
+
+    def stats(self) -> dict:
+        return {
+            "frames_total": self.frames_total,
+            "frames_suppressed": self.frames_suppressed,
+            "suppressed_fraction": round(self.suppressed_fraction, 3),
+            "noise_floor_db": round(self.noise_floor_db, 1),
+        }